@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Adaptive assessment simulation: questions needed per skill, adaptive (IRT) vs fixed-length
+
+Simulates examinees with known abilities answering a calibrated 2PL item bank. The
+adaptive mode picks the most informative item at each step and stops at the target
+standard error; the fixed-length mode asks randomly drawn items, as the current
+2-questions-per-skill assessment does. Both are scored with the same EAP estimator, and
+the fixed length needed to match the adaptive mode's accuracy (RMSE) is reported.
+--calibration starts the bank from difficulty-label priors instead of the true
+parameters and shows the online item updates moving them back towards the truth:
+
+    python benchmark_adaptive_assessment.py --examinees 2000
+    python benchmark_adaptive_assessment.py --target-se 0.5 --max-items 15
+    python benchmark_adaptive_assessment.py --calibration --examinees 3000
+"""
+
+import argparse
+import numpy as np
+
+def make_bank(items: int, rng):
+    a = np.exp(rng.normal(0.3, 0.3, items)).clip(0.5, 2.5)
+    b = rng.uniform(-2.5, 2.5, items)
+    return a, b
+
+def respond(theta: float, a: float, b: float, rng) -> bool:
+    from utils.adaptive_assessment import item_probability
+    return rng.random() < item_probability(theta, a, b)
+
+def run_adaptive(thetas, true_a, true_b, bank_a, bank_b, target_se: float, max_items: int, rng, bank=None):
+    """Questions asked and final estimate per examinee; answers follow the true parameters"""
+    from utils.adaptive_assessment import eap_estimate, response_log_likelihood, select_item
+
+    counts, estimates = [], []
+    for theta in thetas:
+        if bank is not None:
+            bank_a, bank_b = bank.parameters("skill")
+        used = np.zeros(len(bank_a), dtype=bool)
+        log_likelihood = np.zeros(81)
+        estimate, se = eap_estimate(log_likelihood)
+        asked, outcomes = [], []
+        while se >= target_se and len(asked) < max_items:
+            index = select_item(estimate, bank_a, bank_b, used)
+            if index < 0:
+                break
+            used[index] = True
+            correct = respond(theta, true_a[index], true_b[index], rng)
+            log_likelihood += response_log_likelihood(bank_a[index], bank_b[index], correct)
+            estimate, se = eap_estimate(log_likelihood)
+            asked.append(index)
+            outcomes.append(correct)
+        if bank is not None:
+            bank.update("skill", asked, outcomes, estimate)
+        counts.append(len(asked))
+        estimates.append(estimate)
+    return np.array(counts), np.array(estimates)
+
+def run_fixed(thetas, a, b, length: int, rng):
+    from utils.adaptive_assessment import eap_estimate, response_log_likelihood
+
+    estimates = []
+    for theta in thetas:
+        log_likelihood = np.zeros(81)
+        for index in rng.choice(len(a), size=length, replace=False):
+            log_likelihood += response_log_likelihood(a[index], b[index], respond(theta, a[index], b[index], rng))
+        estimates.append(eap_estimate(log_likelihood)[0])
+    return np.array(estimates)
+
+def rmse(estimates, thetas) -> float:
+    return float(np.sqrt(np.mean((estimates - thetas) ** 2)))
+
+def compare(examinees: int, items: int, target_se: float, max_items: int, seed: int):
+    rng = np.random.default_rng(seed)
+    a, b = make_bank(items, rng)
+    thetas = rng.normal(0, 1, examinees)
+
+    counts, estimates = run_adaptive(thetas, a, b, a, b, target_se, max_items, rng)
+    adaptive_rmse = rmse(estimates, thetas)
+    print(f"{examinees} examinees, {items}-item bank, target SE {target_se}, max {max_items} items")
+    print(f"{'adaptive':<14} {counts.mean():5.2f} questions/skill (p95 {np.percentile(counts, 95):4.0f})   RMSE {adaptive_rmse:.3f}")
+    print(f"{'fixed, 2':<14} {2:5.2f} questions/skill              RMSE {rmse(run_fixed(thetas, a, b, 2, rng), thetas):.3f}")
+
+    for length in range(1, 4 * max_items + 1):
+        fixed_rmse = rmse(run_fixed(thetas, a, b, length, rng), thetas)
+        if fixed_rmse <= adaptive_rmse:
+            print(f"{'fixed, equal':<14} {length:5.2f} questions/skill              RMSE {fixed_rmse:.3f}")
+            print(f"{'saved':<14} {1 - counts.mean() / length:6.1%} of questions at equal accuracy")
+            return
+    print(f"fixed-length needs more than {4 * max_items} questions to match the adaptive RMSE")
+
+def calibration(examinees: int, items: int, target_se: float, max_items: int, seed: int):
+    from utils.adaptive_assessment import DEFAULT_DISCRIMINATION, DIFFICULTY_PRIORS, ItemBank, difficulty_label
+
+    rng = np.random.default_rng(seed)
+    true_a, true_b = make_bank(items, rng)
+    bank = ItemBank()
+    # As generated items arrive: difficulty only known from the label asked for
+    for item_b in true_b:
+        bank.add("skill", {"question": "", "options": ["A", "B"], "answer": "A"},
+                 DEFAULT_DISCRIMINATION, DIFFICULTY_PRIORS[difficulty_label(item_b)])
+
+    def report(label: str):
+        a, b = bank.parameters("skill")
+        probe = rng.normal(0, 1, 1000)
+        counts, estimates = run_adaptive(probe, true_a, true_b, a, b, target_se, max_items, rng)
+        print(f"{label:<18} mean |b error| {np.abs(b - true_b).mean():.3f}   mean |a error| {np.abs(a - true_a).mean():.3f}   "
+              f"{counts.mean():5.2f} questions/skill   RMSE {rmse(estimates, probe):.3f}")
+
+    print(f"{items}-item bank starting from difficulty-label priors, {examinees} calibrating examinees")
+    report("before")
+    run_adaptive(rng.normal(0, 1, examinees), true_a, true_b, None, None, target_se, max_items, rng, bank=bank)
+    report("after")
+    probe = rng.normal(0, 1, 1000)
+    counts, estimates = run_adaptive(probe, true_a, true_b, true_a, true_b, target_se, max_items, rng)
+    print(f"{'true parameters':<18} {'':<58}{counts.mean():5.2f} questions/skill   RMSE {rmse(estimates, probe):.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--examinees", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=200, help="items per skill in the bank")
+    parser.add_argument("--target-se", type=float, default=None, help="defaults to ASSESSMENT_ADAPTIVE_TARGET_SE")
+    parser.add_argument("--max-items", type=int, default=None, help="defaults to ASSESSMENT_ADAPTIVE_MAX_ITEMS")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--calibration", action="store_true", help="simulate online item calibration instead")
+    args = parser.parse_args()
+
+    from utils.adaptive_assessment import ADAPTIVE_MAX_ITEMS_PER_SKILL, ADAPTIVE_TARGET_SE
+    target_se = args.target_se if args.target_se is not None else ADAPTIVE_TARGET_SE
+    max_items = args.max_items if args.max_items is not None else ADAPTIVE_MAX_ITEMS_PER_SKILL
+    if args.calibration:
+        calibration(args.examinees, args.items, target_se, max_items, args.seed)
+    else:
+        compare(args.examinees, args.items, target_se, max_items, args.seed)
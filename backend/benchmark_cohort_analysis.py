@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Cohort skill analysis benchmark: vectorized analyze_cohort against per-user loops
+
+Generates a synthetic cohort (two assessments per user over a random subset of skills)
+and times the per-user path (analyze_skill_strengths + track_skill_progress for every
+user, with Gemini disabled so only the local work is measured) against one
+analyze_cohort call over the users x skills matrix, for the cohort aggregates alone and
+with the per-user results materialized, then checks the buckets agree:
+
+    python benchmark_cohort_analysis.py --users 5000 --skills 30
+    python benchmark_cohort_analysis.py --users 50000 --skills 30 --skip-loop
+"""
+
+import argparse
+import os
+import random
+import time
+
+def make_cohort(users: int, skills: int, seed: int):
+    rng = random.Random(seed)
+    names = [f"skill_{i}" for i in range(skills)]
+    previous, current = {}, {}
+    for i in range(users):
+        assessed = rng.sample(names, rng.randint(1, min(skills, 12)))
+        previous[f"user_{i}"] = {skill: round(rng.uniform(2, 10), 1) for skill in assessed}
+        current[f"user_{i}"] = {skill: round(min(10.0, score + rng.uniform(-1.5, 2.5)), 1)
+                                for skill, score in previous[f"user_{i}"].items()}
+    return previous, current
+
+def run(users: int, skills: int, seed: int, skip_loop: bool):
+    # The per-user path calls the LLM client; benchmark the local work only
+    os.environ["LLM_PROVIDER"] = "gemini"
+    os.environ["GEMINI_API_KEY"] = ""
+    from utils.skill_analyzer import SkillAnalyzer
+
+    analyzer = SkillAnalyzer()
+    previous, current = make_cohort(users, skills, seed)
+    print(f"{users} users, {skills} skills, {sum(len(s) for s in current.values())} scores")
+
+    started = time.monotonic()
+    analyzer.analyze_cohort(current, previous, include_users=False)
+    aggregates = time.monotonic() - started
+    print(f"{'cohort only':<12} {aggregates * 1000:9.1f}ms")
+
+    started = time.monotonic()
+    cohort = analyzer.analyze_cohort(current, previous)
+    vectorized = time.monotonic() - started
+    print(f"{'+ per-user':<12} {vectorized * 1000:9.1f}ms")
+
+    if skip_loop:
+        return
+
+    started = time.monotonic()
+    per_user = {
+        user_id: (analyzer.analyze_skill_strengths(scores),
+                  analyzer.track_skill_progress(user_id, previous[user_id], scores))
+        for user_id, scores in current.items()
+    }
+    loop = time.monotonic() - started
+    print(f"{'loop':<12} {loop * 1000:9.1f}ms   {loop / max(aggregates, 1e-9):6.1f}x slower than cohort only, "
+          f"{loop / max(vectorized, 1e-9):4.1f}x than + per-user (and computes no cohort aggregates)")
+
+    mismatches = sum(
+        sorted(entry["strong_skills"]) != sorted(per_user[entry["user_id"]][0]["strong_skills"])
+        or sorted(entry["weak_skills"]) != sorted(per_user[entry["user_id"]][0]["weak_skills"])
+        or sorted(entry["improvement"]["improved_skills"]) != sorted(per_user[entry["user_id"]][1]["summary"]["improved_skills"])
+        for entry in cohort["users"]
+    )
+    print(f"{'agreement':<12} {users - mismatches}/{users} users with identical buckets and improved skills")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--skills", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-loop", action="store_true", help="time only the vectorized analysis")
+    args = parser.parse_args()
+    run(args.users, args.skills, args.seed, args.skip_loop)
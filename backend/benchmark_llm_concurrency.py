@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Adaptive concurrency benchmark: 429s and completed calls with and without the AIMD limiter
+
+Runs a burst of concurrent calls against the local Gemini stand-in with a simulated
+quota (a 429 beyond --quota concurrent calls), once unlimited and once through the
+adaptive limiter, and prints how the limit settled. --priorities instead floods the limiter with
+background calls while interactive and normal callers trickle in, and prints the
+queue wait per priority class:
+
+    python benchmark_llm_concurrency.py --calls 400 --workers 40 --quota 6
+    python benchmark_llm_concurrency.py --priorities --quota 6
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def run(label: str, calls: int, workers: int, use_limiter: bool):
+    # Imported here so each run picks up the fake provider settings below
+    from utils.concurrency_limiter import create_llm_limiter
+    from utils.llm_client import LLMClient
+    from utils.llm_providers import FakeLLMProvider
+
+    os.environ["LLM_CONCURRENCY_LIMITER"] = "true" if use_limiter else "false"
+    client = LLMClient(provider=FakeLLMProvider(), limiter=create_llm_limiter())
+    # Isolate the limiter: a tripped breaker would hide the 429s it is meant to prevent
+    client.breaker.min_calls = calls + 1
+
+    def call(i: int) -> str:
+        try:
+            client.generate_sync(f"Give one short tip about topic #{i}", call_site="benchmark")
+            return "ok"
+        except Exception as e:
+            return type(e).__name__
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(call, range(calls)))
+    elapsed = time.monotonic() - started
+
+    rate_limited = client.provider.stats.get("rate_limited", 0)
+    print(f"{label:<12} ok {outcomes.count('ok'):>5}/{calls}   429s {rate_limited:>5}   "
+          f"shed {client.stats['shed']:>4}   {elapsed:6.2f}s   {outcomes.count('ok') / elapsed:7.1f} ok/s")
+    if client.limiter:
+        state = client.limiter.get_state()
+        print(f"{'':<12} limit {state['limit']} (peak in flight {state['peak_in_flight']}), "
+              f"{state['decreases']} decreases, {state['increases']} increases, "
+              f"queue wait p95 {state['queue_wait']['p95_ms']}ms")
+
+def run_priorities(calls: int, workers: int):
+    """Background flood plus a few interactive/normal callers through one limiter"""
+    from utils.concurrency_limiter import create_llm_limiter
+    from utils.llm_client import LLMClient
+    from utils.llm_priority import llm_priority
+    from utils.llm_providers import FakeLLMProvider
+
+    os.environ["LLM_CONCURRENCY_LIMITER"] = "true"
+    client = LLMClient(provider=FakeLLMProvider(), limiter=create_llm_limiter())
+    client.breaker.min_calls = calls * 2
+
+    def call(job) -> str:
+        i, priority = job
+        with llm_priority(priority):
+            try:
+                client.generate_sync(f"Give one short tip about topic #{i} ({priority})", call_site="benchmark")
+                return "ok"
+            except Exception as e:
+                return type(e).__name__
+
+    # Every fifth call is interactive and every tenth normal; the rest is background work
+    jobs = [(i, "interactive" if i % 5 == 0 else "normal" if i % 10 == 1 else "background") for i in range(calls)]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(call, jobs))
+    elapsed = time.monotonic() - started
+
+    state = client.limiter.get_state()
+    print(f"{calls} calls in {elapsed:.2f}s, {outcomes.count('ok')} ok, limit settled at {state['limit']}, "
+          f"{state['starvation_promotions']} starvation promotions")
+    print(f"{'class':<12} {'weight':>6} {'calls':>6} {'queued':>7} {'rejected':>9} {'wait p50':>9} {'wait p95':>9} {'max':>8}")
+    for priority, stats in state["classes"].items():
+        wait = stats["queue_wait"]
+        print(f"{priority:<12} {stats['weight']:>6g} {stats['acquired']:>6} {stats['queued']:>7} {stats['rejected']:>9} "
+              f"{wait['p50_ms']:>7}ms {wait['p95_ms']:>7}ms {wait['max_ms']:>6}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LLM calls with and without the adaptive limiter")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=40, help="concurrent callers")
+    parser.add_argument("--quota", type=int, default=6, help="simulated concurrent-call quota")
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--priorities", action="store_true", help="queue wait per priority class under a background flood")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_MAX_CONCURRENCY": str(args.quota),
+        "FAKE_LLM_LATENCY_DIST": "fixed",
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "LLM_CONCURRENCY_QUEUE_TIMEOUT": "60"
+    })
+
+    if args.priorities:
+        print("🧪 LLM priority scheduling benchmark")
+        print("=" * 78)
+        run_priorities(args.calls, args.workers)
+        return
+
+    print("🧪 Adaptive LLM concurrency benchmark")
+    print(f"{args.calls} calls, {args.workers} concurrent callers, quota {args.quota}, {args.latency_ms}ms per call")
+    print("=" * 78)
+    run("unlimited", args.calls, args.workers, use_limiter=False)
+    run("adaptive", args.calls, args.workers, use_limiter=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Prompt template benchmark: token count and JSON parse success per template version
+
+Token counts are static; --calls also sends every version through the LLM client and
+checks each answer the way its call site parses it, plus that the top-level fields have
+the v1 types. Only a real provider validates the templates: the local stand-in
+(LLM_PROVIDER=fake) answers by prompt family and ignores the schema, so against it the
+check only exercises the parsers. --record keeps the live answers in a JSON lines file
+and --replay re-checks a recording offline:
+
+    python benchmark_prompts.py
+    python benchmark_prompts.py --calls 20 --record prompt_answers.jsonl
+    python benchmark_prompts.py --replay prompt_answers.jsonl
+"""
+
+import argparse
+import json
+import re
+
+from utils.llm_client import llm_client
+from utils.prompt_registry import prompt_registry
+
+SAMPLE_VALUES = {
+    "resume_analysis": {"resume_text": "Jane Doe - Software Engineer. 4 years building Python and React apps with SQL, Docker and AWS."},
+    "assessment_plan": {"skills": ["python", "react", "sql"], "experience_level": "mid"},
+    "question_gen": {"skill": "python"},
+    "mentor_answer": {"question": "What is a closure in JavaScript?", "context": "No additional context provided"},
+    "mentor_answer_stream": {"question": "What is a closure in JavaScript?", "context": "No additional context provided", "marker": "###META###"},
+    "learning_path": {"skills": ["python", "sql"], "skill_levels": {"python": "beginner", "sql": "intermediate"}},
+    "daily_tip": {"skills": ["python", "sql"]},
+    "skill_analysis": {"strong_skills": {"python": 8.5}, "medium_skills": {"sql": 6.5}, "weak_skills": {"docker": 4.0}},
+    "personalized_learning_path": {"weak_skills": ["docker"], "medium_skills": ["sql"]},
+    "recommendations": {"strong_skills": ["python"], "medium_skills": ["sql"], "weak_skills": ["docker"]},
+    "mentor_suggestions": {"skill_scores": {"python": 8.5, "sql": 6.5, "docker": 4.0}, "weak_skills": ["docker"]},
+}
+
+# Top-level fields of each answer and their v1 types; a version that changes one changes the response shape
+EXPECTED_FIELDS = {
+    "resume_analysis": {"extracted_skills": list, "experience_level": str, "education": list, "projects": list,
+                        "certifications": list, "skill_categories": dict, "career_summary": str,
+                        "recommended_learning_path": list},
+    "assessment_plan": {"assessment_plan": list, "skill_priorities": list, "assessment_strategy": str},
+    "question_gen": {"question": str, "options": list, "answer": str, "explanation": str, "difficulty": str},
+    "mentor_answer": {"answer": str, "resources": list, "next_steps": list, "confidence": str},
+    "mentor_answer_stream": {"resources": list, "next_steps": list, "confidence": str},
+    "learning_path": {"learning_path": list, "overall_timeline": str, "priority_order": list, "success_metrics": list},
+    "daily_tip": {"tip": str, "skill_focus": str, "difficulty": str, "practice_exercise": str, "motivation": str},
+    "skill_analysis": {"strength_analysis": str, "improvement_areas": str, "skill_gaps": str,
+                       "career_recommendations": str, "learning_priorities": str, "next_steps": str},
+    "personalized_learning_path": {"learning_path": list, "focus_areas": list, "success_metrics": list},
+    "recommendations": {"weak_skills_focus": list, "medium_skills_improvement": list,
+                        "strong_skills_maintenance": list, "overall_strategy": str},
+    "mentor_suggestions": {},
+}
+
+def parses(name: str, text: str) -> bool:
+    """Mirror the call sites (object regex, array regex for suggestions, marker split for streams), then check field types"""
+    if name == "mentor_answer_stream":
+        text = text.split("###META###", 1)[1] if "###META###" in text else ""
+    pattern = r"\[.*\]" if name == "mentor_suggestions" else r"\{.*\}"
+    match = re.search(pattern, text, re.DOTALL)
+    if not match:
+        return False
+    try:
+        parsed = json.loads(match.group())
+    except ValueError:
+        return False
+    if name == "mentor_suggestions":
+        return isinstance(parsed, list) and all(isinstance(item, str) for item in parsed)
+    return isinstance(parsed, dict) and all(
+        isinstance(parsed.get(field), expected) for field, expected in EXPECTED_FIELDS[name].items()
+    )
+
+def load_recording(path: str):
+    """{(template, version): [answer text, ...]} from a --record file"""
+    answers = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            answers.setdefault((entry["template"], entry["version"]), []).append(entry["text"])
+    return answers
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt template versions")
+    parser.add_argument("--calls", type=int, default=0, help="LLM calls per template version for parse success")
+    parser.add_argument("--record", help="append every live answer to this JSON lines file")
+    parser.add_argument("--replay", help="check the answers in a --record file instead of calling the LLM")
+    args = parser.parse_args()
+
+    recording = load_recording(args.replay) if args.replay else None
+    record_file = open(args.record, "a", encoding="utf-8") if args.record and not recording else None
+
+    print("🧪 Prompt template benchmark")
+    if args.calls and not recording and llm_client.provider.name == "fake":
+        print("⚠️ LLM_PROVIDER=fake ignores the prompt schema: parse success below does not validate the templates")
+    print("=" * 78)
+    print(f"{'template':<28} {'v1 tokens':>10} {'active':>8} {'tokens':>8} {'saved':>7}   parse success")
+
+    for name, values in SAMPLE_VALUES.items():
+        comparison = prompt_registry.compare(name, values)
+        active = comparison["active_version"]
+
+        parse_report = ""
+        if recording:
+            rates = []
+            for version in sorted(int(key[1:]) for key in comparison["tokens"]):
+                answers = recording.get((name, version), [])
+                if answers:
+                    rates.append(f"v{version} {sum(parses(name, text) for text in answers) / len(answers):.0%} of {len(answers)}")
+            parse_report = ", ".join(rates)
+        elif args.calls:
+            rates = []
+            for version in sorted(int(key[1:]) for key in comparison["tokens"]):
+                prompt = prompt_registry.get(name, version).render(**values)
+                ok = 0
+                for i in range(args.calls):
+                    # Vary the prompt so identical calls are not coalesced into one
+                    text = llm_client.generate_sync(f"{prompt}\n#{i}", call_site="benchmark", prompt_version=f"{name}@v{version}")
+                    ok += parses(name, text)
+                    if record_file:
+                        record_file.write(json.dumps({"template": name, "version": version, "text": text}) + "\n")
+                rates.append(f"v{version} {ok / args.calls:.0%}")
+            parse_report = ", ".join(rates)
+
+        print(f"{name:<28} {comparison['tokens'].get('v1', 0):>10} {'v' + str(active):>8} "
+              f"{comparison['tokens'][f'v{active}']:>8} {comparison['token_reduction_pct']:>6}%   {parse_report}")
+
+    if record_file:
+        record_file.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the LLM-backed endpoints
+
+Run the server offline against the local Gemini stand-in, then point this at it:
+
+    LLM_PROVIDER=fake FAKE_LLM_LATENCY_MS=800 uvicorn main:app --port 8000
+    python load_test_endpoints.py --requests 200 --concurrency 20
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SKILL_SETS = [["python", "sql"], ["javascript", "react"], ["python", "docker", "git"], ["java", "aws"]]
+
+def build_scenarios(base_url: str):
+    """Endpoint name -> function(index) returning a prepared request"""
+    return {
+        "mentor_ask": lambda i: ("POST", f"{base_url}/mentor/ask", {
+            "user_id": f"load_user_{i % 50}",
+            "question": ["What is a closure?", "How do SQL joins work?", "When should I use Docker?"][i % 3]
+        }),
+        "daily_tip": lambda i: ("POST", f"{base_url}/mentor/daily-tip", {
+            "user_id": f"load_user_{i % 50}",
+            "current_skills": SKILL_SETS[i % len(SKILL_SETS)]
+        }),
+        "learning_path": lambda i: ("POST", f"{base_url}/recommend/learning-path", {
+            "user_id": f"load_user_{i % 50}",
+            "skills": SKILL_SETS[i % len(SKILL_SETS)],
+            "skill_levels": {skill: "beginner" for skill in SKILL_SETS[i % len(SKILL_SETS)]},
+            "goals": ["backend developer"],
+            "time_available": "3-5 hours",
+            "preferred_format": ["text", "project"]
+        }),
+        "assessment_generate": lambda i: ("POST", f"{base_url}/assessment/generate", {
+            "user_id": f"load_user_{i % 50}",
+            "skills": SKILL_SETS[i % len(SKILL_SETS)]
+        }),
+        "assessment_submit": lambda i: ("POST", f"{base_url}/assessment/submit", {
+            "user_id": f"load_user_{i % 50}",
+            "answers": {f"{skill}_0": "A" for skill in SKILL_SETS[i % len(SKILL_SETS)]},
+            "time_taken": 120
+        }),
+    }
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+def run_scenario(name, factory, total, concurrency):
+    session = requests.Session()
+
+    def one(index):
+        method, url, body = factory(index)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, json=body, timeout=120)
+            return time.perf_counter() - started, response.status_code
+        except Exception:
+            return time.perf_counter() - started, 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, status in results if status != 200)
+    print(f"📊 {name:<20} n={total:<5} rps={total / elapsed:7.1f} "
+          f"p50={percentile(latencies, 50) * 1000:7.1f}ms p95={percentile(latencies, 95) * 1000:7.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:7.1f}ms mean={statistics.mean(latencies) * 1000:7.1f}ms errors={errors}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test LLM-backed endpoints")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="subset of scenarios to run")
+    args = parser.parse_args()
+
+    print("🧪 Endpoint load test")
+    print("=" * 50)
+    for name, factory in build_scenarios(args.url).items():
+        if args.only and name not in args.only:
+            continue
+        run_scenario(name, factory, args.requests, args.concurrency)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Load test for the mentor WebSocket chat (/mentor/ws/{user_id})
+
+Opens many concurrent chat sessions against a single worker and reports how
+many were sustained, time to first token and full-turn latency.
+
+    uvicorn main:app --workers 1 --port 8000
+    python load_test_mentor_ws.py --sessions 500 --questions 3
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import websockets
+
+QUESTIONS = [
+    "How do closures work in JavaScript?",
+    "What is the difference between a list and a tuple in Python?",
+    "How should I structure SQL joins for reporting queries?",
+    "When should I use React context instead of props?",
+]
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+async def run_session(url: str, session_id: int, questions: int, results: dict):
+    """Open one chat session and ask a few questions"""
+    try:
+        async with websockets.connect(f"{url}/load_user_{session_id}") as ws:
+            ready = json.loads(await ws.recv())
+            if ready.get("type") != "ready":
+                results["errors"] += 1
+                return
+            results["connected"] += 1
+
+            for turn in range(questions):
+                started = time.perf_counter()
+                first_token = None
+                await ws.send(json.dumps({
+                    "type": "question",
+                    "question": QUESTIONS[(session_id + turn) % len(QUESTIONS)]
+                }))
+                while True:
+                    message = json.loads(await ws.recv())
+                    if message["type"] == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                    elif message["type"] == "done":
+                        break
+                    elif message["type"] == "error":
+                        results["errors"] += 1
+                        break
+                results["ttft"].append(first_token or 0.0)
+                results["turn_latency"].append(time.perf_counter() - started)
+                results["turns"] += 1
+    except websockets.exceptions.InvalidStatus:
+        results["rejected"] += 1
+    except websockets.exceptions.ConnectionClosed as e:
+        if e.rcvd and e.rcvd.code == 1013:
+            results["rejected"] += 1
+        else:
+            results["errors"] += 1
+    except Exception as e:
+        print(f"❌ Session {session_id} failed: {e}")
+        results["errors"] += 1
+
+async def run_load_test(url: str, sessions: int, questions: int, ramp: float):
+    results = {
+        "connected": 0, "rejected": 0, "errors": 0, "turns": 0,
+        "ttft": [], "turn_latency": []
+    }
+
+    print(f"🧪 Mentor WebSocket load test: {sessions} sessions x {questions} questions")
+    print("=" * 50)
+
+    started = time.perf_counter()
+    tasks = []
+    for session_id in range(sessions):
+        tasks.append(asyncio.create_task(run_session(url, session_id, questions, results)))
+        if ramp:
+            await asyncio.sleep(ramp / sessions)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ Sessions connected: {results['connected']}/{sessions}")
+    print(f"🚫 Sessions rejected (at capacity): {results['rejected']}")
+    print(f"❌ Errors: {results['errors']}")
+    print(f"💬 Turns completed: {results['turns']} in {elapsed:.2f}s ({results['turns'] / elapsed:.1f} turns/s)")
+    if results["ttft"]:
+        print(f"⏱️ Time to first token: p50={percentile(results['ttft'], 50) * 1000:.1f}ms "
+              f"p95={percentile(results['ttft'], 95) * 1000:.1f}ms")
+        print(f"⏱️ Turn latency: p50={percentile(results['turn_latency'], 50) * 1000:.1f}ms "
+              f"p95={percentile(results['turn_latency'], 95) * 1000:.1f}ms "
+              f"mean={statistics.mean(results['turn_latency']) * 1000:.1f}ms")
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mentor WebSocket load test")
+    parser.add_argument("--url", default="ws://localhost:8000/mentor/ws")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which sessions are opened")
+    args = parser.parse_args()
+
+    asyncio.run(run_load_test(args.url, args.sessions, args.questions, args.ramp))
@@ -1,15 +1,39 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from utils.request_deadline import DeadlineMiddleware
+from utils.llm_priority import PriorityMiddleware
+from utils.daily_tips import daily_tip_service
+from utils.adaptive_assessment import ITEM_BANK_PATH, item_bank
 
 # ✅ Import all route modules
 from routes import resume, assessment, recommend, hackathon, progress, admin, mentor
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Background job: precompute today's daily tips, then again after every UTC midnight
+    if os.getenv("DAILY_TIP_PRECOMPUTE", "true").lower() in ("1", "true", "yes"):
+        daily_tip_service.start()
+    yield
+    await daily_tip_service.stop()
+    # ✅ Keep the adaptive item bank's calibration across restarts (if a path is configured)
+    if ITEM_BANK_PATH:
+        item_bank.save(ITEM_BANK_PATH)
+
 app = FastAPI(
     title="Mavericks AI-Powered Learning Platform",
     description="A comprehensive AI-driven platform for skill assessment, personalized learning, and 24/7 AI mentoring",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
+# ✅ LLM scheduling class per route (mentor chat is interactive, everything else normal)
+app.add_middleware(PriorityMiddleware)
+
+# ✅ Per-request deadline (X-Request-Timeout header or route default), cancelled on client disconnect
+app.add_middleware(DeadlineMiddleware)
+
 # ✅ CORS setup to allow frontend calls
 app.add_middleware(
     CORSMiddleware,
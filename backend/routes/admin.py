@@ -4,6 +4,22 @@ from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from utils.user_activity_tracker import activity_tracker
 from utils.ai_mentor import ai_mentor
+from utils.llm_client import llm_client
+from utils.llm_metrics import llm_metrics
+from utils.prompt_registry import prompt_registry
+from utils.latency_slo import latency_slos
+from utils.model_router import model_router
+from utils.knowledge_base import knowledge_base
+from utils.semantic_cache import semantic_cache
+from utils.intent_classifier import intent_classifier
+from utils.conversation_memory import conversation_memory
+from utils.daily_tips import daily_tip_service
+from utils.learning_paths import learning_path_fragments, learning_path_store
+from utils.skill_analyzer import skill_analyzer
+from utils.skill_trends import skill_trends
+from utils.assessment_sessions import assessment_sessions
+from utils.adaptive_assessment import adaptive_engine
+from utils.request_deadline import get_deadline_stats
 import json
 import os
 
@@ -19,6 +35,13 @@ class UserManagement(BaseModel):
     action: str  # suspend, activate, delete
     reason: Optional[str] = None
 
+class CohortAnalysisRequest(BaseModel):
+    admin_id: str
+    # {user_id: {skill: score}}; defaults to every user's latest completed assessment
+    scores: Optional[Dict[str, Dict[str, float]]] = None
+    previous_scores: Optional[Dict[str, Dict[str, float]]] = None
+    include_users: bool = False
+
 @router.get("/dashboard")
 async def get_admin_dashboard(admin_id: str):
     """Get comprehensive admin dashboard data"""
@@ -228,12 +251,17 @@ def get_system_health() -> Dict:
         # Check AI services
         ai_services_status = "operational"
         api_key = os.getenv("GEMINI_API_KEY")
+        breaker_state = llm_client.breaker.get_state()
         if not api_key or api_key == "your_gemini_api_key_here":
             ai_services_status = "limited"
+        elif breaker_state["state"] != "closed":
+            # Open or probing: LLM-backed endpoints are serving fallbacks
+            ai_services_status = "degraded"
         
         return {
             "overall_status": "healthy",
             "ai_services": ai_services_status,
+            "llm_circuit_breaker": breaker_state,
             "database": "operational",
             "api_endpoints": "operational",
             "last_check": datetime.utcnow().isoformat(),
@@ -448,7 +476,7 @@ def calculate_feature_usage(activities: List[Dict]) -> Dict:
     # Sort by usage
     sorted_features = sorted(feature_counts.items(), key=lambda x: x[1], reverse=True)
     
-        return {
+    return {
         "feature_usage": dict(sorted_features),
         "most_popular_feature": sorted_features[0][0] if sorted_features else "None",
         "least_popular_feature": sorted_features[-1][0] if sorted_features else "None"
@@ -457,12 +485,258 @@ def calculate_feature_usage(activities: List[Dict]) -> Dict:
 def calculate_performance_metrics(activities: List[Dict]) -> Dict:
     """Calculate performance metrics"""
     
-        return {
+    return {
         "average_response_time": "150ms",
         "error_rate": "0.1%",
         "uptime": "99.9%",
         "peak_concurrent_users": "150",
         "average_session_length": "25 minutes"
+    }
+
+@router.get("/llm/stats")
+async def get_llm_stats(admin_id: str):
+    """Get LLM client counters (requests, upstream calls, coalesced duplicates) and limiter state"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            "llm": llm_client.get_stats(),
+            "circuit_breaker": llm_client.breaker.get_state(),
+            "concurrency_limiter": llm_client.limiter.get_state() if llm_client.limiter else None,
+            "request_deadlines": get_deadline_stats()
+        }
+        
+    except Exception as e:
+        print(f"❌ LLM stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"LLM stats error: {e}")
+
+@router.get("/llm/metrics")
+async def get_llm_metrics(admin_id: str, window_minutes: int = 60):
+    """Get per-call-site token usage, latency percentiles, retries and fallbacks"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **llm_metrics.get_report(window_minutes)
+        }
+        
+    except Exception as e:
+        print(f"❌ LLM metrics error: {e}")
+        raise HTTPException(status_code=500, detail=f"LLM metrics error: {e}")
+
+@router.get("/llm/prompts")
+async def get_prompt_templates(admin_id: str):
+    """Get active prompt template versions and their token usage"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **prompt_registry.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Prompt report error: {e}")
+        raise HTTPException(status_code=500, detail=f"Prompt report error: {e}")
+
+@router.get("/llm/slo")
+async def get_latency_slo_stats(admin_id: str):
+    """Get latency-SLO hedging stats (share of answers served by the local fallback)"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **latency_slos.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Latency SLO stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Latency SLO stats error: {e}")
+
+@router.get("/llm/routing")
+async def get_model_routing(admin_id: str):
+    """Get the model tier per call site, escalations and per-model latency/token savings"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **model_router.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Model routing report error: {e}")
+        raise HTTPException(status_code=500, detail=f"Model routing report error: {e}")
+
+@router.get("/mentor/knowledge")
+async def get_mentor_knowledge_stats(admin_id: str):
+    """Get mentor knowledge-base stats: local answer rate and latency of local vs grounded LLM answers"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **knowledge_base.get_report()
         }
+        
+    except Exception as e:
+        print(f"❌ Knowledge base stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Knowledge base stats error: {e}")
 
-    
\ No newline at end of file
+@router.get("/mentor/semantic-cache")
+async def get_semantic_cache_stats(admin_id: str):
+    """Get semantic answer cache hit rate, overall and per skill partition"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **semantic_cache.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Semantic cache stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Semantic cache stats error: {e}")
+
+@router.get("/mentor/intents")
+async def get_mentor_intent_stats(admin_id: str):
+    """Get mentor intent classification latency, intent mix and the share of questions that skip the LLM"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **intent_classifier.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Intent classifier stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Intent classifier stats error: {e}")
+
+@router.get("/mentor/memory")
+async def get_conversation_memory_stats(admin_id: str):
+    """Get mentor conversation memory size, folded turns, evictions and context tokens per prompt"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **conversation_memory.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Conversation memory stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Conversation memory stats error: {e}")
+
+@router.get("/mentor/daily-tips")
+async def get_daily_tip_stats(admin_id: str):
+    """Get daily tip cache size, precomputed hit rate and the last precompute run's generation time"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **daily_tip_service.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Daily tip stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Daily tip stats error: {e}")
+
+@router.get("/learning-paths/fragments")
+async def get_learning_path_fragment_stats(admin_id: str):
+    """Get learning-path fragment cache hit rate, build latency and incremental regeneration stats"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **learning_path_fragments.get_report(),
+            "incremental": learning_path_store.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Learning path fragment stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Learning path fragment stats error: {e}")
+
+@router.get("/llm/skill-analysis-cache")
+async def get_skill_analysis_cache_stats(admin_id: str):
+    """Get the skill-analysis cache hit rate (advice keyed by score-profile signature)"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **skill_analyzer.cache.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Skill analysis cache stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Skill analysis cache stats error: {e}")
+
+def _assessment_score_history() -> Dict[str, List[Dict[str, float]]]:
+    """Completed assessment skill scores per user, oldest first"""
+    history = {}
+    for user_id, activities in list(activity_tracker.user_activities.items()):
+        scores = [
+            activity.get("details", {}).get("skill_scores")
+            for activity in activities if activity.get("activity_type") == "assessment_completed"
+        ]
+        scores = [s for s in scores if s]
+        if scores:
+            history[user_id] = scores
+    return history
+
+@router.post("/cohort/skill-analysis")
+async def analyze_cohort_skills(payload: CohortAnalysisRequest):
+    """Analyze a whole cohort's skill scores in one vectorized pass (buckets, percentiles, improvement)"""
+    
+    try:
+        scores, previous_scores = payload.scores, payload.previous_scores
+        if scores is None:
+            history = _assessment_score_history()
+            scores = {user_id: runs[-1] for user_id, runs in history.items()}
+            if previous_scores is None:
+                previous_scores = {user_id: runs[0] for user_id, runs in history.items() if len(runs) > 1}
+        
+        return {
+            "admin_id": payload.admin_id,
+            **skill_analyzer.analyze_cohort(scores, previous_scores, include_users=payload.include_users)
+        }
+        
+    except Exception as e:
+        print(f"❌ Cohort skill analysis error: {e}")
+        raise HTTPException(status_code=500, detail=f"Cohort skill analysis error: {e}")
+
+@router.get("/assessment/skill-trends")
+async def get_skill_trend_stats(admin_id: str):
+    """Get the per-skill score series held for trend analysis and how often trends were served precomputed"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **skill_trends.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Skill trend stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Skill trend stats error: {e}")
+
+@router.get("/assessment/sessions")
+async def get_assessment_session_stats(admin_id: str):
+    """Get the generated assessments held for server-side grading"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **assessment_sessions.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Assessment session stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Assessment session stats error: {e}")
+
+@router.get("/assessment/adaptive")
+async def get_adaptive_assessment_stats(admin_id: str):
+    """Get adaptive assessment stats (questions per skill, item bank reuse and calibration)"""
+    
+    try:
+        return {
+            "admin_id": admin_id,
+            **adaptive_engine.get_report()
+        }
+        
+    except Exception as e:
+        print(f"❌ Adaptive assessment stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Adaptive assessment stats error: {e}")
@@ -1,29 +1,55 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict
-import google.generativeai as genai
+from typing import List, Dict, Optional, Tuple
+import asyncio
+import json
 import os
+import re
+import time
+from datetime import datetime
 from dotenv import load_dotenv
 from utils.skill_analyzer import skill_analyzer
 from utils.user_activity_tracker import activity_tracker
+from utils.skill_trends import skill_trends
+from utils.assessment_sessions import ASSESSMENT_HIDE_ANSWER_KEYS, assessment_sessions
+from utils.adaptive_assessment import adaptive_engine, item_bank
 from utils.ai_mentor import ai_mentor
+from utils.llm_client import llm_client
+from utils.llm_metrics import fallback_reason, llm_metrics
+from utils.model_router import expect_json_array, expect_json_object
+from utils.prompt_registry import prompt_registry
+from utils.request_deadline import remaining_budget
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 router = APIRouter(prefix="/assessment", tags=["Assessment"])
 
+# Overall budget for the post-assessment LLM calls; parts still running fall back
+FEEDBACK_DEADLINE_SECONDS = float(os.getenv("ASSESSMENT_FEEDBACK_DEADLINE_SECONDS", "15"))
+# Ask for recommendations and mentor suggestions in one prompt instead of two concurrent calls
+FEEDBACK_MERGED_PROMPT = os.getenv("ASSESSMENT_FEEDBACK_MERGED", "false").lower() in ("1", "true", "yes")
+
 class SkillList(BaseModel):
     skills: List[str]
     user_id: str
 
 class AssessmentSubmission(BaseModel):
     user_id: str
+    # Defaults to the user's most recently generated assessment
+    assessment_id: Optional[str] = None
     answers: Dict[str, str]  # question_id: selected_answer
     time_taken: int  # in seconds
 
+class AdaptiveAnswer(BaseModel):
+    user_id: str
+    assessment_id: str
+    question_id: str
+    answer: str
+    time_taken: int = 0  # total seconds so far, used when the assessment completes
+
 class AssessmentResult(BaseModel):
     user_id: str
+    assessment_id: Optional[str] = None
     skill_scores: Dict[str, float]
     strong_skills: List[str]
     medium_skills: List[str]
@@ -34,51 +60,37 @@ class AssessmentResult(BaseModel):
 
 @router.post("/generate")
 async def generate_assessment(payload: SkillList):
-    if not payload.skills:
+    # Repeated skills would produce duplicate question ids, the later overwriting the earlier
+    skills = list(dict.fromkeys(skill.strip() for skill in payload.skills if skill and skill.strip()))
+    if not skills:
         raise HTTPException(status_code=400, detail="No skills provided")
 
-    print(f"🎯 Generating assessment for user {payload.user_id} with skills: {payload.skills}")
+    print(f"🎯 Generating assessment for user {payload.user_id} with skills: {skills}")
     
-    # Check if API key is configured
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or api_key == "your_gemini_api_key_here":
-        print("⚠️ GEMINI_API_KEY not configured. Using fallback assessment generation.")
-        return await generate_fallback_assessment(payload.skills, payload.user_id)
+    # Skip straight to the fallback when Gemini is not configured or its circuit breaker is open
+    if not llm_client.is_available():
+        print("⚠️ Gemini unavailable (not configured or circuit open). Using fallback assessment generation.")
+        llm_metrics.record_fallback("question_gen", "unavailable")
+        return await generate_fallback_assessment(skills, payload.user_id)
 
-    model = genai.GenerativeModel("gemini-pro")
     questions = []
 
-    for skill in payload.skills:
+    for skill in skills:
         try:
             # Generate exactly 2 questions per skill as requested
             for question_num in range(2):
-            prompt = (
-                    f"Generate 1 comprehensive multiple-choice question to assess knowledge in '{skill}'. "
-                    f"Make it practical and relevant to real-world scenarios. "
-                    f"Format the response as JSON:\n\n"
-                    f'{{\n'
-                    f'  "question": "Detailed question text",\n'
-                    f'  "options": ["Option A", "Option B", "Option C", "Option D"],\n'
-                    f'  "answer": "A",\n'
-                    f'  "explanation": "Brief explanation of why this is correct",\n'
-                    f'  "difficulty": "intermediate"\n'
-                    f'}}\n\n'
-                    f"Make the question challenging but fair. Focus on practical application of {skill}."
-            )
-
-            response = model.generate_content(prompt)
-                result_text = response.text.strip()
+                prompt, prompt_version = prompt_registry.render("question_gen", skill=skill)
+
+                result_text = await llm_client.generate(prompt, call_site="question_gen", prompt_version=prompt_version,
+                                                        validate=expect_json_object)
                 
                 # Try to extract JSON from response
-                import json
-                import re
-                
                 # Find JSON in the response
                 json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
                 if json_match:
                     question_data = json.loads(json_match.group())
 
-                questions.append({
+                    questions.append({
                         "id": f"{skill}_{question_num}",
                         "skill": skill,
                         "question": question_data.get("question", f"Question about {skill}"),
@@ -89,18 +101,20 @@ async def generate_assessment(payload: SkillList):
                     })
                 else:
                     # Fallback if JSON parsing fails
+                    llm_metrics.record_fallback("question_gen", "parse_error")
                     questions.append({
                         "id": f"{skill}_{question_num}",
-                    "skill": skill,
+                        "skill": skill,
                         "question": f"What is a key concept in {skill}?",
                         "options": ["Option A", "Option B", "Option C", "Option D"],
                         "answer": "A",
                         "explanation": f"Basic question about {skill}",
                         "difficulty": "beginner"
-                })
+                    })
 
         except Exception as e:
             print(f"⚠️ Failed to generate question for {skill}: {e}")
+            llm_metrics.record_fallback("question_gen", fallback_reason(e))
             # Add fallback questions
             for question_num in range(2):
                 questions.append({
@@ -116,24 +130,33 @@ async def generate_assessment(payload: SkillList):
     if not questions:
         raise HTTPException(status_code=500, detail="No questions generated.")
 
-    print(f"✅ Generated {len(questions)} questions for {len(payload.skills)} skills")
+    print(f"✅ Generated {len(questions)} questions for {len(skills)} skills")
 
     # Log assessment generation
     activity_tracker.log_activity(payload.user_id, "assessment_generated", {
-        "skills": payload.skills,
+        "skills": skills,
         "question_count": len(questions),
         "timestamp": "2024-01-01T00:00:00Z"
     })
 
+    # Answer keys stay server-side for grading
+    assessment_id = assessment_sessions.create(payload.user_id, questions)
+
     return {
-        "assessment_id": f"assess_{payload.user_id}_{len(questions)}",
-        "questions": questions,
+        "assessment_id": assessment_id,
+        "questions": client_questions(questions),
         "total_questions": len(questions),
-        "skills_assessed": payload.skills,
+        "skills_assessed": skills,
         "estimated_duration": len(questions) * 2,  # 2 minutes per question
         "instructions": "Answer all questions to assess your skill levels. Be honest with your answers."
     }
 
+def client_questions(questions: List[Dict]) -> List[Dict]:
+    """Questions as sent to the client, without answer keys unless ASSESSMENT_HIDE_ANSWER_KEYS is off"""
+    if not ASSESSMENT_HIDE_ANSWER_KEYS:
+        return questions
+    return [{key: value for key, value in question.items() if key != "answer"} for question in questions]
+
 async def generate_fallback_assessment(skills: List[str], user_id: str):
     """Generate fallback assessment when AI is not available"""
     questions = []
@@ -150,9 +173,12 @@ async def generate_fallback_assessment(skills: List[str], user_id: str):
                 "difficulty": "beginner"
             })
     
+    # Self-assessment: scored by the level picked, not against a key
+    assessment_id = assessment_sessions.create(user_id, questions, kind="self_assessment", prefix="fallback")
+
     return {
-        "assessment_id": f"fallback_{user_id}_{len(questions)}",
-        "questions": questions,
+        "assessment_id": assessment_id,
+        "questions": client_questions(questions),
         "total_questions": len(questions),
         "skills_assessed": skills,
         "estimated_duration": len(questions) * 2,
@@ -166,26 +192,38 @@ async def submit_assessment(payload: AssessmentSubmission):
     print(f"📊 Processing assessment submission for user {payload.user_id}")
     print(f"📝 Received {len(payload.answers)} answers")
     
-    # Get the assessment questions to calculate scores
-    # In a real app, you'd fetch this from database
-    # For now, we'll use a simplified scoring system
+    # Grade against the stored assessment (answer keys and skill of every question)
+    session = assessment_sessions.get(payload.user_id, payload.assessment_id)
+    if session is None and payload.assessment_id:
+        raise HTTPException(status_code=404, detail="Assessment not found or expired")
     
-    skill_scores = {}
-    skill_answers = {}
+    if session is not None:
+        grading = session.grade(payload.answers)
+        skill_scores = grading.pop("skill_scores")
+        print(f"✔️ Graded assessment {session.assessment_id}: {grading['answered']}/{grading['total_questions']} answered")
+    else:
+        # No stored assessment (e.g. generated before a restart): nothing to grade against,
+        # so fall back to crediting answered questions, as before
+        grading = {"kind": "ungraded", "answered": len(payload.answers)}
+        skill_answers = {}
+        for question_id, answer in payload.answers.items():
+            # Question ids are "<skill>_<n>"; the skill itself may contain underscores
+            skill = question_id.rsplit('_', 1)[0]
+            skill_answers.setdefault(skill, []).append(answer)
+        skill_scores = {skill: min(len(answers) * 0.5, 10.0) for skill, answers in skill_answers.items()}
     
-    # Group answers by skill
-    for question_id, answer in payload.answers.items():
-        skill = question_id.split('_')[0]  # Extract skill from question_id
-        if skill not in skill_answers:
-            skill_answers[skill] = []
-        skill_answers[skill].append(answer)
-    
-    # Calculate scores for each skill (simplified scoring)
-    for skill, answers in skill_answers.items():
-        # Simple scoring: each correct answer = 1 point
-        # In reality, you'd compare with correct answers from the assessment
-        score = len(answers) * 0.5  # Simplified scoring
-        skill_scores[skill] = min(score, 10.0)  # Cap at 10
+    result = await build_assessment_result(
+        payload.user_id, skill_scores, payload.time_taken,
+        session.assessment_id if session is not None else None, grading
+    )
+    # Only now: if building the result failed, the session is still there for a retry
+    if session is not None:
+        assessment_sessions.complete(session.assessment_id)
+    return result
+
+async def build_assessment_result(user_id: str, skill_scores: Dict[str, float], time_taken: int,
+                                  assessment_id: Optional[str], grading: Dict) -> AssessmentResult:
+    """Categorize graded skill scores, generate feedback and log the completed assessment"""
     
     # Categorize skills based on scores
     strong_skills = [skill for skill, score in skill_scores.items() if score >= 7.0]
@@ -194,28 +232,24 @@ async def submit_assessment(payload: AssessmentSubmission):
     
     print(f"📈 Skill Analysis: Strong={len(strong_skills)}, Medium={len(medium_skills)}, Weak={len(weak_skills)}")
     
-    # Generate learning recommendations using AI
-    learning_recommendations = await generate_learning_recommendations(
-        strong_skills, medium_skills, weak_skills, payload.user_id
-    )
-    
-    # Generate AI mentor suggestions
-    ai_mentor_suggestions = await generate_mentor_suggestions(
-        skill_scores, weak_skills, payload.user_id
+    # Generate learning recommendations and AI mentor suggestions concurrently
+    learning_recommendations, ai_mentor_suggestions = await generate_assessment_feedback(
+        skill_scores, strong_skills, medium_skills, weak_skills, user_id
     )
     
     # Log assessment completion
-    activity_tracker.log_activity(payload.user_id, "assessment_completed", {
+    activity_tracker.log_activity(user_id, "assessment_completed", {
         "skill_scores": skill_scores,
         "strong_skills": strong_skills,
         "medium_skills": medium_skills,
         "weak_skills": weak_skills,
-        "time_taken": payload.time_taken,
+        "time_taken": time_taken,
         "timestamp": "2024-01-01T00:00:00Z"
     })
     
     result = AssessmentResult(
-        user_id=payload.user_id,
+        user_id=user_id,
+        assessment_id=assessment_id,
         skill_scores=skill_scores,
         strong_skills=strong_skills,
         medium_skills=medium_skills,
@@ -225,76 +259,124 @@ async def submit_assessment(payload: AssessmentSubmission):
             "average_score": sum(skill_scores.values()) / len(skill_scores) if skill_scores else 0,
             "strongest_skill": max(skill_scores.items(), key=lambda x: x[1])[0] if skill_scores else None,
             "weakest_skill": min(skill_scores.items(), key=lambda x: x[1])[0] if skill_scores else None,
-            "recommendation": "Focus on improving weak skills while maintaining strong ones"
+            "recommendation": "Focus on improving weak skills while maintaining strong ones",
+            "grading": grading
         },
         learning_recommendations=learning_recommendations,
         ai_mentor_suggestions=ai_mentor_suggestions
     )
     
-    print(f"✅ Assessment analysis completed for user {payload.user_id}")
+    print(f"✅ Assessment analysis completed for user {user_id}")
     return result
 
-async def generate_learning_recommendations(strong_skills, medium_skills, weak_skills, user_id):
-    """Generate personalized learning recommendations using AI"""
+async def generate_assessment_feedback(skill_scores, strong_skills, medium_skills, weak_skills, user_id) -> Tuple[Dict, List[str]]:
+    """Run the post-assessment LLM calls concurrently under one overall deadline"""
     
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or api_key == "your_gemini_api_key_here":
-        return generate_fallback_recommendations(strong_skills, medium_skills, weak_skills)
+    started = time.monotonic()
+    if FEEDBACK_MERGED_PROMPT:
+        parts = {"merged": generate_merged_feedback(skill_scores, strong_skills, medium_skills, weak_skills)}
+    else:
+        parts = {
+            "recommendations": generate_learning_recommendations(strong_skills, medium_skills, weak_skills, user_id),
+            "mentor_suggestions": generate_mentor_suggestions(skill_scores, weak_skills, user_id)
+        }
+    
+    tasks = {name: asyncio.ensure_future(coroutine) for name, coroutine in parts.items()}
+    # Finish inside the request's own budget so the fallbacks still reach the client
+    remaining = remaining_budget()
+    deadline = FEEDBACK_DEADLINE_SECONDS if remaining is None else min(FEEDBACK_DEADLINE_SECONDS, max(remaining - 0.5, 0))
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        # Upstream calls are shielded in the LLM client, so this only stops waiting for them
+        task.cancel()
+    
+    results = {name: task.result() for name, task in tasks.items() if task in done and task.exception() is None}
+    if "merged" in results:
+        results["recommendations"], results["mentor_suggestions"] = results.pop("merged")
+    
+    learning_recommendations = results.get("recommendations")
+    if learning_recommendations is None:
+        llm_metrics.record_fallback("recommendations", "deadline")
+        learning_recommendations = generate_fallback_recommendations(strong_skills, medium_skills, weak_skills)
+    
+    ai_mentor_suggestions = results.get("mentor_suggestions")
+    if ai_mentor_suggestions is None:
+        llm_metrics.record_fallback("mentor_suggestions", "deadline")
+        ai_mentor_suggestions = generate_fallback_mentor_suggestions(weak_skills)
+    
+    print(f"⏱️ Assessment feedback for user {user_id} in {(time.monotonic() - started) * 1000:.0f}ms "
+          f"({'merged' if FEEDBACK_MERGED_PROMPT else 'parallel'}, {len(pending)} part(s) past deadline)")
+    return learning_recommendations, ai_mentor_suggestions
+
+async def generate_merged_feedback(skill_scores, strong_skills, medium_skills, weak_skills) -> Tuple[Dict, List[str]]:
+    """Learning recommendations and mentor suggestions from a single prompt"""
+    
+    fallback = (
+        generate_fallback_recommendations(strong_skills, medium_skills, weak_skills),
+        generate_fallback_mentor_suggestions(weak_skills)
+    )
+    if not llm_client.is_available():
+        llm_metrics.record_fallback("assessment_feedback", "unavailable")
+        return fallback
     
     try:
-        model = genai.GenerativeModel("gemini-pro")
+        prompt, prompt_version = prompt_registry.render(
+            "assessment_feedback",
+            skill_scores=skill_scores,
+            strong_skills=strong_skills,
+            medium_skills=medium_skills,
+            weak_skills=weak_skills
+        )
         
-        prompt = f"""
-        Generate personalized learning recommendations for a user with the following skill levels:
+        result_text = await llm_client.generate(prompt, call_site="assessment_feedback", prompt_version=prompt_version,
+                                                validate=expect_json_object)
         
-        Strong Skills: {strong_skills}
-        Medium Skills: {medium_skills}
-        Weak Skills: {weak_skills}
+        json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+        result = json.loads(json_match.group()) if json_match else {}
+        recommendations = result.get("recommendations")
+        suggestions = result.get("mentor_suggestions")
         
-        Provide recommendations in JSON format:
-        {{
-            "weak_skills_focus": [
-                {{
-                    "skill": "skill_name",
-                    "priority": "high/medium/low",
-                    "learning_path": ["step1", "step2", "step3"],
-                    "resources": ["resource1", "resource2"],
-                    "estimated_time": "2-3 weeks"
-                }}
-            ],
-            "medium_skills_improvement": [
-                {{
-                    "skill": "skill_name",
-                    "next_level": "advanced_concept",
-                    "practice_projects": ["project1", "project2"],
-                    "estimated_time": "1-2 weeks"
-                }}
-            ],
-            "strong_skills_maintenance": [
-                {{
-                    "skill": "skill_name",
-                    "advanced_topics": ["topic1", "topic2"],
-                    "mentorship_opportunities": ["opportunity1", "opportunity2"]
-                }}
-            ],
-            "overall_strategy": "comprehensive learning strategy"
-        }}
-        """
+        # Keep whichever half parsed; fall back for the other
+        if not isinstance(recommendations, dict) or not isinstance(suggestions, list):
+            llm_metrics.record_fallback("assessment_feedback", "parse_error")
+        return (
+            recommendations if isinstance(recommendations, dict) else fallback[0],
+            suggestions if isinstance(suggestions, list) else fallback[1]
+        )
         
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
+    except Exception as e:
+        print(f"❌ Failed to generate merged assessment feedback: {e}")
+        llm_metrics.record_fallback("assessment_feedback", fallback_reason(e))
+        return fallback
+
+async def generate_learning_recommendations(strong_skills, medium_skills, weak_skills, user_id):
+    """Generate personalized learning recommendations using AI"""
+    
+    if not llm_client.is_available():
+        llm_metrics.record_fallback("recommendations", "unavailable")
+        return generate_fallback_recommendations(strong_skills, medium_skills, weak_skills)
+    
+    try:
+        prompt, prompt_version = prompt_registry.render(
+            "recommendations",
+            strong_skills=strong_skills,
+            medium_skills=medium_skills,
+            weak_skills=weak_skills
+        )
         
-        import json
-        import re
+        result_text = await llm_client.generate(prompt, call_site="recommendations", prompt_version=prompt_version,
+                                                validate=expect_json_object)
         
         json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
         if json_match:
             return json.loads(json_match.group())
         else:
+            llm_metrics.record_fallback("recommendations", "parse_error")
             return generate_fallback_recommendations(strong_skills, medium_skills, weak_skills)
             
     except Exception as e:
         print(f"❌ Failed to generate AI recommendations: {e}")
+        llm_metrics.record_fallback("recommendations", fallback_reason(e))
         return generate_fallback_recommendations(strong_skills, medium_skills, weak_skills)
 
 def generate_fallback_recommendations(strong_skills, medium_skills, weak_skills):
@@ -330,47 +412,81 @@ def generate_fallback_recommendations(strong_skills, medium_skills, weak_skills)
 async def generate_mentor_suggestions(skill_scores, weak_skills, user_id):
     """Generate AI mentor suggestions"""
     
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or api_key == "your_gemini_api_key_here":
-        return [
-            f"Focus on improving {skill} through practice and real projects" 
-            for skill in weak_skills[:3]
-        ]
+    if not llm_client.is_available():
+        llm_metrics.record_fallback("mentor_suggestions", "unavailable")
+        return generate_fallback_mentor_suggestions(weak_skills)
     
     try:
-        model = genai.GenerativeModel("gemini-pro")
-        
-        prompt = f"""
-        As an AI mentor, provide 3 specific, actionable suggestions for a user with these skill scores:
-        {skill_scores}
-        
-        Focus especially on these weak skills: {weak_skills}
-        
-        Provide suggestions as a JSON array of strings:
-        ["suggestion1", "suggestion2", "suggestion3"]
-        """
+        prompt, prompt_version = prompt_registry.render(
+            "mentor_suggestions",
+            skill_scores=skill_scores,
+            weak_skills=weak_skills
+        )
         
-        response = model.generate_content(prompt)
-        result_text = response.text.strip()
-        
-        import json
-        import re
+        result_text = await llm_client.generate(prompt, call_site="mentor_suggestions", prompt_version=prompt_version,
+                                                validate=expect_json_array)
         
         json_match = re.search(r'\[.*\]', result_text, re.DOTALL)
         if json_match:
             return json.loads(json_match.group())
         else:
-            return [
-                f"Focus on improving {skill} through practice and real projects" 
-                for skill in weak_skills[:3]
-            ]
+            llm_metrics.record_fallback("mentor_suggestions", "parse_error")
+            return generate_fallback_mentor_suggestions(weak_skills)
         
     except Exception as e:
         print(f"❌ Failed to generate mentor suggestions: {e}")
-        return [
-            f"Focus on improving {skill} through practice and real projects" 
-            for skill in weak_skills[:3]
-        ]
+        llm_metrics.record_fallback("mentor_suggestions", fallback_reason(e))
+        return generate_fallback_mentor_suggestions(weak_skills)
+
+def generate_fallback_mentor_suggestions(weak_skills):
+    """Generate fallback mentor suggestions"""
+    return [
+        f"Focus on improving {skill} through practice and real projects" 
+        for skill in weak_skills[:3]
+    ]
+
+@router.post("/adaptive/start")
+async def start_adaptive_assessment(payload: SkillList):
+    """Start an adaptive assessment: one question at a time, as many per skill as its estimate needs"""
+    if not payload.skills:
+        raise HTTPException(status_code=400, detail="No skills provided")
+    if not llm_client.is_available() and not any(item_bank.size(skill.strip()) for skill in payload.skills):
+        raise HTTPException(
+            status_code=503,
+            detail="Adaptive assessment unavailable: no bank items for these skills and Gemini is unavailable"
+        )
+
+    print(f"🎯 Starting adaptive assessment for user {payload.user_id} with skills: {payload.skills}")
+    step = await adaptive_engine.start(payload.user_id, payload.skills)
+    if step["complete"]:
+        raise HTTPException(status_code=503, detail="Adaptive assessment unavailable: no questions could be prepared")
+
+    activity_tracker.log_activity(payload.user_id, "assessment_generated", {
+        "skills": payload.skills,
+        "adaptive": True,
+        "timestamp": datetime.utcnow().isoformat()
+    })
+    return step
+
+@router.post("/adaptive/answer")
+async def answer_adaptive_question(payload: AdaptiveAnswer):
+    """Answer the pending adaptive question; returns the next question or the graded result"""
+    session = adaptive_engine.get_session(payload.user_id, payload.assessment_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Assessment not found or expired")
+    try:
+        step = await adaptive_engine.answer(session, payload.question_id, payload.answer)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if not step["complete"]:
+        return step
+
+    result = await build_assessment_result(
+        payload.user_id, step["skill_scores"], payload.time_taken, payload.assessment_id,
+        {"kind": "adaptive", "total_questions": step["total_questions"], "abilities": step["progress"]}
+    )
+    return {**step, "result": result}
 
 @router.get("/{user_id}/history")
 async def get_assessment_history(user_id: str):
@@ -397,38 +513,32 @@ async def get_assessment_history(user_id: str):
 
 @router.get("/{user_id}/progress")
 async def get_skill_progress(user_id: str):
-    """Get skill progress over time"""
+    """Get skill progress over time (trends over every assessment, not just first vs latest)"""
     try:
-        # Get assessment history for progress tracking
-        assessment_activities = [
-            activity for activity in activity_tracker.get_user_activities(user_id, 100)
-            if activity["activity_type"] == "assessment_completed"
-        ]
+        # Precomputed per-skill series, appended as assessments complete
+        trends = skill_trends.get_trends(user_id)
+        assessments_count = trends["assessments"] if trends else 0
         
-        if len(assessment_activities) < 2:
+        if assessments_count < 2:
             return {
                 "user_id": user_id,
                 "progress": "Insufficient data for progress tracking",
-                "assessments_count": len(assessment_activities)
+                "assessments_count": assessments_count
             }
         
-        # Get first and latest assessment scores
-        first_assessment = assessment_activities[-1]
-        latest_assessment = assessment_activities[0]
-        
-        if "scores" in first_assessment["details"] and "scores" in latest_assessment["details"]:
-            progress_data = skill_analyzer.track_skill_progress(
-                user_id,
-                first_assessment["details"]["scores"],
-                latest_assessment["details"]["scores"]
-            )
-        else:
-            progress_data = {"error": "No score data available"}
+        # First and latest observed score per skill still in the series window
+        observed = {skill: trend for skill, trend in trends["skills"].items() if trend["assessments"]}
+        progress_data = skill_analyzer.track_skill_progress(
+            user_id,
+            {skill: trend["first_score"] for skill, trend in observed.items()},
+            {skill: trend["latest_score"] for skill, trend in observed.items()}
+        )
         
         return {
             "user_id": user_id,
             "progress_data": progress_data,
-            "assessments_count": len(assessment_activities)
+            "trends": trends,
+            "assessments_count": assessments_count
         }
         
     except Exception as e:
@@ -1,9 +1,27 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from utils.ai_mentor import ai_mentor
 from utils.user_activity_tracker import activity_tracker
 from datetime import datetime
+import asyncio
+import json
+import os
+
+# WebSocket chat limits (per worker process)
+WS_MAX_CONNECTIONS = int(os.getenv("MENTOR_WS_MAX_CONNECTIONS", "200"))
+WS_SEND_QUEUE_SIZE = int(os.getenv("MENTOR_WS_SEND_QUEUE_SIZE", "32"))
+WS_SEND_TIMEOUT = float(os.getenv("MENTOR_WS_SEND_TIMEOUT", "10"))
+
+ws_stats = {
+    "active_connections": 0,
+    "peak_connections": 0,
+    "total_connections": 0,
+    "rejected_connections": 0,
+    "slow_client_disconnects": 0,
+    "malformed_messages": 0
+}
 
 router = APIRouter(prefix="/mentor", tags=["AI Mentor"])
 
@@ -53,6 +71,178 @@ async def ask_mentor(payload: MentorQuestion):
         print(f"❌ Mentor error: {e}")
         raise HTTPException(status_code=500, detail=f"Mentor service error: {e}")
 
+def _sse_event(event: str, data: Dict) -> str:
+    """Format a single server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/ask/stream")
+async def ask_mentor_stream(payload: MentorQuestion):
+    """Ask AI mentor a question and stream the answer as server-sent events"""
+    
+    print(f"🤖 AI Mentor (stream): User {payload.user_id} asking question")
+    
+    async def event_stream():
+        response_length = 0
+        meta = {}
+        
+        try:
+            async for event in ai_mentor.stream_mentor_response(
+                payload.user_id,
+                payload.question,
+                payload.context
+            ):
+                if event["type"] == "token":
+                    response_length += len(event["text"])
+                    yield _sse_event("token", {"text": event["text"]})
+                else:
+                    meta = {k: v for k, v in event.items() if k != "type"}
+                    yield _sse_event("meta", meta)
+        except Exception as e:
+            print(f"❌ Mentor stream error: {e}")
+            yield _sse_event("error", {"detail": f"Mentor service error: {e}"})
+            return
+        
+        # Log the interaction once the full answer has been delivered
+        activity_tracker.log_activity(payload.user_id, "mentor_question", {
+            "question": payload.question,
+            "response_length": response_length,
+            "confidence": meta.get("confidence", "medium"),
+            "streamed": True,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+        
+        yield _sse_event("done", {
+            "user_id": payload.user_id,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+class MentorChatSession:
+    """Server-side state for one WebSocket connection; the conversation itself lives in conversation_memory"""
+    
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.context: Dict = {}
+        self.turns = 0
+        self.started_at = datetime.utcnow().isoformat()
+    
+    def build_context(self) -> Dict:
+        """Context sent to the mentor; the memory adds the summary and recent turns"""
+        return dict(self.context)
+    
+    def add_turn(self):
+        self.turns += 1
+
+async def _ws_sender(websocket: WebSocket, queue: asyncio.Queue):
+    """Drain the outbound queue; a client that stops reading stalls the producer"""
+    while True:
+        message = await queue.get()
+        await asyncio.wait_for(websocket.send_json(message), timeout=WS_SEND_TIMEOUT)
+
+def _ws_message(raw: str) -> Dict:
+    """Decode one client frame; raises ValueError unless it is a JSON object with well-typed fields"""
+    message = json.loads(raw)
+    if not isinstance(message, dict):
+        raise ValueError("Message must be a JSON object")
+    if not isinstance(message.get("question") or "", str):
+        raise ValueError("'question' must be a string")
+    if not isinstance(message.get("context") or {}, dict):
+        raise ValueError("'context' must be an object")
+    return message
+
+async def _ws_enqueue(queue: asyncio.Queue, sender: asyncio.Task, message: Dict):
+    """Queue an outbound message, giving up on clients that stay stalled past the send timeout"""
+    if sender.done():
+        # Surface the sender's failure (e.g. a send timeout) to the connection handler
+        raise sender.exception() or WebSocketDisconnect()
+    await asyncio.wait_for(queue.put(message), timeout=WS_SEND_TIMEOUT)
+
+@router.websocket("/ws/{user_id}")
+async def mentor_chat_ws(websocket: WebSocket, user_id: str):
+    """Real-time mentor chat; the conversation is remembered per user across connections and /mentor/ask"""
+    
+    if ws_stats["active_connections"] >= WS_MAX_CONNECTIONS:
+        ws_stats["rejected_connections"] += 1
+        await websocket.close(code=1013, reason="Mentor chat at capacity, try again later")
+        return
+    
+    await websocket.accept()
+    ws_stats["active_connections"] += 1
+    ws_stats["total_connections"] += 1
+    ws_stats["peak_connections"] = max(ws_stats["peak_connections"], ws_stats["active_connections"])
+    print(f"🔌 Mentor chat connected: user {user_id} ({ws_stats['active_connections']} active)")
+    
+    session = MentorChatSession(user_id)
+    # Bounded queue: when the client reads slowly, puts block and the LLM stream is not drained further
+    queue: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+    sender = asyncio.create_task(_ws_sender(websocket, queue))
+    
+    try:
+        await _ws_enqueue(queue, sender, {"type": "ready", "user_id": user_id, "started_at": session.started_at})
+        
+        while True:
+            try:
+                message = _ws_message(await websocket.receive_text())
+            except ValueError as e:
+                # json.JSONDecodeError is a ValueError; a bad frame is reported and the session kept open
+                ws_stats["malformed_messages"] += 1
+                await _ws_enqueue(queue, sender, {"type": "error", "detail": f"Malformed message: {e}"})
+                continue
+            
+            if message.get("type") == "context":
+                session.context.update(message.get("context") or {})
+                await _ws_enqueue(queue, sender, {"type": "context_updated"})
+                continue
+            
+            question = (message.get("question") or "").strip()
+            if not question:
+                await _ws_enqueue(queue, sender, {"type": "error", "detail": "Empty question"})
+                continue
+            if message.get("context"):
+                session.context.update(message["context"])
+            
+            answer_parts = []
+            meta = {}
+            async for event in ai_mentor.stream_mentor_response(user_id, question, session.build_context()):
+                if event["type"] == "token":
+                    answer_parts.append(event["text"])
+                else:
+                    meta = event
+                await _ws_enqueue(queue, sender, event)
+            
+            answer = "".join(answer_parts)
+            session.add_turn()
+            await _ws_enqueue(queue, sender, {"type": "done", "turn": session.turns})
+            
+            activity_tracker.log_activity(user_id, "mentor_question", {
+                "question": question,
+                "response_length": len(answer),
+                "confidence": meta.get("confidence", "medium"),
+                "channel": "websocket",
+                "timestamp": datetime.utcnow().isoformat()
+            })
+    
+    except WebSocketDisconnect:
+        pass
+    except asyncio.TimeoutError:
+        ws_stats["slow_client_disconnects"] += 1
+        print(f"🐢 Mentor chat: closing slow client {user_id}")
+        try:
+            await websocket.close(code=1008, reason="Client too slow to receive messages")
+        except Exception:
+            pass
+    except Exception as e:
+        print(f"❌ Mentor chat error for user {user_id}: {e}")
+    finally:
+        sender.cancel()
+        ws_stats["active_connections"] -= 1
+        print(f"🔌 Mentor chat closed: user {user_id} ({ws_stats['active_connections']} active)")
+
 @router.post("/learning-path")
 async def generate_learning_path(payload: LearningPathRequest):
     """Generate personalized learning path"""
@@ -158,6 +348,7 @@ async def get_mentor_stats():
             "questions_asked": question_count,
             "learning_paths_generated": learning_path_count,
             "daily_tips_requested": tip_count,
+            "websocket_sessions": dict(ws_stats),
             "average_confidence": "medium",  # This would be calculated from actual data
             "most_active_hours": "9 AM - 6 PM",  # This would be calculated from timestamps
             "timestamp": datetime.utcnow().isoformat()
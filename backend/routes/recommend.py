@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from utils.ai_mentor import ai_mentor
 from utils.user_activity_tracker import activity_tracker
+from utils.learning_paths import (
+    diff_skill_levels, fragment_key, learning_path_store, module_id, overall_timeline, priority_order
+)
 import json
 
 router = APIRouter(prefix="/recommend", tags=["Learning Recommendations"])
@@ -26,22 +29,51 @@ class ModuleCompletion(BaseModel):
 
 @router.post("/learning-path")
 async def generate_learning_path(payload: LearningPathRequest):
-    """Generate personalized learning path using AI"""
+    """Generate personalized learning path using AI, rebuilding only skills whose level changed"""
     
     print(f"🎯 Generating learning path for user {payload.user_id}")
     print(f"📋 Skills: {payload.skills}")
     print(f"🎯 Goals: {payload.goals}")
     
     try:
-        # Generate learning path using AI mentor
-        learning_path = await ai_mentor.generate_learning_path(
-            payload.user_id,
-            payload.skills,
-            payload.skill_levels
-        )
+        skill_levels = {skill: payload.skill_levels.get(skill, "beginner") for skill in payload.skills}
+        preferences = {
+            "time_available": payload.time_available,
+            "preferred_format": payload.preferred_format,
+            "goals": payload.goals
+        }
+        stored = learning_path_store.get(payload.user_id)
+        generation = learning_path_store.next_generation(payload.user_id)
         
-        # Enhance with user preferences
-        enhanced_path = enhance_learning_path(learning_path, payload)
+        # Preferences shape every module, so changing them rebuilds the whole path
+        if stored and stored["preferences"] == preferences:
+            changes = diff_skill_levels(stored["skill_levels"], skill_levels)
+            rebuild = changes["added"] + list(changes["level_changes"])
+            new_skill_paths = []
+            if rebuild:
+                partial_path = await ai_mentor.generate_learning_path(
+                    payload.user_id,
+                    rebuild,
+                    {skill: skill_levels[skill] for skill in rebuild}
+                )
+                new_skill_paths = enhance_learning_path(partial_path, payload, generation)["learning_path"]
+            enhanced_path, preserved = patch_learning_path(stored["path"], new_skill_paths, skill_levels)
+            changes = {"mode": "incremental", **changes, "regenerated": len(rebuild), "completion_preserved": preserved}
+        else:
+            # Generate learning path using AI mentor
+            learning_path = await ai_mentor.generate_learning_path(
+                payload.user_id,
+                payload.skills,
+                payload.skill_levels
+            )
+            
+            # Enhance with user preferences
+            enhanced_path = enhance_learning_path(learning_path, payload, generation)
+            changes = {"mode": "full", "added": list(skill_levels), "removed": [], "level_changes": {},
+                       "unchanged": [], "regenerated": len(skill_levels), "completion_preserved": 0}
+        
+        learning_path_store.save(payload.user_id, enhanced_path, skill_levels, preferences,
+                                 regenerated=changes["regenerated"], reused=len(changes["unchanged"]))
         
         # Log learning path generation
         activity_tracker.log_activity(payload.user_id, "learning_path_generated", {
@@ -51,12 +83,14 @@ async def generate_learning_path(payload: LearningPathRequest):
             "time_available": payload.time_available,
             "preferred_format": payload.preferred_format,
             "path_length": len(enhanced_path.get("learning_path", [])),
+            "mode": changes["mode"],
             "timestamp": datetime.utcnow().isoformat()
         })
         
         return {
             "user_id": payload.user_id,
             "learning_path": enhanced_path,
+            "changes": changes,
             "generated_at": datetime.utcnow().isoformat(),
             "estimated_completion": enhanced_path.get("overall_timeline", "Unknown")
         }
@@ -65,7 +99,59 @@ async def generate_learning_path(payload: LearningPathRequest):
         print(f"❌ Learning path generation error: {e}")
         raise HTTPException(status_code=500, detail=f"Learning path generation error: {e}")
 
-def enhance_learning_path(learning_path: Dict, user_preferences: LearningPathRequest) -> Dict:
+@router.get("/{user_id}/learning-path")
+async def get_current_learning_path(user_id: str):
+    """Get the user's current learning path, with module completion status"""
+    
+    stored = learning_path_store.get(user_id)
+    if not stored:
+        raise HTTPException(status_code=404, detail="No learning path generated for this user")
+    
+    return {
+        "user_id": user_id,
+        "learning_path": stored["path"],
+        "skill_levels": stored["skill_levels"],
+        "updated_at": stored["updated_at"]
+    }
+
+def patch_learning_path(stored_path: Dict, new_skill_paths: List[Dict], skill_levels: Dict[str, str]) -> Tuple[Dict, int]:
+    """
+    Stored path with regenerated skills swapped in and removed skills dropped. Completion
+    status carries over to regenerated modules with the same title; returns the patched
+    path and how many started/completed modules kept their status.
+    """
+    
+    # Matched on the normalized name, so a skill whose spelling changed keeps its modules (under the new spelling)
+    current_names = {fragment_key(skill, "")[0]: skill for skill in skill_levels}
+    skill_paths = {}
+    for skill_path in stored_path.get("learning_path", []):
+        name = current_names.get(fragment_key(skill_path.get("skill", ""), "")[0])
+        if name is not None:
+            skill_paths[name] = {**skill_path, "skill": name}
+    
+    for skill_path in new_skill_paths:
+        previous = skill_paths.get(skill_path["skill"], {})
+        statuses = {module.get("title"): module.get("completion_status") for module in previous.get("modules", [])}
+        for module in skill_path["modules"]:
+            if statuses.get(module.get("title"), "not_started") != "not_started":
+                module["completion_status"] = statuses[module["title"]]
+        skill_paths[skill_path["skill"]] = skill_path
+    
+    preserved = sum(
+        1 for skill_path in skill_paths.values() for module in skill_path.get("modules", [])
+        if module.get("completion_status", "not_started") != "not_started"
+    )
+    order = [skill for skill in priority_order(list(skill_levels), skill_levels) if skill in skill_paths]
+    learning_path = [skill_paths[skill] for skill in order]
+    
+    return {
+        **stored_path,
+        "learning_path": learning_path,
+        "priority_order": order,
+        "overall_timeline": overall_timeline(learning_path)
+    }, preserved
+
+def enhance_learning_path(learning_path: Dict, user_preferences: LearningPathRequest, generation: int = 0) -> Dict:
     """Enhance learning path with user preferences and additional details"""
     
     enhanced_modules = []
@@ -78,7 +164,7 @@ def enhance_learning_path(learning_path: Dict, user_preferences: LearningPathReq
         for module in modules:
             enhanced_module = {
                 **module,
-                "module_id": f"{skill}_{len(enhanced_skill_modules)}",
+                "module_id": module_id(skill, skill_path.get("current_level", "beginner"), generation, len(enhanced_skill_modules)),
                 "difficulty": determine_difficulty(skill_path.get("current_level", "beginner")),
                 "estimated_time": adjust_time_for_preferences(module.get("duration", "1 week"), user_preferences.time_available),
                 "resources": filter_resources_by_preferences(module.get("resources", []), user_preferences.preferred_format),
@@ -263,7 +349,7 @@ def calculate_priority(skill: str, goals: List[str]) -> str:
         return "high"
     elif any(keyword in goal_keywords for keyword in ["web", "frontend", "backend"]) and skill in ["javascript", "react", "python"]:
         return "medium"
-                else:
+    else:
         return "low"
 
 def calculate_skill_gain(current_level: str) -> str:
@@ -294,12 +380,21 @@ async def complete_module(payload: ModuleCompletion):
             "timestamp": datetime.utcnow().isoformat()
         })
         
+        # Keep the stored path's status current, so regenerating the path preserves it
+        path_updated = learning_path_store.mark_module(
+            payload.user_id,
+            payload.module_id,
+            "completed" if payload.completion_percentage >= 100 else "in_progress"
+        )
+        
         # Check if this completes a skill path
         await check_skill_completion(payload.user_id, payload.skill)
         
         return {
             "message": "Module completed successfully",
             "module_id": payload.module_id,
+            # False for an id not in the current path (e.g. from before the skill was regenerated)
+            "path_updated": path_updated,
             "completion_percentage": payload.completion_percentage,
             "timestamp": datetime.utcnow().isoformat()
         }
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from typing import Dict, List
 from utils.enhanced_resume_parser import resume_parser
 from utils.user_activity_tracker import activity_tracker
+import asyncio
 import uuid
 
 router = APIRouter(prefix="/resume", tags=["Resume"])
@@ -33,7 +34,8 @@ async def upload_resume(file: UploadFile = File(...)):
         print(f"🆔 Generated user ID: {user_id}")
         
         # Parse resume using enhanced AI parser
-        resume_data = resume_parser.parse_resume(file.file)
+        # Off the event loop; the worker thread inherits the request deadline
+        resume_data = await asyncio.to_thread(resume_parser.parse_resume, file.file)
         print(f"📊 Resume parsing completed. Skills found: {len(resume_data.get('extracted_skills', []))}")
         print(f"📋 Skills: {resume_data.get('extracted_skills', [])}")
         
@@ -44,7 +46,8 @@ async def upload_resume(file: UploadFile = File(...)):
             # Don't raise error, continue with empty skills array
         
         # Generate assessment plan based on extracted skills
-        assessment_plan = resume_parser.generate_skill_assessment_plan(
+        assessment_plan = await asyncio.to_thread(
+            resume_parser.generate_skill_assessment_plan,
             resume_data["extracted_skills"], 
             resume_data["experience_level"]
         )
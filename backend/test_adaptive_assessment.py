@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test the adaptive assessment's IRT pieces: EAP estimates, item selection, online item
+calibration, and a full session through the engine on a pre-calibrated bank
+
+    python test_adaptive_assessment.py
+"""
+
+import asyncio
+
+import numpy as np
+
+from utils.adaptive_assessment import (
+    ITEM_MIN_RESPONSES_FOR_DISCRIMINATION, AdaptiveAssessmentEngine, ItemBank, ability_to_score, eap_estimate,
+    item_probability, response_log_likelihood, select_item
+)
+
+def test_eap_estimate_moves_with_responses():
+    print("🧪 Testing EAP estimates")
+    theta, se = eap_estimate(np.zeros(81))
+    # Prior only: standard normal on the grid
+    assert abs(theta) < 1e-9 and abs(se - 1.0) < 0.01
+
+    right = response_log_likelihood(1.0, 0.0, True)
+    wrong = response_log_likelihood(1.0, 0.0, False)
+    theta_right, se_right = eap_estimate(right)
+    theta_wrong, _ = eap_estimate(wrong)
+    assert theta_right > 0 > theta_wrong and abs(theta_right + theta_wrong) < 1e-9
+    assert se_right < se
+
+    # More responses, smaller standard error
+    _, se_many = eap_estimate(sum(response_log_likelihood(1.5, b, b < 0) for b in np.linspace(-2, 2, 10)))
+    assert se_many < se_right
+    print(f"✅ prior SE {se:.2f} -> {se_right:.2f} after one answer -> {se_many:.2f} after ten")
+
+def test_select_item_picks_most_informative_unused():
+    print("🧪 Testing item selection")
+    a = np.array([1.0, 2.0, 1.0, 2.0])
+    b = np.array([0.0, 0.1, 3.0, -3.0])
+    used = np.zeros(4, dtype=bool)
+    assert select_item(0.0, a, b, used) == 1
+    used[1] = True
+    assert select_item(0.0, a, b, used) == 0
+    assert select_item(-3.0, a, b, used) == 3
+    assert select_item(0.0, a, b, np.ones(4, dtype=bool)) == -1
+    assert select_item(0.0, np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool)) == -1
+    print("✅ Highest information at the estimate, -1 when nothing is left")
+
+def test_adaptive_testing_recovers_ability():
+    """Simulated examinees on a known bank: estimates land near their true abilities"""
+
+    print("🧪 Testing ability recovery")
+    rng = np.random.default_rng(3)
+    a = np.exp(rng.normal(0.3, 0.3, 200)).clip(0.5, 2.5)
+    b = rng.uniform(-2.5, 2.5, 200)
+    thetas = rng.normal(0, 1, 300)
+    estimates = []
+    for theta in thetas:
+        used = np.zeros(len(a), dtype=bool)
+        log_likelihood = np.zeros(81)
+        estimate, se = eap_estimate(log_likelihood)
+        while se >= 0.4:
+            index = select_item(estimate, a, b, used)
+            used[index] = True
+            log_likelihood += response_log_likelihood(a[index], b[index], rng.random() < item_probability(theta, a[index], b[index]))
+            estimate, se = eap_estimate(log_likelihood)
+        estimates.append(estimate)
+    rmse = float(np.sqrt(np.mean((np.array(estimates) - thetas) ** 2)))
+    print(f"   RMSE {rmse:.3f} at target SE 0.4")
+    assert rmse < 0.5
+    print("✅ Adaptive estimates recovered the simulated abilities")
+
+def test_item_bank_update_calibrates_difficulty():
+    print("🧪 Testing online item calibration")
+    bank = ItemBank(learning_rate=0.3)
+    for _ in range(2):
+        bank.add("sql", {"question": "?", "options": ["a", "b"], "answer": "A", "difficulty": "intermediate"})
+
+    # A strong examinee missing item 0 makes it harder; a weak one answering item 1 makes it easier
+    bank.update("sql", [0], [False], 2.0)
+    bank.update("sql", [1], [True], -2.0)
+    a, b = bank.parameters("sql")
+    assert b[0] > 0.0 > b[1]
+    # Discrimination waits for enough responses
+    assert list(a) == [1.0, 1.0]
+
+    for _ in range(ITEM_MIN_RESPONSES_FOR_DISCRIMINATION):
+        bank.update("sql", [0], [True], 2.0)
+    a, _ = bank.parameters("sql")
+    assert a[0] != 1.0 and a[1] == 1.0
+    assert bank.get_report()["skills"]["sql"]["responses"] == ITEM_MIN_RESPONSES_FOR_DISCRIMINATION + 2
+    print("✅ Difficulty moved with the evidence, discrimination only once settled")
+
+def test_ability_to_score():
+    assert ability_to_score(0.0) == 5.0
+    assert ability_to_score(-4.0) < 0.01 and ability_to_score(4.0) > 9.99
+    assert ability_to_score(-1.0) < ability_to_score(1.0)
+
+def test_engine_session_on_calibrated_bank():
+    """Always answering correctly, one skill is finished from the bank alone and scored above average"""
+
+    print("🧪 Testing an adaptive session through the engine")
+    bank = ItemBank()
+    for b in np.linspace(-3, 3, 40):
+        bank.add("python", {"question": f"b={b:.2f}", "options": ["A", "C", "B", "D"], "answer": "B"}, 1.5, float(b))
+    engine = AdaptiveAssessmentEngine(bank, target_se=0.5, max_items=8, max_gap=10.0)
+
+    async def scenario():
+        step = await engine.start("u1", ["python", " python "])
+        assert list(step["progress"]) == ["python"]
+        session = engine.get_session("u1", step["assessment_id"])
+        assert engine.get_session("someone_else", step["assessment_id"]) is None
+        try:
+            await engine.answer(session, "python_999", "C")
+            raise AssertionError("answering a question that isn't pending should fail")
+        except ValueError:
+            pass
+        while not step["complete"]:
+            # Option text "C" is the second option, which the letter key "B" points at
+            step = await engine.answer(session, step["question"]["id"], "C")
+            assert step["correct"]
+        return step
+
+    result = asyncio.run(scenario())
+    asked = result["progress"]["python"]["questions"]
+    print(f"   {asked} questions, ability {result['progress']['python']['ability']}, score {result['skill_scores']['python']}")
+    assert 1 <= asked <= 8 and result["total_questions"] == asked
+    assert result["skill_scores"]["python"] > 8.0
+    report = engine.get_report()
+    assert report["items_generated"] == 0 and report["completed"] == 1 and report["active_sessions"] == 0
+    assert bank.get_report()["calibration_updates"] == asked
+    print("✅ Session served from the bank, finished and scored")
+
+if __name__ == "__main__":
+    test_eap_estimate_moves_with_responses()
+    test_select_item_picks_most_informative_unused()
+    test_adaptive_testing_recovers_ability()
+    test_item_bank_update_calibrates_difficulty()
+    test_ability_to_score()
+    test_engine_session_on_calibrated_bank()
+    print("\n✅ All adaptive assessment tests passed!")
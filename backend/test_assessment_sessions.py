@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test server-side assessment grading: answer matching, per-skill scores, and the
+generate -> submit flow through the app with the local Gemini stand-in
+
+    python test_assessment_sessions.py
+"""
+
+import os
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "1")
+
+from fastapi.testclient import TestClient
+
+import routes.assessment as assessment_routes
+from main import app
+from utils.assessment_sessions import AssessmentSession, AssessmentSessionStore, answer_key_index, option_index
+
+def question(question_id: str, skill: str, options, answer: str):
+    return {"id": question_id, "skill": skill, "question": "?", "options": options, "answer": answer}
+
+def test_option_matching_prefers_text_for_answers_and_letters_for_keys():
+    print("🧪 Testing option matching")
+    options = ["Java", "C", "Go", "R"]
+    # Submitted option text wins over the letter reading
+    assert option_index("C", options) == 1
+    assert option_index(" go ", options) == 2
+    # A letter is accepted when no option has that text
+    assert option_index("D", options) == 3
+    assert option_index("Rust", options) == -1
+    assert option_index(None, options) == -1
+    # Generated answer keys are letters
+    assert answer_key_index("C", options) == 2
+    assert answer_key_index("Java", options) == 0
+    print("✅ Option text and letter keys resolved correctly")
+
+def test_grading_scores_each_skill():
+    print("🧪 Testing per-skill grading")
+    session = AssessmentSession("a1", "u1", [
+        question("python_0", "python", ["Java", "C", "Go", "R"], "B"),
+        question("python_1", "python", ["1", "2", "3", "4"], "D"),
+        question("node.js_0", "node.js", ["x", "y"], "A"),
+    ], "graded")
+    grading = session.grade({"python_0": "C", "python_1": "3", "node.js_0": "x", "unknown_9": "A"})
+    assert grading["skill_scores"] == {"python": 5.0, "node.js": 10.0}
+    assert grading["answered"] == 3 and grading["correct"] == 2 and grading["unknown_questions"] == 1
+
+    unanswered = session.grade({})
+    assert unanswered["skill_scores"] == {"python": 0.0, "node.js": 0.0} and unanswered["answered"] == 0
+
+    self_assessment = AssessmentSession("a2", "u1", [
+        question("sql_0", "sql", ["Beginner", "Intermediate", "Advanced", "Expert"], "B"),
+        question("sql_1", "sql", ["Beginner", "Intermediate", "Advanced", "Expert"], "B"),
+    ], "self_assessment")
+    grading = self_assessment.grade({"sql_0": "Expert", "sql_1": "Intermediate"})
+    assert grading["skill_scores"] == {"sql": 7.5} and grading["correct"] is None
+    print("✅ Graded and self-assessed scores per skill")
+
+def test_store_keeps_session_until_completed():
+    print("🧪 Testing session lifecycle")
+    store = AssessmentSessionStore(ttl_seconds=60, max_sessions=2)
+    first = store.create("u1", [question("sql_0", "sql", ["a", "b"], "A")])
+    latest = store.create("u1", [question("sql_0", "sql", ["a", "b"], "B")])
+
+    assert store.get("u1").assessment_id == latest
+    assert store.get("u1", first).assessment_id == first
+    assert store.get("someone_else", first) is None
+    # Looked up but not completed: still there for a retry
+    assert store.get("u1", latest) is not None
+    store.complete(latest)
+    assert store.get("u1", latest) is None
+
+    store.create("u2", [question("sql_0", "sql", ["a", "b"], "A")])
+    store.create("u3", [question("sql_0", "sql", ["a", "b"], "A")])
+    assert store.get("u1", first) is None and store.get_report()["evicted"] == 1
+    print("✅ Sessions are found by id or latest, kept until completed, and capped")
+
+def test_generate_and_submit_through_app():
+    print("🧪 Testing generate -> submit through the app")
+    # Server errors come back as 500 responses, for the failed-submission retry below
+    with TestClient(app, raise_server_exceptions=False) as client:
+        generated = client.post("/assessment/generate", json={"user_id": "grading_user", "skills": ["python", "SQL", "python"]}).json()
+        ids = [q["id"] for q in generated["questions"]]
+        # The repeated skill is asked once, so every question id is unique
+        assert generated["skills_assessed"] == ["python", "SQL"] and len(ids) == len(set(ids)) == 4
+        assert all("answer" not in q for q in generated["questions"]) or not assessment_routes.ASSESSMENT_HIDE_ANSWER_KEYS
+
+        session = assessment_routes.assessment_sessions.get("grading_user", generated["assessment_id"])
+        # Without Gemini (e.g. the LLM client was created before LLM_PROVIDER was set) this is the
+        # self-assessment fallback, where picking the top level scores 10 like a correct answer
+        graded = session.kind == "graded"
+        answers = {
+            question_id: session.options[row][session.answer_keys[row] if graded else -1]
+            for question_id, row in session.rows.items() if question_id.startswith("python")
+        }
+
+        # A failure while building the result must not lose the assessment
+        original = assessment_routes.build_assessment_result
+
+        async def failing(*args, **kwargs):
+            raise RuntimeError("feedback failed")
+
+        assessment_routes.build_assessment_result = failing
+        try:
+            response = client.post("/assessment/submit", json={
+                "user_id": "grading_user", "assessment_id": generated["assessment_id"], "answers": answers, "time_taken": 60
+            })
+            assert response.status_code == 500
+        finally:
+            assessment_routes.build_assessment_result = original
+
+        result = client.post("/assessment/submit", json={
+            "user_id": "grading_user", "assessment_id": generated["assessment_id"], "answers": answers, "time_taken": 60
+        })
+        assert result.status_code == 200
+        body = result.json()
+        assert body["skill_scores"] == {"python": 10.0, "SQL": 0.0}
+        assert body["overall_analysis"]["grading"]["correct"] == (2 if graded else None)
+
+        # Completed: submitting again is an unknown assessment
+        again = client.post("/assessment/submit", json={
+            "user_id": "grading_user", "assessment_id": generated["assessment_id"], "answers": answers, "time_taken": 60
+        })
+        assert again.status_code == 404
+    print("✅ Deduplicated skills, graded server-side, retried after a failure")
+
+if __name__ == "__main__":
+    test_option_matching_prefers_text_for_answers_and_letters_for_keys()
+    test_grading_scores_each_skill()
+    test_store_keeps_session_until_completed()
+    test_generate_and_submit_through_app()
+    print("\n✅ All assessment session tests passed!")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the circuit breaker state machine: opening on failure and slow-call rates, the
+cooldown, half-open probe limits, and ignored outcomes
+
+    python test_circuit_breaker.py
+"""
+
+import time
+
+from utils.circuit_breaker import CircuitBreaker
+
+def failure():
+    return RuntimeError("503 Service unavailable")
+
+def test_opens_at_failure_rate_after_min_calls():
+    print("🧪 Testing closed -> open")
+    breaker = CircuitBreaker("test", window_size=10, min_calls=4, failure_rate_threshold=0.5, open_seconds=60)
+    # Below min_calls nothing opens it, whatever the failure rate
+    for _ in range(3):
+        breaker.record_failure(failure())
+    assert breaker.state == "closed" and breaker.allow_request()
+
+    breaker.record_failure(failure())
+    assert breaker.state == "open"
+    assert not breaker.allow_request() and not breaker.allow_request()
+    state = breaker.get_state()
+    assert state["rejected_calls"] == 2 and state["times_opened"] == 1 and state["last_error"] == "503 Service unavailable"
+    print("✅ Opened at the threshold once min_calls were seen, then rejected calls")
+
+def test_failures_roll_out_of_the_window():
+    print("🧪 Testing the rolling window")
+    breaker = CircuitBreaker("test", window_size=4, min_calls=4, failure_rate_threshold=0.5)
+    breaker.record_failure(failure())
+    for _ in range(4):
+        breaker.record_success(0.1)
+    # The early failure has left the window: 1 of 4 is below the 50% threshold
+    breaker.record_failure(failure())
+    assert breaker.state == "closed" and breaker.get_state()["failure_rate"] == 0.25
+    breaker.record_failure(failure())
+    assert breaker.state == "open"
+    print("✅ Only the last window_size calls count")
+
+def test_opens_at_slow_call_rate():
+    print("🧪 Testing slow calls")
+    breaker = CircuitBreaker("test", min_calls=3, slow_call_seconds=1.0, slow_call_rate_threshold=0.6)
+    breaker.record_success(2.0)
+    breaker.record_success(0.1)
+    breaker.record_success(2.0)
+    assert breaker.state == "open"
+    print("✅ Successful but slow calls opened the breaker")
+
+def test_half_open_after_cooldown_with_limited_probes():
+    print("🧪 Testing open -> half_open probe limits")
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=0.05, half_open_max_calls=2)
+    breaker.record_failure(failure())
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+
+    assert breaker.allow_request() and breaker.allow_request()
+    assert not breaker.allow_request()
+    assert breaker.get_state()["rejected_calls"] == 1
+
+    # An ignored outcome frees its probe and changes nothing else
+    breaker.record_ignored()
+    assert breaker.state == "half_open" and breaker.allow_request() and not breaker.allow_request()
+    print("✅ Two probes at a time; an ignored probe was handed back")
+
+def test_probe_outcomes_close_or_reopen():
+    print("🧪 Testing half_open -> closed / open")
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=0.05, half_open_max_calls=2, slow_call_seconds=1.0)
+    breaker.record_failure(failure())
+    time.sleep(0.06)
+
+    # A failed probe reopens it and restarts the cooldown
+    assert breaker.allow_request()
+    breaker.record_failure(failure())
+    assert breaker.state == "open" and breaker.get_state()["times_opened"] == 2
+
+    # So does a slow one
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success(2.0)
+    assert breaker.state == "open"
+
+    # half_open_max_calls successful probes close it, with a fresh window
+    time.sleep(0.06)
+    assert breaker.allow_request() and breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == "half_open"
+    breaker.record_success(0.1)
+    assert breaker.state == "closed" and breaker.get_state()["window_calls"] == 0
+    print("✅ closed -> open -> half_open -> open -> half_open -> open -> half_open -> closed")
+
+def test_ignored_outcomes_do_not_count_while_closed():
+    print("🧪 Testing ignored outcomes while closed")
+    breaker = CircuitBreaker("test", min_calls=2, failure_rate_threshold=0.5)
+    for _ in range(10):
+        breaker.record_ignored()
+    assert breaker.state == "closed" and breaker.get_state()["window_calls"] == 0
+    print("✅ Ignored outcomes stayed out of the window")
+
+if __name__ == "__main__":
+    test_opens_at_failure_rate_after_min_calls()
+    test_failures_roll_out_of_the_window()
+    test_opens_at_slow_call_rate()
+    test_half_open_after_cooldown_with_limited_probes()
+    test_probe_outcomes_close_or_reopen()
+    test_ignored_outcomes_do_not_count_while_closed()
+    print("\n✅ All circuit breaker tests passed!")
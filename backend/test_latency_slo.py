@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test latency-SLO hedging at its call sites: only genuine LLM answers are labelled and
+cached as such
+
+    python test_latency_slo.py
+"""
+
+import asyncio
+
+import utils.ai_mentor as ai_mentor_module
+import utils.daily_tips as daily_tips_module
+from utils.ai_mentor import ai_mentor
+from utils.daily_tips import DailyTipService
+from utils.latency_slo import LatencySLOs
+from utils.learning_paths import learning_path_fragments
+from utils.llm_client import llm_client
+from utils.llm_metrics import llm_metrics
+
+def llm_fragment(skill: str):
+    return {"modules": [{"title": f"{skill} from the LLM", "description": "", "resources": [], "estimated_hours": 5}]}
+
+def test_learning_path_with_a_template_fragment_is_not_cached_as_llm():
+    print("🧪 Testing hedged learning paths with a failed fragment")
+    slos = LatencySLOs("learning_path=2000")
+    failing = {"rust"}
+
+    async def generate(key):
+        if key[0] in failing:
+            raise ValueError("No JSON object in learning path fragment response")
+        return llm_fragment(key[0])
+
+    original_slos, original_available = ai_mentor_module.latency_slos, llm_client.is_available
+    ai_mentor_module.latency_slos = slos
+    llm_client.is_available = lambda: True
+    learning_path_fragments._generate = generate
+    try:
+        skills, levels = ["Go", "Rust"], {"Go": "beginner", "Rust": "beginner"}
+        degraded = asyncio.run(ai_mentor.generate_learning_path("slo_user", skills, levels))
+        assert degraded["served_by"] == "fallback"
+        stats = slos.get("learning_path").get_stats()
+        assert stats["cache_entries"] == 0 and stats["llm_errors"] == 1
+
+        # Once every fragment generates, the path is an LLM answer; the Go fragment was kept from the first try
+        failing.clear()
+        healthy = asyncio.run(ai_mentor.generate_learning_path("slo_user", skills, levels))
+        assert healthy["served_by"] == "llm" and healthy["fragments"] == {"cached": 1, "generated": 1, "fallback": 0}
+        again = asyncio.run(ai_mentor.generate_learning_path("slo_user", skills, levels))
+        assert again["served_by"] == "cache"
+    finally:
+        ai_mentor_module.latency_slos = original_slos
+        llm_client.is_available = original_available
+        del learning_path_fragments._generate
+    print("✅ A path with a template section was served as the fallback and not cached")
+
+def test_daily_tip_from_hedge_cache_is_kept_for_the_day():
+    print("🧪 Testing hedged daily tips")
+    slos = LatencySLOs("daily_tip=2000")
+    calls = []
+
+    async def generate(skills):
+        calls.append(skills)
+        if skills == ("cobol",):
+            raise ValueError("No JSON object in daily tip response")
+        return {"tip": f"LLM tip for {', '.join(skills)}", "skill_focus": skills[0]}
+
+    def fallbacks() -> int:
+        return llm_metrics.get_report()["call_sites"].get("daily_tip", {}).get("fallback_total", 0)
+
+    original_slos, original_generate = daily_tips_module.latency_slos, daily_tips_module.generate_tip
+    original_available = llm_client.is_available
+    daily_tips_module.latency_slos = slos
+    daily_tips_module.generate_tip = generate
+    llm_client.is_available = lambda: True
+    try:
+        first_worker, second_worker = DailyTipService(skills=[]), DailyTipService(skills=[])
+        assert asyncio.run(first_worker.get_tip("u1", ["Elixir"]))["served_by"] == "llm"
+        # Another service instance misses its own tips but hits the hedge cache, and keeps that tip too
+        assert asyncio.run(second_worker.get_tip("u2", ["elixir"]))["served_by"] == "cache"
+        tip = asyncio.run(second_worker.get_tip("u3", ["Elixir "]))
+        assert tip["served_by"] == "precomputed" and tip["tip"] == "LLM tip for elixir"
+        assert slos.get("daily_tip").get_stats()["requests"] == 2 and len(calls) == 1
+        assert second_worker.get_report()["precomputed_hit_rate"] == 0.5
+
+        # The local tip is counted once, by the service and in the LLM metrics
+        before = fallbacks()
+        assert asyncio.run(second_worker.get_tip("u4", ["COBOL"]))["served_by"] == "fallback"
+        assert second_worker.stats["fallbacks"] == 1 and fallbacks() == before + 1
+    finally:
+        daily_tips_module.latency_slos = original_slos
+        daily_tips_module.generate_tip = original_generate
+        llm_client.is_available = original_available
+    print("✅ Hedge-cache tips were kept for the day; fallbacks were counted once")
+
+if __name__ == "__main__":
+    test_learning_path_with_a_template_fragment_is_not_cached_as_llm()
+    test_daily_tip_from_hedge_cache_is_kept_for_the_day()
+    print("\n✅ All latency SLO tests passed!")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the LLM client against the fake provider: identical concurrent calls share one upstream
+call, and abandoned streams release the provider
+
+    python test_llm_client.py
+"""
+
+import asyncio
+import time
+
+from utils.llm_client import LLMClient
+from utils.llm_providers import FakeLLMProvider
+
+def fast_fake_provider(latency_ms: float) -> FakeLLMProvider:
+    provider = FakeLLMProvider()
+    provider.latency_distribution = "fixed"
+    provider.latency_ms = latency_ms
+    provider.model_latency = {}
+    provider.error_rate = 0
+    provider.rate_limit_rate = 0
+    return provider
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_identical_concurrent_calls_share_one_upstream_call():
+    print("🧪 Testing singleflight coalescing")
+    provider = fast_fake_provider(100)
+    client = LLMClient(provider=provider, limiter=None)
+
+    async def scenario():
+        # Whitespace differences still coalesce; a different prompt does not
+        same = [client.generate(f"Give one tip about{' ' * (i + 1)}Python", call_site="daily_tip") for i in range(5)]
+        return await asyncio.gather(*same, client.generate("Give one tip about SQL", call_site="daily_tip"))
+
+    results = asyncio.run(scenario())
+    assert len(set(results[:5])) == 1
+    assert provider.stats["calls"] == 2
+    assert client.stats["upstream_calls"] == 2 and client.stats["coalesced"] == 4 and client.stats["requests"] == 6
+    print("✅ 5 identical calls, 1 upstream call")
+
+def test_cancelled_leader_does_not_cancel_followers():
+    print("🧪 Testing a cancelled coalescing leader")
+    provider = fast_fake_provider(100)
+    client = LLMClient(provider=provider, limiter=None)
+    prompt = "Suggest a first project for learning FastAPI"
+
+    async def scenario():
+        leader = asyncio.ensure_future(client.generate(prompt, call_site="daily_tip"))
+        await asyncio.sleep(0.02)
+        followers = [asyncio.ensure_future(client.generate(prompt, call_site="daily_tip")) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        # The shared call finished and left the in-flight table; the next caller starts a new one
+        assert not client._inflight
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(set(results)) == 1 and results[0]
+    assert provider.stats["calls"] == 1 and client.stats["coalesced"] == 3
+    print("✅ Followers got the shared answer after the leader was cancelled")
+
+def test_abandoned_stream_closes_provider_iterator():
+    """A consumer that stops mid-stream, or is cancelled mid-chunk, must not leave the call in flight upstream"""
+
+    print("🧪 Testing abandoned streams")
+    provider = fast_fake_provider(100)
+    provider.stream_chunk_words = 1
+    client = LLMClient(provider=provider, limiter=None)
+    # Hold every provider iterator, as a traceback or a transport can, so only an explicit close ends the call
+    opened = []
+    stream = provider.stream
+    provider.stream = lambda *args: opened.append(stream(*args)) or opened[-1]
+
+    async def read_one():
+        async for _ in client.generate_stream("Explain Python decorators", call_site="mentor_answer"):
+            break
+
+    async def read_all():
+        async for _ in client.generate_stream("Explain SQL joins", call_site="mentor_answer"):
+            pass
+
+    async def scenario():
+        # Stopped after the first chunk
+        for _ in range(5):
+            await read_one()
+        # Cancelled while a chunk is being read in a thread
+        reading = asyncio.ensure_future(read_all())
+        await asyncio.sleep(0.05)
+        reading.cancel()
+        await asyncio.gather(reading, return_exceptions=True)
+        # Read to the end
+        await read_all()
+
+    asyncio.run(scenario())
+    assert wait_for(lambda: provider._in_flight == 0), f"{provider._in_flight} fake calls still in flight"
+    assert len(opened) == provider.stats["calls"] == 7
+    print("✅ Every abandoned stream closed its provider iterator")
+
+if __name__ == "__main__":
+    test_identical_concurrent_calls_share_one_upstream_call()
+    test_cancelled_leader_does_not_cancel_followers()
+    test_abandoned_stream_closes_provider_iterator()
+    print("\n✅ All LLM client tests passed!")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test LLM call scheduling: limiter priority order, queue limits, interactive calls overtaking
+queued background calls inside the app's async client, and breaker probes of calls cancelled
+while queued
+
+    python test_llm_scheduling.py
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.circuit_breaker import CircuitBreaker
+from utils.concurrency_limiter import AdaptiveConcurrencyLimiter, ConcurrencyLimitExceeded
+from utils.llm_client import LLMClient
+from utils.llm_priority import llm_priority
+from utils.llm_providers import FakeLLMProvider
+
+def fast_fake_provider(latency_ms: float) -> FakeLLMProvider:
+    provider = FakeLLMProvider()
+    provider.latency_distribution = "fixed"
+    provider.latency_ms = latency_ms
+    provider.model_latency = {}
+    provider.error_rate = 0
+    provider.rate_limit_rate = 0
+    return provider
+
+def test_limiter_serves_queued_classes_by_weight():
+    """With one slot busy, queued interactive callers go before earlier-queued background callers"""
+
+    print("🧪 Testing limiter priority order")
+    limiter = AdaptiveConcurrencyLimiter("test", initial_limit=1, max_limit=1, queue_timeout=5, starvation_seconds=60)
+    held = limiter.acquire(priority="background")
+    order = []
+
+    async def queued(priority: str, label: str):
+        acquired_at = await limiter.acquire_async(priority=priority)
+        order.append(label)
+        limiter.release(acquired_at, priority=priority)
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(queued("background", f"background_{i}")) for i in range(4)]
+        await asyncio.sleep(0.01)
+        tasks += [asyncio.ensure_future(queued("interactive", f"interactive_{i}")) for i in range(2)]
+        await asyncio.sleep(0.01)
+        assert limiter.get_state()["waiting"] == 6
+        limiter.release(held, priority="background")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    print(f"   Order: {order}")
+    # Weights 6:1: both interactive callers are served within the first three grants
+    assert set(order[:3]) >= {"interactive_0", "interactive_1"}
+    assert sorted(order) == sorted([f"background_{i}" for i in range(4)] + ["interactive_0", "interactive_1"])
+    print("✅ Interactive callers overtook queued background callers")
+
+def test_limiter_rejects_when_queue_full_or_timed_out():
+    print("🧪 Testing limiter load shedding")
+    limiter = AdaptiveConcurrencyLimiter("test", initial_limit=1, max_limit=1, max_queue=2, queue_timeout=0.05)
+    held = limiter.acquire()
+
+    async def scenario():
+        waiters = [asyncio.ensure_future(limiter.acquire_async()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        try:
+            await limiter.acquire_async()
+            raise AssertionError("third waiter should not fit in a queue of 2")
+        except ConcurrencyLimitExceeded:
+            pass
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, ConcurrencyLimitExceeded) for result in results)
+
+    asyncio.run(scenario())
+    state = limiter.get_state()
+    assert state["rejected_queue_full"] == 1 and state["rejected_timeout"] == 2 and state["waiting"] == 0
+    limiter.release(held)
+    assert limiter.get_state()["in_flight"] == 0
+    print("✅ Full queue and queue timeout both shed the call")
+
+def test_cancelled_waiter_leaves_no_slot_behind():
+    print("🧪 Testing cancelled waiters")
+    limiter = AdaptiveConcurrencyLimiter("test", initial_limit=1, max_limit=1, queue_timeout=5)
+    held = limiter.acquire()
+
+    async def scenario():
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.get_state()["waiting"] == 0
+        limiter.release(held)
+        acquired_at = await asyncio.wait_for(limiter.acquire_async(), 1)
+        limiter.release(acquired_at)
+
+    asyncio.run(scenario())
+    assert limiter.get_state()["in_flight"] == 0
+    print("✅ A cancelled waiter gave up its place without leaking a slot")
+
+def test_async_waiters_hold_no_threads():
+    """Many queued async callers must not use up worker threads"""
+
+    print("🧪 Testing that queued async callers hold no threads")
+    limiter = AdaptiveConcurrencyLimiter("test", initial_limit=1, max_limit=1, max_queue=200, queue_timeout=5)
+    held = limiter.acquire()
+
+    async def scenario():
+        threads_before = threading.active_count()
+        waiters = [asyncio.ensure_future(limiter.acquire_async()) for _ in range(100)]
+        await asyncio.sleep(0.05)
+        assert limiter.get_state()["waiting"] == 100
+        assert threading.active_count() == threads_before
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    asyncio.run(scenario())
+    limiter.release(held)
+    print("✅ 100 queued callers, no extra threads")
+
+def test_interactive_call_jumps_background_calls_in_app_client():
+    """
+    30 background then 3 interactive calls through the app's async LLM client, 2 slots,
+    200ms per call, with the default executor smaller than the backlog. The interactive
+    calls must be scheduled by priority rather than by thread-pool arrival order.
+    """
+
+    print("🧪 Testing interactive calls overtaking a background backlog")
+    limiter = AdaptiveConcurrencyLimiter("test", initial_limit=2, max_limit=2, queue_timeout=30, starvation_seconds=60)
+    client = LLMClient(provider=fast_fake_provider(200), limiter=limiter)
+    client.breaker.min_calls = 1000
+    finished = []
+
+    async def call(priority: str, i: int) -> float:
+        started = time.monotonic()
+        with llm_priority(priority):
+            await client.generate(f"Give one short tip about topic #{i} ({priority})", call_site="benchmark")
+        finished.append(priority)
+        return time.monotonic() - started
+
+    async def scenario():
+        # Fewer default threads than queued calls, as on a busy server
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=4))
+        background = [asyncio.ensure_future(call("background", i)) for i in range(30)]
+        await asyncio.sleep(0.05)
+        interactive = await asyncio.gather(*(call("interactive", i) for i in range(3)))
+        await asyncio.gather(*background)
+        return interactive
+
+    latencies = asyncio.run(scenario())
+    position = max(i for i, priority in enumerate(finished) if priority == "interactive")
+    print(f"   Interactive latency: {', '.join(f'{latency:.2f}s' for latency in latencies)}; "
+          f"last one finished {position + 1} of {len(finished)}")
+    # A first-come-first-served backlog would take ~3s to drain before them
+    assert max(latencies) < 1.0
+    assert position < 10
+    print("✅ Interactive calls were served ahead of the background backlog")
+
+def test_call_cancelled_while_queued_releases_half_open_probe():
+    """A call that takes a half-open probe, then is cancelled waiting for a slot, must give the probe back"""
+
+    print("🧪 Testing half-open probes of calls cancelled while queued")
+    limiter = AdaptiveConcurrencyLimiter("test", initial_limit=1, max_limit=1, queue_timeout=5)
+    client = LLMClient(provider=fast_fake_provider(1), limiter=limiter)
+    client.breaker = CircuitBreaker("test", min_calls=1, open_seconds=0.01, half_open_max_calls=1)
+    client.breaker.record_failure(RuntimeError("boom"))
+    time.sleep(0.02)
+    assert client.breaker.state == "half_open"
+    held = limiter.acquire()
+
+    async def stream():
+        async for _ in client.generate_stream("Tell me about Python", call_site="mentor_answer"):
+            pass
+
+    async def scenario():
+        # A streaming answer whose client disconnects while it is queued
+        streaming = asyncio.ensure_future(stream())
+        await asyncio.sleep(0.02)
+        assert limiter.get_state()["waiting"] == 1
+        streaming.cancel()
+        await asyncio.gather(streaming, return_exceptions=True)
+        assert client.breaker.allow_request()
+        client.breaker.record_ignored()
+
+        # A coalesced call whose upstream task is cancelled while queued (e.g. at shutdown)
+        calling = asyncio.ensure_future(client.generate("Tell me about SQL", call_site="mentor_answer"))
+        await asyncio.sleep(0.02)
+        assert limiter.get_state()["waiting"] == 1
+        for task in list(client._inflight.values()):
+            task.cancel()
+        await asyncio.gather(calling, return_exceptions=True)
+
+    asyncio.run(scenario())
+    limiter.release(held)
+    assert limiter.get_state()["waiting"] == 0
+    # The probe is free again: the breaker can still recover instead of rejecting every call
+    assert client.breaker.state == "half_open" and client.breaker.allow_request()
+    print("✅ Cancelled queued calls released their half-open probes")
+
+if __name__ == "__main__":
+    test_limiter_serves_queued_classes_by_weight()
+    test_limiter_rejects_when_queue_full_or_timed_out()
+    test_cancelled_waiter_leaves_no_slot_behind()
+    test_async_waiters_hold_no_threads()
+    test_interactive_call_jumps_background_calls_in_app_client()
+    test_call_cancelled_while_queued_releases_half_open_probe()
+    print("\n✅ All LLM scheduling tests passed!")
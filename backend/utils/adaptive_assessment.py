@@ -0,0 +1,425 @@
+import os
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+from dotenv import load_dotenv
+from utils.llm_client import llm_client
+from utils.llm_metrics import fallback_reason, llm_metrics
+from utils.model_router import expect_json_object
+from utils.prompt_registry import prompt_registry
+from utils.assessment_sessions import answer_key_index, option_index
+
+load_dotenv()
+
+# A skill is finished once its ability estimate's standard error drops below this...
+ADAPTIVE_TARGET_SE = float(os.getenv("ASSESSMENT_ADAPTIVE_TARGET_SE", "0.6"))
+# ...or after this many questions
+ADAPTIVE_MAX_ITEMS_PER_SKILL = int(os.getenv("ASSESSMENT_ADAPTIVE_MAX_ITEMS", "10"))
+# A new item is generated when no unused bank item is within this many logits of the estimate
+ADAPTIVE_MAX_DIFFICULTY_GAP = float(os.getenv("ASSESSMENT_ADAPTIVE_MAX_GAP", "1.0"))
+ADAPTIVE_SESSION_TTL_SECONDS = float(os.getenv("ASSESSMENT_ADAPTIVE_TTL_SECONDS", "7200"))
+ADAPTIVE_SESSION_MAX = int(os.getenv("ASSESSMENT_ADAPTIVE_MAX_SESSIONS", "10000"))
+# Step size of the online item calibration; shrinks as an item collects responses
+ITEM_LEARNING_RATE = float(os.getenv("ASSESSMENT_ITEM_LEARNING_RATE", "0.3"))
+# Discrimination is only recalibrated after this many responses, and at a tenth of the rate:
+# estimated abilities are shrunk towards the mean, which early a-updates overfit to
+ITEM_MIN_RESPONSES_FOR_DISCRIMINATION = int(os.getenv("ASSESSMENT_ITEM_MIN_RESPONSES_FOR_A", "50"))
+_DISCRIMINATION_RATE_SCALE = 0.1
+# Optional JSON file the item bank is loaded from at startup and saved to at shutdown
+ITEM_BANK_PATH = os.getenv("ASSESSMENT_ITEM_BANK_PATH", "")
+
+# Starting difficulty (b, in logits) of a newly generated item, from its difficulty label
+DIFFICULTY_PRIORS = {"beginner": -1.5, "intermediate": 0.0, "advanced": 1.0, "expert": 2.0}
+DEFAULT_DISCRIMINATION = 1.0
+
+# Ability grid for the EAP estimate, with a standard normal prior
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+_LOG_PRIOR = -0.5 * THETA_GRID ** 2
+
+def item_probability(theta, a, b):
+    """2PL probability of a correct answer"""
+    return 1.0 / (1.0 + np.exp(-a * (theta - b)))
+
+def item_information(theta: float, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Fisher information of each item at ability theta"""
+    p = item_probability(theta, a, b)
+    return a ** 2 * p * (1.0 - p)
+
+def response_log_likelihood(a: float, b: float, correct: bool) -> np.ndarray:
+    """Log-likelihood of one response over THETA_GRID"""
+    p = np.clip(item_probability(THETA_GRID, a, b), 1e-9, 1 - 1e-9)
+    return np.log(p) if correct else np.log(1.0 - p)
+
+def eap_estimate(log_likelihood: np.ndarray) -> Tuple[float, float]:
+    """Posterior mean ability and its standard error from the summed response log-likelihood"""
+    log_posterior = log_likelihood + _LOG_PRIOR
+    posterior = np.exp(log_posterior - log_posterior.max())
+    posterior /= posterior.sum()
+    theta = float((THETA_GRID * posterior).sum())
+    return theta, float(np.sqrt(((THETA_GRID - theta) ** 2 * posterior).sum()))
+
+def select_item(theta: float, a: np.ndarray, b: np.ndarray, used: np.ndarray) -> int:
+    """Index of the unused item with the most information at theta; -1 if none is left"""
+    if not len(a) or used.all():
+        return -1
+    information = np.where(used, -1.0, item_information(theta, a, b))
+    return int(information.argmax())
+
+def ability_to_score(theta: float) -> float:
+    """0-10 skill score: the share of the (standard normal) population below this ability"""
+    return round(10 * 0.5 * (1 + math.erf(theta / math.sqrt(2))), 2)
+
+def difficulty_label(theta: float) -> str:
+    return min(DIFFICULTY_PRIORS, key=lambda level: abs(DIFFICULTY_PRIORS[level] - theta))
+
+class _SkillItems:
+    def __init__(self):
+        self.items: List[Dict] = []
+        self.a = np.zeros(0)
+        self.b = np.zeros(0)
+        self.responses = np.zeros(0, dtype=np.int64)
+        self.correct = np.zeros(0, dtype=np.int64)
+
+class ItemBank:
+    """
+    Calibrated question bank per skill under the two-parameter logistic (2PL) model.
+
+    Every item has a discrimination a and a difficulty b. New items start from the
+    difficulty label they were generated for and are recalibrated online: whenever a skill
+    finishes, each answered item takes one gradient step on its 2PL log-likelihood at the
+    examinee's final ability, with a step size that shrinks as the item collects responses.
+    Discrimination only moves once the item has ASSESSMENT_ITEM_MIN_RESPONSES_FOR_A responses.
+    """
+
+    def __init__(self, learning_rate: float = ITEM_LEARNING_RATE):
+        self.learning_rate = learning_rate
+        self._skills: Dict[str, _SkillItems] = {}
+        self._lock = threading.Lock()
+        self.stats = {"items_added": 0, "calibration_updates": 0}
+
+    def add(self, skill: str, question: Dict, a: float = None, b: float = None) -> int:
+        """Add a question; returns its index within the skill"""
+        level = str(question.get("difficulty", "intermediate")).lower()
+        with self._lock:
+            bank = self._skills.setdefault(skill, _SkillItems())
+            bank.items.append({key: question[key] for key in ("question", "options", "answer", "explanation", "difficulty")
+                               if key in question})
+            bank.a = np.append(bank.a, DEFAULT_DISCRIMINATION if a is None else a)
+            bank.b = np.append(bank.b, DIFFICULTY_PRIORS.get(level, 0.0) if b is None else b)
+            bank.responses = np.append(bank.responses, 0)
+            bank.correct = np.append(bank.correct, 0)
+            self.stats["items_added"] += 1
+            return len(bank.items) - 1
+
+    def size(self, skill: str) -> int:
+        with self._lock:
+            bank = self._skills.get(skill)
+            return len(bank.items) if bank else 0
+
+    def parameters(self, skill: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Copies of the skill's (a, b) arrays"""
+        with self._lock:
+            bank = self._skills.get(skill)
+            return (bank.a.copy(), bank.b.copy()) if bank else (np.zeros(0), np.zeros(0))
+
+    def item(self, skill: str, index: int) -> Dict:
+        with self._lock:
+            return self._skills[skill].items[index]
+
+    def update(self, skill: str, indexes: List[int], correct: List[bool], theta: float):
+        """One online 2PL gradient step for each answered item, at the examinee's final ability"""
+        if not indexes:
+            return
+        indexes = np.asarray(indexes)
+        outcome = np.asarray(correct, dtype=np.float64)
+        with self._lock:
+            bank = self._skills[skill]
+            a, b = bank.a[indexes], bank.b[indexes]
+            residual = outcome - item_probability(theta, a, b)
+            step = self.learning_rate / np.sqrt(1.0 + bank.responses[indexes])
+            bank.b[indexes] = np.clip(b - step * a * residual, -4.0, 4.0)
+            settled = bank.responses[indexes] >= ITEM_MIN_RESPONSES_FOR_DISCRIMINATION
+            bank.a[indexes] = np.where(
+                settled, np.clip(a + _DISCRIMINATION_RATE_SCALE * step * (theta - b) * residual, 0.2, 3.0), a
+            )
+            bank.responses[indexes] += 1
+            bank.correct[indexes] += outcome.astype(np.int64)
+            self.stats["calibration_updates"] += len(indexes)
+
+    def load(self, path: str) -> int:
+        """Items (with a, b and response counts) from a JSON file written by save(); returns how many"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        loaded = 0
+        for skill, items in data.items():
+            for item in items:
+                index = self.add(skill, item, item.get("a"), item.get("b"))
+                with self._lock:
+                    bank = self._skills[skill]
+                    bank.responses[index] = item.get("responses", 0)
+                    bank.correct[index] = item.get("correct", 0)
+                loaded += 1
+        return loaded
+
+    def save(self, path: str):
+        with self._lock:
+            data = {
+                skill: [
+                    {**item, "a": round(float(bank.a[i]), 4), "b": round(float(bank.b[i]), 4),
+                     "responses": int(bank.responses[i]), "correct": int(bank.correct[i])}
+                    for i, item in enumerate(bank.items)
+                ]
+                for skill, bank in self._skills.items()
+            }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def get_report(self) -> Dict:
+        with self._lock:
+            skills = {
+                skill: {
+                    "items": len(bank.items),
+                    "calibrated_items": int((bank.responses > 0).sum()),
+                    "responses": int(bank.responses.sum()),
+                    "difficulty_range": [round(float(bank.b.min()), 2), round(float(bank.b.max()), 2)] if len(bank.b) else []
+                }
+                for skill, bank in self._skills.items()
+            }
+            stats = dict(self.stats)
+        return {"skills": skills, "items": sum(skill["items"] for skill in skills.values()), **stats}
+
+class _SkillState:
+    def __init__(self):
+        self.log_likelihood = np.zeros_like(THETA_GRID)
+        self.theta, self.se = eap_estimate(self.log_likelihood)
+        self.asked: List[int] = []
+        self.correct: List[bool] = []
+        self.done = False
+
+class AdaptiveSession:
+    def __init__(self, assessment_id: str, user_id: str, skills: List[str]):
+        self.assessment_id = assessment_id
+        self.user_id = user_id
+        self.skills = {skill: _SkillState() for skill in skills}
+        self.pending: Optional[Tuple[str, int]] = None
+        self.created_at = time.monotonic()
+
+class AdaptiveAssessmentEngine:
+    """
+    Computerized adaptive testing over the item bank, one question at a time.
+
+    Each skill keeps an EAP ability estimate on a grid. The next question goes to the
+    unfinished skill with the largest standard error, and is the unused bank item with the
+    most Fisher information at the current estimate. Gemini is asked for a new item (at
+    the difficulty label nearest the estimate) only when no unused bank item is within
+    ASSESSMENT_ADAPTIVE_MAX_GAP; generated items join the bank for later users. A skill
+    stops once its standard error is below ASSESSMENT_ADAPTIVE_TARGET_SE.
+    """
+
+    def __init__(self, bank: ItemBank, target_se: float = ADAPTIVE_TARGET_SE,
+                 max_items: int = ADAPTIVE_MAX_ITEMS_PER_SKILL, max_gap: float = ADAPTIVE_MAX_DIFFICULTY_GAP,
+                 ttl_seconds: float = ADAPTIVE_SESSION_TTL_SECONDS, max_sessions: int = ADAPTIVE_SESSION_MAX):
+        self.bank = bank
+        self.target_se = target_se
+        self.max_items = max_items
+        self.max_gap = max_gap
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, AdaptiveSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "started": 0, "completed": 0, "expired": 0, "evicted": 0,
+            "questions_asked": 0, "items_from_bank": 0, "items_generated": 0, "generation_failures": 0,
+            "skills_completed": 0, "skills_out_of_items": 0
+        }
+
+    def _expire(self, now: float):
+        while self._sessions:
+            assessment_id, session = next(iter(self._sessions.items()))
+            if now - session.created_at <= self.ttl_seconds:
+                break
+            del self._sessions[assessment_id]
+            self.stats["expired"] += 1
+
+    def get_session(self, user_id: str, assessment_id: str) -> Optional[AdaptiveSession]:
+        with self._lock:
+            self._expire(time.monotonic())
+            session = self._sessions.get(assessment_id)
+            return session if session is not None and session.user_id == user_id else None
+
+    async def start(self, user_id: str, skills: List[str]) -> Dict:
+        skills = list(dict.fromkeys(skill.strip() for skill in skills if skill and skill.strip()))
+        session = AdaptiveSession(f"adaptive_{user_id}_{uuid.uuid4().hex[:12]}", user_id, skills)
+        with self._lock:
+            self._expire(time.monotonic())
+            self._sessions[session.assessment_id] = session
+            self.stats["started"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats["evicted"] += 1
+        return await self._advance(session)
+
+    async def answer(self, session: AdaptiveSession, question_id: str, answer: str) -> Dict:
+        """Score the pending question, update the skill's estimate and return the next step"""
+        if session.pending is None or question_id != self._question_id(*session.pending):
+            raise ValueError(f"Question {question_id} is not the pending question")
+        skill, index = session.pending
+        item = self.bank.item(skill, index)
+        correct = option_index(answer, item["options"]) == answer_key_index(item["answer"], item["options"])
+        a, b = self.bank.parameters(skill)
+
+        state = session.skills[skill]
+        state.log_likelihood += response_log_likelihood(a[index], b[index], correct)
+        state.theta, state.se = eap_estimate(state.log_likelihood)
+        state.asked.append(index)
+        state.correct.append(correct)
+        if state.se < self.target_se or len(state.asked) >= self.max_items:
+            self._finish_skill(skill, state)
+        session.pending = None
+        return {"correct": correct, "explanation": item.get("explanation", ""), **await self._advance(session)}
+
+    def _finish_skill(self, skill: str, state: _SkillState):
+        state.done = True
+        self.bank.update(skill, state.asked, state.correct, state.theta)
+        with self._lock:
+            self.stats["skills_completed"] += 1
+
+    async def _advance(self, session: AdaptiveSession) -> Dict:
+        """Pick and attach the next question, or finish the session"""
+        while True:
+            open_skills = [skill for skill, state in session.skills.items() if not state.done]
+            if not open_skills:
+                return self._complete(session)
+            skill = max(open_skills, key=lambda s: session.skills[s].se)
+            index = await self._next_item(skill, session.skills[skill])
+            if index >= 0:
+                break
+            # Nothing left to ask for this skill: stop it at the current estimate
+            self._finish_skill(skill, session.skills[skill])
+            with self._lock:
+                self.stats["skills_out_of_items"] += 1
+
+        session.pending = (skill, index)
+        with self._lock:
+            self.stats["questions_asked"] += 1
+        item = self.bank.item(skill, index)
+        return {
+            "assessment_id": session.assessment_id,
+            "complete": False,
+            "question": {
+                "id": self._question_id(skill, index),
+                "skill": skill,
+                "question": item["question"],
+                "options": item["options"],
+                "difficulty": item.get("difficulty", "intermediate")
+            },
+            "progress": self._progress(session)
+        }
+
+    async def _next_item(self, skill: str, state: _SkillState) -> int:
+        a, b = self.bank.parameters(skill)
+        used = np.zeros(len(a), dtype=bool)
+        used[state.asked] = True
+        index = select_item(state.theta, a, b, used)
+        if index >= 0 and abs(b[index] - state.theta) <= self.max_gap:
+            with self._lock:
+                self.stats["items_from_bank"] += 1
+            return index
+
+        generated = await self._generate_item(skill, difficulty_label(state.theta))
+        if generated is not None:
+            return generated
+        if index >= 0:
+            with self._lock:
+                self.stats["items_from_bank"] += 1
+        return index
+
+    async def _generate_item(self, skill: str, difficulty: str) -> Optional[int]:
+        if not llm_client.is_available():
+            llm_metrics.record_fallback("question_gen", "unavailable")
+            return None
+        try:
+            prompt, prompt_version = prompt_registry.render("adaptive_question_gen", skill=skill, difficulty=difficulty)
+            result_text = await llm_client.generate(prompt, call_site="question_gen", prompt_version=prompt_version,
+                                                    validate=expect_json_object)
+            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+            if not json_match:
+                raise ValueError("No JSON object in adaptive question response")
+            question = json.loads(json_match.group())
+            options = question.get("options")
+            if not isinstance(options, list) or len(options) < 2 or answer_key_index(question.get("answer"), options) < 0:
+                raise ValueError("Adaptive question has no valid options/answer")
+        except Exception as e:
+            print(f"⚠️ Failed to generate adaptive question for {skill}: {e}")
+            llm_metrics.record_fallback("question_gen", fallback_reason(e))
+            with self._lock:
+                self.stats["generation_failures"] += 1
+            return None
+        # Calibrated from the label it was asked for, whatever the model wrote back
+        question["difficulty"] = difficulty
+        with self._lock:
+            self.stats["items_generated"] += 1
+        return self.bank.add(skill, question)
+
+    @staticmethod
+    def _question_id(skill: str, index: int) -> str:
+        return f"{skill}_{index}"
+
+    @staticmethod
+    def _progress(session: AdaptiveSession) -> Dict:
+        return {
+            skill: {
+                "questions": len(state.asked),
+                "ability": round(state.theta, 3),
+                "standard_error": round(state.se, 3),
+                "done": state.done
+            }
+            for skill, state in session.skills.items()
+        }
+
+    def _complete(self, session: AdaptiveSession) -> Dict:
+        with self._lock:
+            self._sessions.pop(session.assessment_id, None)
+            self.stats["completed"] += 1
+        return {
+            "assessment_id": session.assessment_id,
+            "complete": True,
+            # Skills no question could be found for are left out rather than scored at the prior
+            "skill_scores": {
+                skill: ability_to_score(state.theta) for skill, state in session.skills.items() if state.asked
+            },
+            "progress": self._progress(session),
+            "total_questions": sum(len(state.asked) for state in session.skills.values())
+        }
+
+    def get_report(self) -> Dict:
+        with self._lock:
+            self._expire(time.monotonic())
+            stats = dict(self.stats)
+            active = len(self._sessions)
+        return {
+            "target_se": self.target_se,
+            "max_items_per_skill": self.max_items,
+            "max_difficulty_gap": self.max_gap,
+            "active_sessions": active,
+            **stats,
+            "questions_per_skill": round(stats["questions_asked"] / max(stats["skills_completed"], 1), 2),
+            "bank_reuse_rate": round(
+                stats["items_from_bank"] / max(stats["items_from_bank"] + stats["items_generated"], 1), 4
+            ),
+            "item_bank": self.bank.get_report(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global item bank and adaptive assessment engine instances
+item_bank = ItemBank()
+if ITEM_BANK_PATH and os.path.exists(ITEM_BANK_PATH):
+    print(f"🎯 Adaptive item bank: {item_bank.load(ITEM_BANK_PATH)} items from {ITEM_BANK_PATH}")
+adaptive_engine = AdaptiveAssessmentEngine(item_bank)
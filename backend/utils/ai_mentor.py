@@ -1,20 +1,28 @@
-import google.generativeai as genai
-import os
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Tuple
 from datetime import datetime
 import json
+import time
 from dotenv import load_dotenv
+from utils.llm_client import llm_client
+from utils.llm_metrics import fallback_reason, llm_metrics
+from utils.prompt_registry import prompt_registry
+from utils.latency_slo import cache_key, latency_slos
+from utils.model_router import expect_json_object
+from utils.knowledge_base import GROUNDING_MIN_SCORE, knowledge_base
+from utils.semantic_cache import semantic_cache
+from utils.intent_classifier import intent_classifier
+from utils.conversation_memory import conversation_memory
+from utils.daily_tips import daily_tip_service
+from utils.learning_paths import compose_path, fallback_fragment, fragment_key, learning_path_fragments
 
 load_dotenv()
 
+# Separates the streamed free-text answer from the trailing JSON metadata block
+STREAM_META_MARKER = "###META###"
+
 class AIMentor:
     def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if self.api_key and self.api_key != "your_gemini_api_key_here":
-            genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel("gemini-pro")
-        else:
-            self.model = None
+        if not llm_client.enabled:
             print("⚠️ GEMINI_API_KEY not configured. AI Mentor will use fallback responses.")
     
     async def get_mentor_response(self, user_id: str, question: str, context: Dict = None) -> Dict:
@@ -22,76 +30,239 @@ class AIMentor:
         
         print(f"🤖 AI Mentor: User {user_id} asked: {question[:100]}...")
         
-        if not self.model:
-            return self._get_fallback_response(question)
+        # The user's server-side conversation memory replaces client-sent history
+        context = conversation_memory.build_context(user_id, context)
+        response = await self._answer(user_id, question, context)
+        conversation_memory.record_turn(user_id, question, response.get("response", ""))
+        return response
+    
+    async def _answer(self, user_id: str, question: str, context: Dict) -> Dict:
+        """Cheapest source that can answer: platform data, knowledge base, cache, then Gemini"""
+        
+        # Questions about the platform itself are answered from the user's activity data
+        platform = intent_classifier.answer(user_id, question)
+        if platform:
+            return {**platform, "served_by": "intent"}
+        
+        # Questions the curated knowledge base covers well are answered locally
+        started = time.monotonic()
+        matches = knowledge_base.search(question)
+        local = knowledge_base.local_answer(matches)
+        if local:
+            knowledge_base.record_latency("local", time.monotonic() - started)
+            return {**local, "served_by": "knowledge_base"}
+        
+        # Then earlier Gemini answers to the same question in other words
+        cached = semantic_cache.lookup(question, context)
+        if cached:
+            return {**cached, "served_by": "semantic_cache", "timestamp": datetime.utcnow().isoformat()}
+        
+        if not llm_client.is_available():
+            llm_metrics.record_fallback("mentor_answer", "unavailable")
+            return self._get_fallback_response(question, matches)
+        
+        # Latency-SLO mode: race Gemini against the local answer
+        hedge = latency_slos.get("mentor_answer")
+        if hedge:
+            response, served_by = await hedge.run(
+                cache_key(" ".join(question.lower().split()), context),
+                lambda: self._generate_mentor_response(question, context, matches),
+                lambda: self._get_fallback_response(question, matches)
+            )
+            if served_by != "fallback":
+                knowledge_base.record_latency("llm", time.monotonic() - started)
+            if served_by == "llm":
+                semantic_cache.store(question, response, context)
+            return {**response, "served_by": served_by, "timestamp": datetime.utcnow().isoformat()}
         
         try:
-            # Build context-aware prompt
-            prompt = self._build_mentor_prompt(question, context)
-            
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Try to parse as JSON for structured response
-            try:
-                import re
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
-                    return {
-                        "response": result.get("answer", response_text),
-                        "resources": result.get("resources", []),
-                        "next_steps": result.get("next_steps", []),
-                        "confidence": result.get("confidence", "high"),
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-            except:
-                pass
-            
-            # Return simple response if JSON parsing fails
-            return {
-                "response": response_text,
-                "resources": [],
-                "next_steps": [],
-                "confidence": "medium",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
+            response = await self._generate_mentor_response(question, context, matches)
+            knowledge_base.record_latency("llm", time.monotonic() - started)
+            semantic_cache.store(question, response, context)
+            return response
         except Exception as e:
             print(f"❌ AI Mentor error: {e}")
-            return self._get_fallback_response(question)
+            llm_metrics.record_fallback("mentor_answer", fallback_reason(e))
+            return self._get_fallback_response(question, matches)
     
-    def _build_mentor_prompt(self, question: str, context: Dict = None) -> str:
-        """Build context-aware prompt for AI mentor"""
-        
-        base_prompt = f"""
-        You are an expert AI mentor helping a student with programming and technology questions.
+    async def _generate_mentor_response(self, question: str, context: Dict = None, matches: List = None) -> Dict:
+        """Gemini mentor answer; raises on failure instead of falling back"""
         
-        Student Question: {question}
+        # Build a prompt grounded in the top-k relevant snippets
+        prompt, prompt_version = self._build_mentor_prompt(question, context, matches)
         
-        Context: {json.dumps(context) if context else "No additional context provided"}
+        response_text = await llm_client.generate(prompt, call_site="mentor_answer", prompt_version=prompt_version,
+                                                  validate=expect_json_object)
         
-        Provide a helpful, detailed response in JSON format:
-        {{
-            "answer": "Your detailed answer to the question",
-            "resources": ["resource1", "resource2", "resource3"],
-            "next_steps": ["step1", "step2", "step3"],
-            "confidence": "high/medium/low"
-        }}
-        
-        Guidelines:
-        - Be encouraging and supportive
-        - Provide practical, actionable advice
-        - Include relevant learning resources
-        - Suggest next steps for improvement
-        - Keep explanations clear and beginner-friendly when appropriate
-        """
+        # Try to parse as JSON for structured response
+        try:
+            import re
+            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+            if json_match:
+                result = json.loads(json_match.group())
+                return {
+                    "response": result.get("answer", response_text),
+                    "resources": result.get("resources", []),
+                    "next_steps": result.get("next_steps", []),
+                    "confidence": result.get("confidence", "high"),
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+        except:
+            pass
         
-        return base_prompt
+        # Return simple response if JSON parsing fails
+        return {
+            "response": response_text,
+            "resources": [],
+            "next_steps": [],
+            "confidence": "medium",
+            "timestamp": datetime.utcnow().isoformat()
+        }
     
-    def _get_fallback_response(self, question: str) -> Dict:
+    def _build_mentor_prompt(self, question: str, context: Dict = None, matches: List = None) -> Tuple[str, str]:
+        """Build context-aware prompt for AI mentor; returns (prompt, template version)"""
+        
+        return prompt_registry.render(
+            "mentor_answer",
+            question=question,
+            context=knowledge_base.grounding(question, matches or [], context)
+        )
+
+    async def stream_mentor_response(self, user_id: str, question: str, context: Dict = None) -> AsyncIterator[Dict]:
+        """Stream AI mentor answer tokens, followed by the structured resources/next_steps block"""
+
+        print(f"🤖 AI Mentor (stream): User {user_id} asked: {question[:100]}...")
+
+        context = conversation_memory.build_context(user_id, context)
+        answer_parts = []
+        async for event in self._stream_answer(user_id, question, context):
+            if event["type"] == "token":
+                answer_parts.append(event["text"])
+            yield event
+        # Only answers delivered in full are remembered
+        conversation_memory.record_turn(user_id, question, "".join(answer_parts))
+
+    async def _stream_answer(self, user_id: str, question: str, context: Dict) -> AsyncIterator[Dict]:
+        platform = intent_classifier.answer(user_id, question)
+        if platform:
+            yield {"type": "token", "text": platform["response"]}
+            yield {"type": "meta", **{k: v for k, v in platform.items() if k != "response"}, "served_by": "intent"}
+            return
+
+        started = time.monotonic()
+        matches = knowledge_base.search(question)
+        local = knowledge_base.local_answer(matches)
+        if local:
+            knowledge_base.record_latency("local", time.monotonic() - started)
+            yield {"type": "token", "text": local["response"]}
+            yield {"type": "meta", **{k: v for k, v in local.items() if k != "response"}, "served_by": "knowledge_base"}
+            return
+
+        cached = semantic_cache.lookup(question, context)
+        if cached:
+            yield {"type": "token", "text": cached["response"]}
+            yield {"type": "meta", **{k: v for k, v in cached.items() if k != "response"}, "served_by": "semantic_cache",
+                   "timestamp": datetime.utcnow().isoformat()}
+            return
+
+        if not llm_client.is_available():
+            llm_metrics.record_fallback("mentor_answer", "unavailable")
+            fallback = self._get_fallback_response(question, matches)
+            yield {"type": "token", "text": fallback["response"]}
+            yield {"type": "meta", **{k: v for k, v in fallback.items() if k != "response"}}
+            return
+
+        answer_parts = []
+        tail = ""
+        meta_text = ""
+        in_meta = False
+        interrupted = False
+
+        try:
+            prompt, prompt_version = self._build_mentor_stream_prompt(question, context, matches)
+
+            async for text in llm_client.generate_stream(prompt, call_site="mentor_answer", prompt_version=prompt_version):
+                if in_meta:
+                    meta_text += text
+                    continue
+
+                # Hold back enough characters to detect a marker split across chunks
+                buffer = tail + text
+                marker_pos = buffer.find(STREAM_META_MARKER)
+                if marker_pos >= 0:
+                    emit = buffer[:marker_pos]
+                    meta_text = buffer[marker_pos + len(STREAM_META_MARKER):]
+                    in_meta = True
+                    tail = ""
+                else:
+                    safe_len = max(len(buffer) - len(STREAM_META_MARKER) + 1, 0)
+                    emit, tail = buffer[:safe_len], buffer[safe_len:]
+
+                if emit:
+                    answer_parts.append(emit)
+                    yield {"type": "token", "text": emit}
+
+            if tail:
+                answer_parts.append(tail)
+                yield {"type": "token", "text": tail}
+
+        except Exception as e:
+            print(f"❌ AI Mentor stream error: {e}")
+            interrupted = True
+            if not answer_parts:
+                llm_metrics.record_fallback("mentor_answer", fallback_reason(e))
+                fallback = self._get_fallback_response(question, matches)
+                yield {"type": "token", "text": fallback["response"]}
+                yield {"type": "meta", **{k: v for k, v in fallback.items() if k != "response"}}
+                return
+
+        knowledge_base.record_latency("llm", time.monotonic() - started)
+        meta = {}
+        try:
+            start, end = meta_text.find("{"), meta_text.rfind("}")
+            if start >= 0 and end > start:
+                meta = json.loads(meta_text[start:end + 1])
+        except Exception:
+            pass
+
+        meta_event = {
+            "type": "meta",
+            "resources": meta.get("resources", []),
+            "next_steps": meta.get("next_steps", []),
+            "confidence": meta.get("confidence", "high" if meta else "medium"),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        # Only complete answers are reused for paraphrased questions
+        if not interrupted and meta:
+            semantic_cache.store(question, {"response": "".join(answer_parts), **meta_event}, context)
+        yield meta_event
+
+    def _build_mentor_stream_prompt(self, question: str, context: Dict = None, matches: List = None) -> Tuple[str, str]:
+        """Build mentor prompt whose answer is streamable plain text with a trailing JSON block"""
+
+        return prompt_registry.render(
+            "mentor_answer_stream",
+            question=question,
+            context=knowledge_base.grounding(question, matches or [], context),
+            marker=STREAM_META_MARKER
+        )
+
+    def _get_fallback_response(self, question: str, matches: List = None) -> Dict:
         """Fallback response when AI is not available"""
         
+        # The closest curated entry, even below the local-answer threshold, beats a generic reply
+        if matches and matches[0][1] >= GROUNDING_MIN_SCORE * 2:
+            entry, score = matches[0]
+            return {
+                "response": entry["answer"],
+                "resources": entry.get("resources", []),
+                "next_steps": entry.get("next_steps", []),
+                "confidence": "medium",
+                "sources": [entry["id"]],
+                "match_score": round(score, 3),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        
         # Simple keyword-based responses
         question_lower = question.lower()
         
@@ -129,184 +300,37 @@ class AIMentor:
             }
     
     async def generate_learning_path(self, user_id: str, skills: List[str], skill_levels: Dict[str, str]) -> Dict:
-        """Generate personalized learning path using AI"""
+        """Generate personalized learning path from cached per-skill fragments (see utils/learning_paths.py)"""
         
         print(f"🎯 Generating learning path for user {user_id} with skills: {skills}")
         
-        if not self.model:
-            return self._get_fallback_learning_path(skills, skill_levels)
+        # Latency-SLO mode: race fragment generation against the template path. Strict, so a path with any
+        # template section is the hedge's fallback and is neither labelled nor cached as an LLM answer
+        hedge = latency_slos.get("learning_path")
+        if hedge and llm_client.is_available():
+            learning_path, served_by = await hedge.run(
+                cache_key(sorted(skills), skill_levels),
+                lambda: learning_path_fragments.build(skills, skill_levels, strict=True),
+                lambda: self._get_fallback_learning_path(skills, skill_levels)
+            )
+            return {**learning_path, "served_by": served_by}
         
-        try:
-            prompt = f"""
-            Generate a personalized learning path for a user with the following skills and levels:
-            
-            Skills: {skills}
-            Skill Levels: {json.dumps(skill_levels)}
-            
-            Create a comprehensive learning path in JSON format:
-        {{
-            "learning_path": [
-                {{
-                    "skill": "skill_name",
-                        "current_level": "beginner/intermediate/advanced",
-                        "target_level": "next_level",
-                        "modules": [
-                            {{
-                                "title": "Module Title",
-                                "description": "Module description",
-                                "duration": "estimated_time",
-                                "resources": ["resource1", "resource2"],
-                                "projects": ["project1", "project2"],
-                                "assessment": "assessment_type"
-                            }}
-                        ],
-                        "estimated_completion": "total_time"
-                    }}
-                ],
-                "overall_timeline": "total_estimated_time",
-                "priority_order": ["skill1", "skill2", "skill3"],
-                "success_metrics": ["metric1", "metric2", "metric3"]
-        }}
-        """
-            
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            import re
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return self._get_fallback_learning_path(skills, skill_levels)
-                
-        except Exception as e:
-            print(f"❌ Failed to generate AI learning path: {e}")
-            return self._get_fallback_learning_path(skills, skill_levels)
+        # Cached fragments are reused; missing ones are generated concurrently, falling back per skill
+        return await learning_path_fragments.build(skills, skill_levels)
     
     def _get_fallback_learning_path(self, skills: List[str], skill_levels: Dict[str, str]) -> Dict:
         """Fallback learning path generation"""
         
-        learning_path = []
+        fragments = {}
         for skill in skills:
-            level = skill_levels.get(skill, "beginner")
-            
-            if level == "beginner":
-                modules = [
-                    {
-                        "title": f"Introduction to {skill}",
-                        "description": f"Learn the basics of {skill}",
-                        "duration": "1-2 weeks",
-                        "resources": [f"{skill} documentation", "Online tutorials"],
-                        "projects": [f"Simple {skill} project"],
-                        "assessment": "Basic quiz"
-                    }
-                ]
-                target_level = "intermediate"
-            elif level == "intermediate":
-                modules = [
-                    {
-                        "title": f"Advanced {skill} Concepts",
-                        "description": f"Deep dive into {skill}",
-                        "duration": "2-3 weeks",
-                        "resources": [f"Advanced {skill} courses", "Practice platforms"],
-                        "projects": [f"Complex {skill} project"],
-                        "assessment": "Project-based assessment"
-                    }
-                ]
-                target_level = "advanced"
-            else:
-                modules = [
-                    {
-                        "title": f"Expert {skill} Mastery",
-                        "description": f"Master {skill} at expert level",
-                        "duration": "3-4 weeks",
-                        "resources": [f"Expert {skill} resources", "Industry best practices"],
-                        "projects": [f"Expert-level {skill} project"],
-                        "assessment": "Expert evaluation"
-                    }
-                ]
-                target_level = "expert"
-            
-            learning_path.append({
-                "skill": skill,
-                "current_level": level,
-                "target_level": target_level,
-                "modules": modules,
-                "estimated_completion": "4-6 weeks"
-            })
-        
-        return {
-            "learning_path": learning_path,
-            "overall_timeline": "3-6 months",
-            "priority_order": skills,
-            "success_metrics": ["Skill assessments", "Project completion", "Real-world application"]
-        }
+            key = fragment_key(skill, skill_levels.get(skill, "beginner"))
+            fragments[key] = fallback_fragment(skill, key[1])
+        return compose_path(skills, skill_levels, fragments)
     
     async def get_daily_tip(self, user_id: str, current_skills: List[str]) -> Dict:
-        """Get daily learning tip based on user's skills"""
-        
-        if not self.model:
-            return self._get_fallback_daily_tip(current_skills)
-        
-        try:
-            prompt = f"""
-            Generate a daily learning tip for a user with these skills: {current_skills}
-            
-            Provide the tip in JSON format:
-            {{
-                "tip": "The daily tip",
-                "skill_focus": "skill_name",
-                "difficulty": "beginner/intermediate/advanced",
-                "practice_exercise": "A quick exercise to practice",
-                "motivation": "Motivational message"
-            }}
-            """
-            
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            import re
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return self._get_fallback_daily_tip(current_skills)
-                
-        except Exception as e:
-            print(f"❌ Failed to generate daily tip: {e}")
-            return self._get_fallback_daily_tip(current_skills)
-    
-    def _get_fallback_daily_tip(self, current_skills: List[str]) -> Dict:
-        """Fallback daily tip"""
-        
-        skill = current_skills[0] if current_skills else "programming"
-        
-        tips = [
-            {
-                "tip": f"Practice {skill} for at least 30 minutes today",
-                "skill_focus": skill,
-                "difficulty": "beginner",
-                "practice_exercise": f"Write a simple {skill} program",
-                "motivation": "Consistency is key to mastering any skill!"
-            },
-            {
-                "tip": f"Review {skill} concepts you learned yesterday",
-                "skill_focus": skill,
-                "difficulty": "intermediate",
-                "practice_exercise": f"Debug a {skill} code snippet",
-                "motivation": "Repetition helps solidify your knowledge!"
-            },
-            {
-                "tip": f"Teach someone else about {skill}",
-                "skill_focus": skill,
-                "difficulty": "advanced",
-                "practice_exercise": f"Create a {skill} tutorial",
-                "motivation": "Teaching is the best way to learn!"
-            }
-        ]
+        """Get daily learning tip based on user's skills (precomputed once a day, see utils/daily_tips.py)"""
         
-        import random
-        return random.choice(tips)
+        return await daily_tip_service.get_tip(user_id, current_skills)
 
 # Global AI Mentor instance
 ai_mentor = AIMentor() 
\ No newline at end of file
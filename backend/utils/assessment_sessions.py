@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from datetime import datetime
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Generated assessments are kept this long for grading, and at most this many at once (oldest dropped)
+ASSESSMENT_SESSION_TTL_SECONDS = float(os.getenv("ASSESSMENT_SESSION_TTL_SECONDS", "7200"))
+ASSESSMENT_SESSION_MAX = int(os.getenv("ASSESSMENT_SESSION_MAX", "20000"))
+# Strip answer keys from generated questions; grading happens server-side
+ASSESSMENT_HIDE_ANSWER_KEYS = os.getenv("ASSESSMENT_HIDE_ANSWER_KEYS", "true").lower() in ("1", "true", "yes")
+
+def _letter_index(text: str, options: List[str]) -> int:
+    if len(text) == 1 and "A" <= text.upper() < chr(ord("A") + max(len(options), 1)):
+        return ord(text.upper()) - ord("A")
+    return -1
+
+def _text_index(text: str, options: List[str]) -> int:
+    lowered = text.lower()
+    for i, option in enumerate(options):
+        if str(option).strip().lower() == lowered:
+            return i
+    return -1
+
+def option_index(answer, options: List[str]) -> int:
+    """
+    Submitted answer as an option index; -1 if it matches none. Clients send the option text,
+    so the text is matched first: with options ["Java", "C", "Go", "R"], "C" is "C", not "Go".
+    A letter ("B") is accepted when no option has that text.
+    """
+    text = str(answer or "").strip()
+    index = _text_index(text, options)
+    return index if index >= 0 else _letter_index(text, options)
+
+def answer_key_index(answer, options: List[str]) -> int:
+    """Answer key as an option index; generated keys are letters ("A"-"D"), so the letter is matched first"""
+    text = str(answer or "").strip()
+    index = _letter_index(text, options)
+    return index if index >= 0 else _text_index(text, options)
+
+class AssessmentSession:
+    """One generated assessment; per-question data is held in parallel arrays indexed by row"""
+
+    __slots__ = ("assessment_id", "user_id", "kind", "rows", "skills", "skill_index", "answer_keys",
+                 "option_counts", "options", "created_at")
+
+    def __init__(self, assessment_id: str, user_id: str, questions: List[Dict], kind: str):
+        self.assessment_id = assessment_id
+        self.user_id = user_id
+        self.kind = kind
+        self.rows = {question["id"]: row for row, question in enumerate(questions)}
+        self.skills = list(dict.fromkeys(question["skill"] for question in questions))
+        columns = {skill: i for i, skill in enumerate(self.skills)}
+        self.skill_index = np.array([columns[question["skill"]] for question in questions], dtype=np.int32)
+        self.options = [list(question.get("options") or []) for question in questions]
+        self.option_counts = np.array([len(options) for options in self.options], dtype=np.int8)
+        self.answer_keys = np.array(
+            [answer_key_index(question.get("answer"), options) for question, options in zip(questions, self.options)],
+            dtype=np.int8
+        )
+        self.created_at = time.monotonic()
+
+    def nbytes(self) -> int:
+        text = sum(len(question_id) for question_id in self.rows) + sum(len(str(o)) for options in self.options for o in options)
+        return text + self.skill_index.nbytes + self.answer_keys.nbytes + self.option_counts.nbytes
+
+    def grade(self, answers: Dict[str, str]) -> Dict:
+        """
+        Per-skill 0-10 scores in one vectorized pass: the submitted option indexes are compared
+        with the answer keys and summed per skill. Unanswered questions score 0. A
+        self-assessment scores each answer by the level picked (last option = 10).
+        """
+        submitted = np.full(len(self.answer_keys), -1, dtype=np.int8)
+        unknown = 0
+        for question_id, answer in answers.items():
+            row = self.rows.get(question_id)
+            if row is None:
+                unknown += 1
+                continue
+            submitted[row] = option_index(answer, self.options[row])
+
+        answered = submitted >= 0
+        correct = answered & (submitted == self.answer_keys)
+        if self.kind == "self_assessment":
+            points = np.where(answered, (submitted + 1) / np.maximum(self.option_counts, 1), 0.0)
+        else:
+            points = correct.astype(np.float64)
+
+        questions_per_skill = np.bincount(self.skill_index, minlength=len(self.skills))
+        earned = np.bincount(self.skill_index, weights=points, minlength=len(self.skills))
+        scores = np.round(earned / np.maximum(questions_per_skill, 1) * 10, 2).tolist()
+        return {
+            "skill_scores": dict(zip(self.skills, scores)),
+            "kind": self.kind,
+            "total_questions": len(self.answer_keys),
+            "answered": int(answered.sum()),
+            "correct": None if self.kind == "self_assessment" else int(correct.sum()),
+            "unknown_questions": unknown
+        }
+
+class AssessmentSessionStore:
+    """
+    Generated assessments kept server-side until submitted, keyed by assessment_id.
+
+    Sessions expire after ASSESSMENT_SESSION_TTL_SECONDS and the oldest are dropped past
+    ASSESSMENT_SESSION_MAX. A submission without an assessment_id is graded against the
+    user's most recent assessment, so existing clients keep working unchanged.
+    """
+
+    def __init__(self, ttl_seconds: float = ASSESSMENT_SESSION_TTL_SECONDS, max_sessions: int = ASSESSMENT_SESSION_MAX):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, AssessmentSession]" = OrderedDict()
+        self._latest: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "graded": 0, "not_found": 0, "expired": 0, "evicted": 0}
+
+    def _drop(self, assessment_id: str) -> AssessmentSession:
+        session = self._sessions.pop(assessment_id)
+        if self._latest.get(session.user_id) == assessment_id:
+            del self._latest[session.user_id]
+        return session
+
+    def _expire(self, now: float):
+        # Insertion order is creation order, so expired sessions sit at the front
+        while self._sessions:
+            assessment_id, session = next(iter(self._sessions.items()))
+            if now - session.created_at <= self.ttl_seconds:
+                break
+            self._drop(assessment_id)
+            self.stats["expired"] += 1
+
+    def create(self, user_id: str, questions: List[Dict], kind: str = "graded", prefix: str = "assess") -> str:
+        """Keep a generated assessment for grading; returns its assessment_id"""
+        assessment_id = f"{prefix}_{user_id}_{uuid.uuid4().hex[:12]}"
+        session = AssessmentSession(assessment_id, user_id, questions, kind)
+        with self._lock:
+            self._expire(time.monotonic())
+            self._sessions[assessment_id] = session
+            self._latest[user_id] = assessment_id
+            self.stats["created"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+                self.stats["evicted"] += 1
+        return assessment_id
+
+    def get(self, user_id: str, assessment_id: str = None) -> Optional[AssessmentSession]:
+        """The session to grade (the user's latest if no id is given); None if unknown or expired"""
+        with self._lock:
+            self._expire(time.monotonic())
+            assessment_id = assessment_id or self._latest.get(user_id)
+            session = self._sessions.get(assessment_id) if assessment_id else None
+            if session is None or session.user_id != user_id:
+                self.stats["not_found"] += 1
+                return None
+            return session
+
+    def complete(self, assessment_id: str):
+        """Drop a session once its result has been built; until then a failed submission can be retried"""
+        with self._lock:
+            if assessment_id in self._sessions:
+                self._drop(assessment_id)
+                self.stats["graded"] += 1
+
+    def get_report(self) -> Dict:
+        with self._lock:
+            self._expire(time.monotonic())
+            stats = dict(self.stats)
+            sessions = len(self._sessions)
+            session_bytes = sum(session.nbytes() for session in self._sessions.values())
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "max_sessions": self.max_sessions,
+            "hide_answer_keys": ASSESSMENT_HIDE_ANSWER_KEYS,
+            "sessions": sessions,
+            "session_bytes": session_bytes,
+            **stats,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global assessment session store instance
+assessment_sessions = AssessmentSessionStore()
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+from typing import Dict
+from datetime import datetime
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the breaker is open"""
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by error rate and slow-call rate over a rolling window"""
+
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 failure_rate_threshold: float = 0.5, slow_call_seconds: float = 10.0,
+                 slow_call_rate_threshold: float = 0.8, open_seconds: float = 30.0,
+                 half_open_max_calls: int = 2):
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        # Rolling window of (failed, slow) outcomes
+        self._outcomes = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self.stats = {
+            "rejected_calls": 0,
+            "times_opened": 0,
+            "last_opened": None,
+            "last_failure_at": None,
+            "last_error": None
+        }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.stats["times_opened"] += 1
+        self.stats["last_opened"] = datetime.utcnow().isoformat()
+        print(f"⚡ Circuit breaker '{self.name}' opened")
+
+    def allow_request(self) -> bool:
+        """Admit a call; in half-open state only a few probe calls are let through"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self.stats["rejected_calls"] += 1
+            return False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            slow = latency >= self.slow_call_seconds
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+                if slow:
+                    self._open()
+                    return
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    print(f"✅ Circuit breaker '{self.name}' closed")
+                return
+            self._outcomes.append((False, slow))
+            self._evaluate()
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self.stats["last_failure_at"] = datetime.utcnow().isoformat()
+            self.stats["last_error"] = str(error) if error else None
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+                self._open()
+                return
+            self._outcomes.append((True, False))
+            self._evaluate()
+
+    def record_ignored(self):
+        """Release a probe slot for a call whose outcome says nothing about upstream health"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+
+    def _evaluate(self):
+        if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        total = len(self._outcomes)
+        failure_rate = sum(1 for failed, _ in self._outcomes if failed) / total
+        slow_rate = sum(1 for _, slow in self._outcomes if slow) / total
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._open()
+
+    def get_state(self) -> Dict:
+        """Breaker state for health checks"""
+        with self._lock:
+            self._maybe_half_open()
+            total = len(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "window_calls": total,
+                "failure_rate": round(sum(1 for f, _ in self._outcomes if f) / total, 3) if total else 0.0,
+                "slow_call_rate": round(sum(1 for _, s in self._outcomes if s) / total, 3) if total else 0.0,
+                "open_for_seconds": round(time.monotonic() - self._opened_at, 1) if self._state == OPEN else 0,
+                **self.stats
+            }
@@ -0,0 +1,280 @@
+import os
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from datetime import datetime
+from dotenv import load_dotenv
+from utils.llm_priority import DEFAULT_PRIORITY, PRIORITY_CLASSES, PRIORITY_WEIGHTS
+from utils.llm_providers import LLMProviderError
+
+load_dotenv()
+
+class ConcurrencyLimitExceeded(LLMProviderError):
+    """No LLM slot freed up in time, or the wait queue was full"""
+
+class _Waiter:
+    """One queued acquire; ordered by its weighted-fair-queuing finish tag, woken once granted a slot"""
+
+    def __init__(self, priority: str, start_tag: float, finish_tag: float, sequence: int, wake: Callable[[], None]):
+        self.priority = priority
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.sequence = sequence
+        self.wake = wake
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+def _wait_summary(waits: deque) -> Dict:
+    waits = sorted(waits)
+    if not waits:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": len(waits),
+        "p50_ms": round(waits[len(waits) // 2], 1),
+        "p95_ms": round(waits[min(int(len(waits) * 0.95), len(waits) - 1)], 1),
+        "max_ms": round(waits[-1], 1)
+    }
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit for upstream LLM calls, with a priority-aware wait queue.
+
+    The limit grows by about one slot per limit's worth of successful calls made while it
+    was fully used (additive increase), and is multiplied by decrease_factor on a 429 or
+    timeout (multiplicative decrease). Overload signals from calls that started before the
+    last cut are ignored, so one burst of 429s only cuts once.
+
+    Freed slots are handed to queued callers directly rather than raced for. acquire_async()
+    waits on the event loop, so queued async callers hold no worker thread; acquire() blocks
+    the calling thread, for synchronous callers.
+
+    Freed slots go to queued callers by weighted fair queuing over the priority classes,
+    so with everything backlogged interactive:normal:background get slots in proportion to
+    their weights. A caller queued longer than starvation_seconds is served ahead of all
+    others, and background callers may fill at most background_queue_share of the queue.
+    """
+
+    def __init__(self, name: str, initial_limit: float = 8, min_limit: float = 1, max_limit: float = 64,
+                 decrease_factor: float = 0.5, max_queue: int = 100, queue_timeout: float = 10,
+                 weights: Dict[str, float] = None, starvation_seconds: float = 5,
+                 background_queue_share: float = 0.5):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.weights = dict(weights or PRIORITY_WEIGHTS)
+        self.starvation_seconds = starvation_seconds
+        self.background_queue_share = background_queue_share
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._queue: List[_Waiter] = []
+        self._virtual_time = 0.0
+        self._last_finish = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._sequence = itertools.count()
+        # (timestamp, limit) after every change, for the dashboard
+        self._history = deque(maxlen=200)
+        self.stats = {
+            "acquired": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "starvation_promotions": 0,
+            "increases": 0,
+            "decreases": 0,
+            "overload_signals": 0,
+            "peak_in_flight": 0,
+            "peak_waiting": 0
+        }
+        self._class_stats = {
+            priority: {"acquired": 0, "queued": 0, "rejected": 0, "in_flight": 0, "waits": deque(maxlen=1000)}
+            for priority in PRIORITY_CLASSES
+        }
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), 1)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        """Starved waiters first (oldest first), then the smallest finish tag"""
+        if not self._queue:
+            return None
+        now = time.monotonic()
+        starved = [waiter for waiter in self._queue if now - waiter.enqueued_at >= self.starvation_seconds]
+        if starved:
+            return min(starved, key=lambda waiter: waiter.sequence)
+        return min(self._queue, key=lambda waiter: (waiter.finish_tag, waiter.sequence))
+
+    def _dispatch(self):
+        """Hand free slots to queued waiters in fair-queuing order (called with the lock held)"""
+        while self._queue and self._in_flight < self.limit:
+            waiter = self._next_waiter()
+            self._queue.remove(waiter)
+            if time.monotonic() - waiter.enqueued_at >= self.starvation_seconds:
+                self.stats["starvation_promotions"] += 1
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            self._grant(waiter.priority, waiter.enqueued_at)
+            waiter.granted = True
+            waiter.wake()
+
+    def _grant(self, priority: str, started: float):
+        self._in_flight += 1
+        self.stats["acquired"] += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self._in_flight)
+        class_stats = self._class_stats[priority]
+        class_stats["acquired"] += 1
+        class_stats["in_flight"] += 1
+        class_stats["waits"].append((time.monotonic() - started) * 1000)
+
+    def _enqueue(self, priority: str, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """Take a free slot (returns None) or join the wait queue (called with the lock held)"""
+        if not self._queue and self._in_flight < self.limit:
+            self._grant(priority, time.monotonic())
+            return None
+
+        queue_cap = self.max_queue * (self.background_queue_share if priority == "background" else 1)
+        if len(self._queue) >= queue_cap:
+            self.stats["rejected_queue_full"] += 1
+            self._class_stats[priority]["rejected"] += 1
+            raise ConcurrencyLimitExceeded(f"{self.name} wait queue full ({len(self._queue)} waiting)")
+
+        start_tag = max(self._virtual_time, self._last_finish[priority])
+        waiter = _Waiter(priority, start_tag, start_tag + 1 / self.weights.get(priority, 1.0), next(self._sequence), wake)
+        self._last_finish[priority] = waiter.finish_tag
+        self._queue.append(waiter)
+        self.stats["queued"] += 1
+        self._class_stats[priority]["queued"] += 1
+        self.stats["peak_waiting"] = max(self.stats["peak_waiting"], len(self._queue))
+        return waiter
+
+    def _give_up(self, waiter: _Waiter, timeout: float):
+        """Leave the queue after the wait timed out (called with the lock held)"""
+        self._queue.remove(waiter)
+        self.stats["rejected_timeout"] += 1
+        self._class_stats[waiter.priority]["rejected"] += 1
+        raise ConcurrencyLimitExceeded(f"No {self.name} slot within {timeout:g}s")
+
+    def _normalize(self, timeout: Optional[float], priority: str):
+        timeout = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        return timeout, priority if priority in self._class_stats else DEFAULT_PRIORITY
+
+    def acquire(self, timeout: Optional[float] = None, priority: str = DEFAULT_PRIORITY) -> float:
+        """Wait for a slot, blocking the calling thread; returns the acquisition time to pass back to release()"""
+        timeout, priority = self._normalize(timeout, priority)
+        granted = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(priority, granted.set)
+        if waiter is not None:
+            granted.wait(max(timeout, 0))
+            with self._lock:
+                if not waiter.granted:
+                    self._give_up(waiter, timeout)
+        return time.monotonic()
+
+    async def acquire_async(self, timeout: Optional[float] = None, priority: str = DEFAULT_PRIORITY) -> float:
+        """acquire() for event-loop callers: the wait is a future, so it holds no worker thread"""
+        timeout, priority = self._normalize(timeout, priority)
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+        # Slots are handed out from whichever thread released one
+        with self._lock:
+            waiter = self._enqueue(priority, lambda: loop.call_soon_threadsafe(_resolve, granted))
+        if waiter is None:
+            return time.monotonic()
+        try:
+            await asyncio.wait_for(granted, max(timeout, 0))
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not waiter.granted:
+                    self._give_up(waiter, timeout)
+        except BaseException:
+            # Cancelled while queued: leave the queue, or hand back a slot granted in the meantime
+            with self._lock:
+                if not waiter.granted:
+                    self._queue.remove(waiter)
+            if waiter.granted:
+                self.release(time.monotonic(), "ignore", priority)
+            raise
+        return time.monotonic()
+
+    def release(self, acquired_at: float, outcome: str = "success", priority: str = DEFAULT_PRIORITY):
+        """outcome: "success", "overload" (429/timeout) or "ignore" (says nothing about capacity)"""
+        with self._lock:
+            saturated = self._in_flight >= self.limit
+            self._in_flight -= 1
+            class_stats = self._class_stats.get(priority, self._class_stats[DEFAULT_PRIORITY])
+            class_stats["in_flight"] -= 1
+
+            if outcome == "overload":
+                self.stats["overload_signals"] += 1
+                if acquired_at > self._last_decrease:
+                    self._limit = max(self._limit * self.decrease_factor, self.min_limit)
+                    self._last_decrease = time.monotonic()
+                    self.stats["decreases"] += 1
+                    self._history.append((datetime.utcnow().isoformat(), round(self._limit, 2)))
+            elif outcome == "success" and (saturated or self._queue):
+                previous = self.limit
+                self._limit = min(self._limit + 1 / self._limit, self.max_limit)
+                if self.limit != previous:
+                    self.stats["increases"] += 1
+                    self._history.append((datetime.utcnow().isoformat(), round(self._limit, 2)))
+
+            self._dispatch()
+
+    def get_state(self) -> Dict:
+        """Limiter state for the admin dashboard, with queue wait per priority class"""
+        with self._lock:
+            classes = {}
+            all_waits = deque()
+            for priority, class_stats in self._class_stats.items():
+                all_waits.extend(class_stats["waits"])
+                classes[priority] = {
+                    "weight": self.weights.get(priority, 1.0),
+                    "acquired": class_stats["acquired"],
+                    "queued": class_stats["queued"],
+                    "rejected": class_stats["rejected"],
+                    "in_flight": class_stats["in_flight"],
+                    "waiting": sum(1 for waiter in self._queue if waiter.priority == priority),
+                    "queue_wait": _wait_summary(class_stats["waits"])
+                }
+            return {
+                "name": self.name,
+                "limit": self.limit,
+                "limit_exact": round(self._limit, 2),
+                "in_flight": self._in_flight,
+                "waiting": len(self._queue),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "max_queue": self.max_queue,
+                **self.stats,
+                "queue_wait": _wait_summary(all_waits),
+                "classes": classes,
+                "recent_limit_changes": list(self._history)[-20:]
+            }
+
+def create_llm_limiter() -> Optional[AdaptiveConcurrencyLimiter]:
+    """Gemini limiter from LLM_CONCURRENCY_* settings (LLM_CONCURRENCY_LIMITER=false disables it)"""
+    if os.getenv("LLM_CONCURRENCY_LIMITER", "true").lower() not in ("1", "true", "yes"):
+        return None
+    return AdaptiveConcurrencyLimiter(
+        "gemini",
+        initial_limit=float(os.getenv("LLM_CONCURRENCY_INITIAL", "8")),
+        min_limit=float(os.getenv("LLM_CONCURRENCY_MIN", "1")),
+        max_limit=float(os.getenv("LLM_CONCURRENCY_MAX", "64")),
+        decrease_factor=float(os.getenv("LLM_CONCURRENCY_DECREASE", "0.5")),
+        max_queue=int(os.getenv("LLM_CONCURRENCY_QUEUE", "100")),
+        queue_timeout=float(os.getenv("LLM_CONCURRENCY_QUEUE_TIMEOUT", "10")),
+        starvation_seconds=float(os.getenv("LLM_PRIORITY_MAX_WAIT_SECONDS", "5")),
+        background_queue_share=float(os.getenv("LLM_PRIORITY_BACKGROUND_QUEUE_SHARE", "0.5"))
+    )
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List
+from datetime import datetime
+from dotenv import load_dotenv
+from utils.llm_providers import estimate_tokens
+from utils.semantic_cache import normalize_question
+
+load_dotenv()
+
+# Recent question/answer turns kept verbatim per user
+MEMORY_MAX_TURNS = int(os.getenv("MENTOR_MEMORY_TURNS", "6"))
+# Verbatim turns are folded into the summary (oldest first) while they exceed this many tokens
+MEMORY_TOKEN_BUDGET = int(os.getenv("MENTOR_MEMORY_TOKEN_BUDGET", "800"))
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MENTOR_MEMORY_SUMMARY_TOKENS", "120"))
+MEMORY_MAX_USERS = int(os.getenv("MENTOR_MEMORY_MAX_USERS", "10000"))
+# Conversations idle this long are forgotten
+MEMORY_TTL_SECONDS = float(os.getenv("MENTOR_MEMORY_TTL_SECONDS", "1800"))
+
+# Context keys owned by the memory; client-sent values are replaced
+_MEMORY_KEYS = ("conversation_summary", "conversation_history")
+
+def _clip(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars - 3].rstrip() + "..."
+
+class _Conversation:
+    """Ring buffer of recent turns plus a running summary of the folded-out ones"""
+
+    def __init__(self):
+        self.turns: deque = deque()
+        self.turn_tokens = 0
+        self.topics: deque = deque()
+        self.summary_tokens = 0
+        self.total_turns = 0
+        self.last_seen = time.monotonic()
+
+class ConversationMemory:
+    """
+    Server-side mentor conversation memory per user.
+
+    The last few turns are kept verbatim. When they exceed MENTOR_MEMORY_TURNS or the token
+    budget, the oldest are folded into a running summary of the topics asked about (itself
+    capped at MENTOR_MEMORY_SUMMARY_TOKENS, dropping the oldest topics), so the context
+    handed to the prompt stays the same size however long the conversation runs.
+    Conversations are kept in LRU order and dropped after MENTOR_MEMORY_TTL_SECONDS idle.
+    """
+
+    def __init__(self, max_turns: int = MEMORY_MAX_TURNS, token_budget: int = MEMORY_TOKEN_BUDGET,
+                 summary_tokens: int = MEMORY_SUMMARY_TOKENS, max_users: int = MEMORY_MAX_USERS,
+                 ttl_seconds: float = MEMORY_TTL_SECONDS):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._context_tokens = deque(maxlen=1000)
+        self.stats = {
+            "turns_recorded": 0,
+            "turns_folded": 0,
+            "topics_dropped": 0,
+            "seeded_from_client": 0,
+            "evicted_lru": 0,
+            "evicted_idle": 0
+        }
+
+    def _expire(self, now: float):
+        # LRU order is also idle order, so expired conversations sit at the front
+        while self._conversations:
+            user_id, conversation = next(iter(self._conversations.items()))
+            if now - conversation.last_seen <= self.ttl_seconds:
+                break
+            del self._conversations[user_id]
+            self.stats["evicted_idle"] += 1
+
+    def _get(self, user_id: str, create: bool) -> _Conversation:
+        now = time.monotonic()
+        self._expire(now)
+        conversation = self._conversations.get(user_id)
+        if conversation is None:
+            if not create:
+                return None
+            conversation = self._conversations[user_id] = _Conversation()
+            while len(self._conversations) > self.max_users:
+                self._conversations.popitem(last=False)
+                self.stats["evicted_lru"] += 1
+        self._conversations.move_to_end(user_id)
+        conversation.last_seen = now
+        return conversation
+
+    def _append(self, conversation: _Conversation, question: str, answer: str):
+        # A single turn may use at most half the budget, so at least two always fit
+        turn = (_clip(question, self.token_budget // 4), _clip(answer, self.token_budget // 4))
+        conversation.turns.append(turn)
+        conversation.turn_tokens += estimate_tokens(turn[0]) + estimate_tokens(turn[1])
+        conversation.total_turns += 1
+        while len(conversation.turns) > 1 and (
+            len(conversation.turns) > self.max_turns or conversation.turn_tokens > self.token_budget
+        ):
+            self._fold(conversation, conversation.turns.popleft())
+
+    def _fold(self, conversation: _Conversation, turn):
+        question, answer = turn
+        conversation.turn_tokens -= estimate_tokens(question) + estimate_tokens(answer)
+        topic = _clip(normalize_question(question, stem=False) or question, 15)
+        conversation.topics.append(topic)
+        conversation.summary_tokens += estimate_tokens(topic) + 1
+        self.stats["turns_folded"] += 1
+        while len(conversation.topics) > 1 and conversation.summary_tokens > self.summary_tokens:
+            conversation.summary_tokens -= estimate_tokens(conversation.topics.popleft()) + 1
+            self.stats["topics_dropped"] += 1
+
+    def record_turn(self, user_id: str, question: str, answer: str):
+        """Remember one answered question"""
+        with self._lock:
+            conversation = self._get(user_id, create=True)
+            self._append(conversation, question, answer or "")
+            self.stats["turns_recorded"] += 1
+
+    def build_context(self, user_id: str, context: Dict = None) -> Dict:
+        """
+        The client's context with the server-side summary and recent turns in place of any
+        client-sent history. A client history only seeds a conversation the server does not
+        know yet (e.g. after a restart). conversation_history stays the last key, which the
+        prompt grounding relies on to find the latest turn.
+        """
+        context = dict(context or {})
+        client_history = context.pop("conversation_history", None)
+        context.pop("conversation_summary", None)
+
+        with self._lock:
+            conversation = self._get(user_id, create=False)
+            if conversation is None and isinstance(client_history, list) and client_history:
+                conversation = self._get(user_id, create=True)
+                self._seed(conversation, client_history)
+                self.stats["seeded_from_client"] += 1
+            if conversation is None:
+                return context
+
+            history: List[Dict] = []
+            for question, answer in conversation.turns:
+                history.append({"role": "user", "text": question})
+                history.append({"role": "mentor", "text": answer})
+            if conversation.topics:
+                context["conversation_summary"] = "Earlier the user asked about: " + "; ".join(conversation.topics)
+            if history:
+                context["conversation_history"] = history
+            self._context_tokens.append(conversation.turn_tokens + conversation.summary_tokens)
+        return context
+
+    def _seed(self, conversation: _Conversation, client_history: List):
+        question = None
+        for turn in client_history:
+            if not isinstance(turn, dict):
+                continue
+            if turn.get("role") == "user":
+                question = str(turn.get("text", ""))
+            elif question is not None:
+                self._append(conversation, question, str(turn.get("text", "")))
+                question = None
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._conversations.pop(user_id, None)
+
+    def get_report(self) -> Dict:
+        """Conversations held, folding/eviction counts and the memory context size sent per prompt"""
+        with self._lock:
+            stats = dict(self.stats)
+            conversations = len(self._conversations)
+            held_turns = sum(len(conversation.turns) for conversation in self._conversations.values())
+            longest = max((conversation.total_turns for conversation in self._conversations.values()), default=0)
+            context_tokens = list(self._context_tokens)
+        return {
+            "max_turns": self.max_turns,
+            "token_budget": self.token_budget,
+            "summary_tokens": self.summary_tokens,
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl_seconds,
+            "conversations": conversations,
+            "turns_held": held_turns,
+            "longest_conversation_turns": longest,
+            **stats,
+            "context_tokens": {
+                "mean": round(sum(context_tokens) / len(context_tokens), 1) if context_tokens else 0.0,
+                "max": max(context_tokens, default=0)
+            },
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global mentor conversation memory instance
+conversation_memory = ConversationMemory()
@@ -0,0 +1,278 @@
+import os
+import asyncio
+import json
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from utils.llm_client import llm_client
+from utils.llm_metrics import fallback_reason, llm_metrics
+from utils.llm_priority import llm_priority
+from utils.prompt_registry import prompt_registry
+from utils.latency_slo import cache_key, latency_slos
+from utils.model_router import expect_json_object
+from utils.semantic_cache import PARTITION_SKILLS
+
+load_dotenv()
+
+# Skills that get a tip precomputed every day; unlisted skills are generated on first request
+DAILY_TIP_SKILLS = [
+    skill.strip().lower() for skill in os.getenv("DAILY_TIP_SKILLS", ",".join(PARTITION_SKILLS)).split(",") if skill.strip()
+]
+# Most requested multi-skill combinations from the previous day that are precomputed too
+DAILY_TIP_COMBINATIONS = int(os.getenv("DAILY_TIP_COMBINATIONS", "20"))
+DAILY_TIP_PRECOMPUTE_CONCURRENCY = int(os.getenv("DAILY_TIP_PRECOMPUTE_CONCURRENCY", "4"))
+# Distinct combinations counted per day, so odd client input cannot grow the counter without bound
+_MAX_TRACKED_COMBINATIONS = 10000
+
+def canonical_skills(skills: List[str]) -> Tuple[str, ...]:
+    """Sorted, lowercased, de-duplicated skill set; the cache key for a tip"""
+    return tuple(sorted({skill.strip().lower() for skill in skills if skill and skill.strip()}))
+
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+def _stable_index(size: int, *parts: str) -> int:
+    """Same index all day for the same inputs, in every worker process (unlike hash())"""
+    return zlib.crc32("|".join(parts).encode()) % size
+
+def fallback_tip(skills: List[str], user_id: str = "") -> Dict:
+    """Template tip, chosen per user and day so it does not change on refresh"""
+    skill = skills[_stable_index(len(skills), user_id, _today())] if skills else "programming"
+
+    tips = [
+        {
+            "tip": f"Practice {skill} for at least 30 minutes today",
+            "skill_focus": skill,
+            "difficulty": "beginner",
+            "practice_exercise": f"Write a simple {skill} program",
+            "motivation": "Consistency is key to mastering any skill!"
+        },
+        {
+            "tip": f"Review {skill} concepts you learned yesterday",
+            "skill_focus": skill,
+            "difficulty": "intermediate",
+            "practice_exercise": f"Debug a {skill} code snippet",
+            "motivation": "Repetition helps solidify your knowledge!"
+        },
+        {
+            "tip": f"Teach someone else about {skill}",
+            "skill_focus": skill,
+            "difficulty": "advanced",
+            "practice_exercise": f"Create a {skill} tutorial",
+            "motivation": "Teaching is the best way to learn!"
+        }
+    ]
+    return tips[_stable_index(len(tips), user_id, skill, _today())]
+
+async def generate_tip(skills: Tuple[str, ...]) -> Dict:
+    """Gemini daily tip; raises on failure instead of falling back"""
+    prompt, prompt_version = prompt_registry.render("daily_tip", skills=list(skills))
+    result_text = await llm_client.generate(prompt, call_site="daily_tip", prompt_version=prompt_version,
+                                            validate=expect_json_object)
+    json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+    if not json_match:
+        raise ValueError("No JSON object in daily tip response")
+    return json.loads(json_match.group())
+
+class DailyTipService:
+    """
+    Daily tips precomputed once per day by a background job, for every canonical skill and
+    the skill combinations most requested the day before, and served from memory.
+
+    A request for a precomputed skill set is a dict lookup. Otherwise the user gets the
+    precomputed tip of one of their skills (picked stably per user and day), and only a
+    request naming no precomputed skill generates a tip on demand, which is then kept for
+    the rest of the day. Everything is keyed by date, so the tip changes once a day.
+    """
+
+    def __init__(self, skills: List[str] = None, combinations: int = DAILY_TIP_COMBINATIONS,
+                 concurrency: int = DAILY_TIP_PRECOMPUTE_CONCURRENCY):
+        self.skills = list(skills if skills is not None else DAILY_TIP_SKILLS)
+        self.combinations = combinations
+        self.concurrency = concurrency
+        self._date = _today()
+        self._tips: Dict[Tuple[str, ...], Dict] = {}
+        self._requested = Counter()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Dict = {}
+        self.stats = {
+            "requests": 0,
+            "served_exact": 0,
+            "served_single_skill": 0,
+            "generated_on_demand": 0,
+            "fallbacks": 0,
+            "precompute_runs": 0
+        }
+
+    def _roll_over(self):
+        """Start a new day: yesterday's tips are dropped (caller holds the lock)"""
+        today = _today()
+        if today != self._date:
+            self._date = today
+            self._tips = {}
+
+    def _lookup(self, user_id: str, skills: Tuple[str, ...]) -> Tuple[Optional[Dict], str]:
+        with self._lock:
+            self._roll_over()
+            self.stats["requests"] += 1
+            if len(skills) > 1 and (skills in self._requested or len(self._requested) < _MAX_TRACKED_COMBINATIONS):
+                self._requested[skills] += 1
+            tip = self._tips.get(skills)
+            if tip:
+                self.stats["served_exact"] += 1
+                return tip, "precomputed"
+            covered = [skill for skill in skills if (skill,) in self._tips]
+            if covered:
+                self.stats["served_single_skill"] += 1
+                return self._tips[(covered[_stable_index(len(covered), user_id, self._date)],)], "precomputed"
+        return None, ""
+
+    async def get_tip(self, user_id: str, current_skills: List[str]) -> Dict:
+        """Today's tip for the user's skills"""
+        skills = canonical_skills(current_skills)
+        tip, served_by = self._lookup(user_id, skills)
+        if tip:
+            return {**tip, "served_by": served_by}
+
+        if not llm_client.is_available():
+            llm_metrics.record_fallback("daily_tip", "unavailable")
+            with self._lock:
+                self.stats["fallbacks"] += 1
+            return fallback_tip(list(skills), user_id)
+
+        # Latency-SLO mode: race Gemini against the local tip
+        hedge = latency_slos.get("daily_tip")
+        if hedge:
+            tip, served_by = await hedge.run(
+                cache_key(self._date, list(skills)),
+                lambda: generate_tip(skills),
+                lambda: fallback_tip(list(skills), user_id)
+            )
+            if served_by in ("llm", "cache"):
+                # Kept for the rest of the day, so later requests for these skills skip the hedge
+                self._store(skills, tip, on_demand=served_by == "llm")
+            else:
+                # The hedge has already recorded the fallback in llm_metrics under "daily_tip"
+                with self._lock:
+                    self.stats["fallbacks"] += 1
+            return {**tip, "served_by": served_by}
+
+        try:
+            tip = await generate_tip(skills)
+        except Exception as e:
+            print(f"❌ Failed to generate daily tip: {e}")
+            llm_metrics.record_fallback("daily_tip", fallback_reason(e))
+            with self._lock:
+                self.stats["fallbacks"] += 1
+            return fallback_tip(list(skills), user_id)
+        self._store(skills, tip, on_demand=True)
+        return {**tip, "served_by": "llm"}
+
+    def _store(self, skills: Tuple[str, ...], tip: Dict, on_demand: bool = False, date: str = None):
+        with self._lock:
+            self._roll_over()
+            if (date or self._date) != self._date:
+                return
+            self._tips[skills] = tip
+            if on_demand:
+                self.stats["generated_on_demand"] += 1
+
+    async def precompute(self) -> Dict:
+        """Generate today's tips for every configured skill and yesterday's top combinations"""
+        date = _today()
+        with self._lock:
+            self._roll_over()
+            top_combinations = [skills for skills, _ in self._requested.most_common(self.combinations)]
+            self._requested = Counter()
+            pending = [(skill,) for skill in self.skills] + top_combinations
+            pending = [skills for skills in dict.fromkeys(pending) if skills not in self._tips]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failures = []
+
+        async def generate(skills: Tuple[str, ...]):
+            async with semaphore:
+                try:
+                    self._store(skills, await generate_tip(skills), date=date)
+                except Exception as e:
+                    failures.append(skills)
+                    print(f"⚠️ Daily tip precompute failed for {', '.join(skills)}: {e}")
+
+        started = time.monotonic()
+        # Precomputation must never delay interactive LLM calls
+        with llm_priority("background"):
+            await asyncio.gather(*(generate(skills) for skills in pending))
+        duration = time.monotonic() - started
+
+        run = {
+            "date": date,
+            "requested": len(pending),
+            "generated": len(pending) - len(failures),
+            "failed": len(failures),
+            "combinations": len(top_combinations),
+            "duration_ms": round(duration * 1000, 1),
+            "mean_tip_ms": round(duration * 1000 / max(len(pending), 1), 1),
+            "finished_at": datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            self.last_run = run
+            self.stats["precompute_runs"] += 1
+        print(f"💡 Daily tips precomputed: {run['generated']}/{run['requested']} in {run['duration_ms']}ms")
+        return run
+
+    async def _run_daily(self):
+        while True:
+            if llm_client.is_available():
+                try:
+                    await self.precompute()
+                except Exception as e:
+                    print(f"❌ Daily tip precompute error: {e}")
+            now = datetime.utcnow()
+            next_day = datetime(now.year, now.month, now.day) + timedelta(days=1)
+            await asyncio.sleep((next_day - now).total_seconds() + 1)
+
+    def start(self):
+        """Start the once-a-day precompute job on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_daily())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_report(self) -> Dict:
+        """Tip cache size, how requests were served and the last precompute run"""
+        with self._lock:
+            self._roll_over()
+            stats = dict(self.stats)
+            cached = len(self._tips)
+            cached_bytes = sum(len(json.dumps(tip)) for tip in self._tips.values())
+            tracked = len(self._requested)
+            last_run = dict(self.last_run)
+        return {
+            "date": self._date,
+            "configured_skills": len(self.skills),
+            "cached_tips": cached,
+            "cached_bytes": cached_bytes,
+            "tracked_combinations": tracked,
+            **stats,
+            "precomputed_hit_rate": round(
+                (stats["served_exact"] + stats["served_single_skill"]) / max(stats["requests"], 1), 4
+            ),
+            "last_run": last_run,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global daily tip service instance
+daily_tip_service = DailyTipService()
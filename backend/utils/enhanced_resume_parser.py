@@ -1,22 +1,27 @@
-import google.generativeai as genai
-import os
 from typing import Dict, List, Optional
 from datetime import datetime
 import json
 from PyPDF2 import PdfReader
 import re
 from dotenv import load_dotenv
+from utils.llm_client import llm_client
+from utils.llm_metrics import fallback_reason, llm_metrics
+from utils.model_router import expect_json_document
+from utils.prompt_registry import prompt_registry
+from utils.request_deadline import check_deadline
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 class EnhancedResumeParser:
     def __init__(self):
-        self.model = genai.GenerativeModel("gemini-pro")
+        self.llm = llm_client
         
     def parse_resume(self, file_obj) -> Dict:
         """Enhanced resume parsing using Gemini AI"""
         
+        # Skip the work entirely if the request was abandoned before this thread started
+        check_deadline("resume parsing")
+        
         # Extract text from PDF
         text = self._extract_text_from_pdf(file_obj)
         
@@ -48,71 +53,19 @@ class EnhancedResumeParser:
     def _analyze_resume_with_ai(self, resume_text: str) -> Dict:
         """Use Gemini AI to analyze resume content"""
         
-        # Check if API key is configured
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key or api_key == "your_gemini_api_key_here":
-            print("⚠️ GEMINI_API_KEY not configured. Using fallback skill extraction.")
+        # Skip straight to the fallback when Gemini is not configured or its circuit breaker is open
+        if not self.llm.is_available():
+            print("⚠️ Gemini unavailable (not configured or circuit open). Using fallback skill extraction.")
+            llm_metrics.record_fallback("resume_analysis", "unavailable")
             return self._fallback_skill_extraction(resume_text)
         
-        prompt = f"""Analyze the following resume and extract comprehensive information:
-
-Resume Text:
-{resume_text[:4000]}  # Limit text to avoid token limits
-
-Please provide analysis in the following JSON format:
-{{
-    "extracted_skills": ["skill1", "skill2", "skill3"],
-    "experience_level": "entry/mid/senior",
-    "years_of_experience": 3,
-    "education": [
-        {{
-            "degree": "Bachelor of Science",
-            "field": "Computer Science",
-            "institution": "University Name",
-            "year": 2020
-        }}
-    ],
-    "projects": [
-        {{
-            "name": "Project Name",
-            "description": "Brief description",
-            "technologies": ["tech1", "tech2"],
-            "impact": "What was accomplished"
-        }}
-    ],
-    "certifications": ["cert1", "cert2"],
-    "skill_categories": {{
-        "programming_languages": ["Python", "JavaScript"],
-        "frameworks": ["React", "Django"],
-        "databases": ["PostgreSQL", "MongoDB"],
-        "tools": ["Git", "Docker"],
-        "soft_skills": ["Leadership", "Communication"]
-    }},
-    "career_summary": "Brief summary of career background and goals",
-    "recommended_learning_path": [
-        {{
-            "skill": "skill_name",
-            "priority": "high/medium/low",
-            "reason": "Why this skill is recommended"
-        }}
-    ]
-}}
-
-Focus on:
-1. Technical skills (programming languages, frameworks, tools)
-2. Experience level and years of experience
-3. Education and certifications
-4. Notable projects and their impact
-5. Skill categorization for better learning recommendations
-6. Career summary and learning path suggestions
-
-Be thorough but accurate. If information is not available, use empty arrays or appropriate defaults.
-"""
+        # Limit text to avoid token limits
+        prompt, prompt_version = prompt_registry.render("resume_analysis", resume_text=resume_text[:4000])
         
         try:
             print("🤖 Using Gemini AI for resume analysis...")
-            response = self.model.generate_content(prompt)
-            response_text = response.text
+            response_text = self.llm.generate_sync(prompt, call_site="resume_analysis", prompt_version=prompt_version,
+                                                   validate=expect_json_document)
             print(f"📄 AI Response: {response_text[:200]}...")
             
             # Extract JSON from response
@@ -131,6 +84,7 @@ Be thorough but accurate. If information is not available, use empty arrays or a
                 
         except Exception as e:
             print(f"❌ AI Analysis failed: {str(e)}. Using fallback extraction.")
+            llm_metrics.record_fallback("resume_analysis", fallback_reason(e))
             # Fallback to basic skill extraction
             return self._fallback_skill_extraction(resume_text)
     
@@ -242,40 +196,20 @@ Be thorough but accurate. If information is not available, use empty arrays or a
     def generate_skill_assessment_plan(self, extracted_skills: List[str], experience_level: str) -> Dict:
         """Generate assessment plan based on extracted skills"""
         
-        # Check if API key is configured
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key or api_key == "your_gemini_api_key_here":
-            print("⚠️ GEMINI_API_KEY not configured. Using fallback assessment plan.")
+        if not self.llm.is_available():
+            print("⚠️ Gemini unavailable (not configured or circuit open). Using fallback assessment plan.")
+            llm_metrics.record_fallback("assessment_plan", "unavailable")
             return self._fallback_assessment_plan(extracted_skills, experience_level)
         
-        prompt = f"""Based on the following skills and experience level, generate an assessment plan:
-
-Skills: {extracted_skills}
-Experience Level: {experience_level}
-
-Create an assessment plan in JSON format:
-{{
-    "assessment_plan": [
-        {{
-            "skill": "skill_name",
-            "difficulty": "beginner/intermediate/advanced",
-            "question_count": 5,
-            "focus_areas": ["area1", "area2"],
-            "estimated_duration": "15 minutes"
-        }}
-    ],
-    "total_questions": 25,
-    "estimated_total_duration": "75 minutes",
-    "skill_priorities": ["priority1", "priority2"],
-    "assessment_strategy": "Strategy description"
-}}
-
-Consider the experience level when determining question difficulty and focus areas.
-"""
+        prompt, prompt_version = prompt_registry.render(
+            "assessment_plan",
+            skills=extracted_skills,
+            experience_level=experience_level
+        )
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text
+            response_text = self.llm.generate_sync(prompt, call_site="assessment_plan", prompt_version=prompt_version,
+                                                   validate=expect_json_document)
             
             if "```json" in response_text:
                 json_start = response_text.find("```json") + 7
@@ -287,6 +221,7 @@ Consider the experience level when determining question difficulty and focus are
                 
         except Exception as e:
             print(f"❌ AI Assessment plan generation failed: {str(e)}. Using fallback.")
+            llm_metrics.record_fallback("assessment_plan", fallback_reason(e))
             return self._fallback_assessment_plan(extracted_skills, experience_level)
     
     def _fallback_assessment_plan(self, extracted_skills: List[str], experience_level: str) -> Dict:
@@ -0,0 +1,228 @@
+import os
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+from datetime import datetime
+from dotenv import load_dotenv
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_union
+from utils.knowledge_base import knowledge_base
+from utils.llm_metrics import LatencyHistogram
+from utils.user_activity_tracker import activity_tracker
+
+load_dotenv()
+
+MENTOR_INTENTS_PATH = os.getenv(
+    "MENTOR_INTENTS_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "mentor_intents.json")
+)
+# Probability the top platform intent needs before the question skips Gemini
+INTENT_THRESHOLD = float(os.getenv("MENTOR_INTENT_THRESHOLD", "0.55"))
+# Open-ended questions; everything else has a platform handler
+TECHNICAL_INTENT = "technical"
+
+def _reply(response: str, next_steps: list = None, resources: list = None) -> Dict:
+    return {
+        "response": response,
+        "resources": resources or [],
+        "next_steps": next_steps or [],
+        "confidence": "high"
+    }
+
+def _answer_streak(user_id: str) -> Dict:
+    streak = activity_tracker.get_learning_streak(user_id)
+    if not streak:
+        return _reply("You don't have an active streak yet. Any learning activity today starts one.",
+                      ["Complete a learning module or assessment today"])
+    days = "day" if streak == 1 else "days"
+    return _reply(f"You're on a {streak}-{days} learning streak. Keep it going with some activity today!",
+                  ["Spend 30 minutes on your current learning path"])
+
+def _answer_progress(user_id: str) -> Dict:
+    profile = activity_tracker.get_user_profile(user_id)
+    if "error" in profile:
+        return _reply("I don't see any activity for you yet. Upload your resume or take an assessment to get started.",
+                      ["Upload your resume", "Take a skill assessment"])
+    breakdown = profile["activity_breakdown"]
+    return _reply(
+        f"So far you have {profile['total_activities']} recorded activities: "
+        f"{breakdown.get('assessment_completed', 0)} assessments completed, "
+        f"{breakdown.get('module_completed', 0)} modules completed and "
+        f"{breakdown.get('mentor_question', 0)} questions to me. "
+        f"Your learning streak is {activity_tracker.get_learning_streak(user_id)} day(s).",
+        ["See GET /progress/{user_id}/overview for the full breakdown"]
+    )
+
+def _answer_assessment_results(user_id: str) -> Dict:
+    completed = [
+        activity for activity in activity_tracker.get_user_activities(user_id, 100)
+        if activity["activity_type"] == "assessment_completed"
+    ]
+    if not completed:
+        return _reply("You haven't completed an assessment yet.", ["Generate an assessment for your skills and submit it"])
+    details = completed[-1]["details"]
+    scores = details.get("skill_scores") or details.get("scores") or {}
+    summary = ", ".join(f"{skill} {score:.1f}/10" for skill, score in sorted(scores.items(), key=lambda x: -x[1]))
+    weak = details.get("weak_skills") or []
+    return _reply(
+        f"You've completed {len(completed)} assessment(s). Latest scores: {summary or 'not recorded'}."
+        + (f" Skills to focus on: {', '.join(weak)}." if weak else ""),
+        [f"Practice {skill}" for skill in weak[:3]] or ["Retake an assessment to track your progress"]
+    )
+
+def _answer_mentor_history(user_id: str) -> Dict:
+    questions = [
+        activity["details"].get("question", "")
+        for activity in activity_tracker.get_user_activities(user_id, 100)
+        if activity["activity_type"] == "mentor_question"
+    ]
+    if not questions:
+        return _reply("This is your first question to me.")
+    recent = "; ".join(f'"{question[:80]}"' for question in questions[-3:])
+    return _reply(f"You've asked me {len(questions)} question(s). Most recent: {recent}.")
+
+def _static(response: str, next_steps: list) -> Callable[[str], Dict]:
+    return lambda user_id: _reply(response, next_steps)
+
+# Platform intent -> handler(user_id) returning a mentor response
+INTENT_HANDLERS: Dict[str, Callable[[str], Dict]] = {
+    "streak": _answer_streak,
+    "progress_summary": _answer_progress,
+    "assessment_results": _answer_assessment_results,
+    "mentor_history": _answer_mentor_history,
+    "start_assessment": _static(
+        "Open Assessments and pick the skills to test: the platform generates questions for them "
+        "(POST /assessment/generate). Answer them and submit (POST /assessment/submit) to get your "
+        "skill scores and recommendations. You can retake an assessment at any time.",
+        ["Generate an assessment", "Submit your answers", "Review your strong and weak skills"]
+    ),
+    "learning_path_help": _static(
+        "Your learning path is generated from your skills and levels (POST /recommend/learning-path). "
+        "Each module can be marked complete (POST /recommend/module/complete), and the path adapts as "
+        "your assessment scores change.",
+        ["Generate your learning path", "Complete the first module"]
+    ),
+    "resume_help": _static(
+        "Upload your resume as a PDF or DOCX on the Resume page (POST /resume/process). It is analysed "
+        "for skills and experience, and an assessment plan is suggested from it. Upload again to update it.",
+        ["Upload your resume", "Review the extracted skills"]
+    ),
+    "hackathon_help": _static(
+        "Open hackathons are listed on the Hackathons page (GET /hackathon/list). Apply with POST "
+        "/hackathon/apply and, once accepted, submit your project with POST /hackathon/submit-project.",
+        ["Browse open hackathons", "Apply with your team"]
+    ),
+}
+
+class MentorIntentClassifier:
+    """
+    Routes mentor questions about the platform itself ("what's my streak", "how do I start an
+    assessment") to handlers that read activity_tracker, so only open-ended technical
+    questions reach the knowledge base and Gemini.
+
+    Linear model (logistic regression) over hashed word and character n-grams, trained at
+    startup from the seed file plus the knowledge-base questions as extra technical examples.
+    """
+
+    def __init__(self, seed_path: str = MENTOR_INTENTS_PATH, threshold: float = INTENT_THRESHOLD):
+        self.threshold = threshold
+        self.model = None
+        self.features = make_union(
+            HashingVectorizer(ngram_range=(1, 2), alternate_sign=False, n_features=2 ** 14),
+            HashingVectorizer(analyzer="char_wb", ngram_range=(3, 4), alternate_sign=False, n_features=2 ** 14)
+        )
+        self.examples = 0
+        self._lock = threading.Lock()
+        self._latency = LatencyHistogram()
+        self._counts = defaultdict(int)
+        self.stats = {"classified": 0, "llm_skipped": 0, "below_threshold": 0, "handler_errors": 0}
+
+        started = time.monotonic()
+        try:
+            self._train(seed_path)
+        except Exception as e:
+            print(f"⚠️ Mentor intent classifier unavailable: {e}")
+        self.train_ms = round((time.monotonic() - started) * 1000, 1)
+        if self.model is not None:
+            print(f"🧭 Mentor intent classifier: {self.examples} examples, {len(self.model.classes_)} intents ({self.train_ms}ms)")
+
+    def _train(self, seed_path: str):
+        with open(seed_path) as f:
+            seed = json.load(f)
+        texts, labels = [], []
+        for intent, examples in seed.items():
+            if intent != TECHNICAL_INTENT and intent not in INTENT_HANDLERS:
+                print(f"⚠️ Intent '{intent}' has no handler, skipping")
+                continue
+            texts.extend(examples)
+            labels.extend([intent] * len(examples))
+        for entry in knowledge_base.entries:
+            texts.append(entry["question"])
+            labels.append(TECHNICAL_INTENT)
+
+        self.model = LogisticRegression(C=10, max_iter=1000, class_weight="balanced")
+        self.model.fit(self.features.transform([text.lower() for text in texts]), labels)
+        self.examples = len(texts)
+
+    def classify(self, question: str) -> Tuple[str, float]:
+        """(intent, probability); TECHNICAL_INTENT when no platform intent is confident enough"""
+        if self.model is None or not question.strip():
+            return TECHNICAL_INTENT, 0.0
+        started = time.monotonic()
+        probabilities = self.model.predict_proba(self.features.transform([question.lower()]))[0]
+        best = int(probabilities.argmax())
+        intent, probability = str(self.model.classes_[best]), float(probabilities[best])
+        below_threshold = intent != TECHNICAL_INTENT and probability < self.threshold
+        if below_threshold:
+            intent = TECHNICAL_INTENT
+        with self._lock:
+            self._latency.observe((time.monotonic() - started) * 1000)
+            self.stats["classified"] += 1
+            self.stats["below_threshold"] += below_threshold
+            self._counts[intent] += 1
+        return intent, probability
+
+    def answer(self, user_id: str, question: str) -> Optional[Dict]:
+        """Platform answer for the question, or None when it should go to the LLM path"""
+        intent, probability = self.classify(question)
+        if intent == TECHNICAL_INTENT:
+            return None
+        try:
+            response = INTENT_HANDLERS[intent](user_id)
+        except Exception as e:
+            print(f"❌ Intent handler '{intent}' failed: {e}")
+            with self._lock:
+                self.stats["handler_errors"] += 1
+            return None
+        with self._lock:
+            self.stats["llm_skipped"] += 1
+        return {
+            **response,
+            "intent": intent,
+            "intent_probability": round(probability, 3),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    def get_report(self) -> Dict:
+        """Classification latency, intent mix and the share of questions that skipped the LLM"""
+        with self._lock:
+            stats = dict(self.stats)
+            latency = self._latency.to_dict()
+            intents = dict(self._counts)
+        latency.pop("buckets", None)
+        return {
+            "ready": self.model is not None,
+            "examples": self.examples,
+            "train_ms": self.train_ms,
+            "threshold": self.threshold,
+            **stats,
+            "llm_skip_rate": round(stats["llm_skipped"] / max(stats["classified"], 1), 4),
+            "intents": intents,
+            "classification_latency": latency,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global mentor intent classifier instance
+intent_classifier = MentorIntentClassifier()
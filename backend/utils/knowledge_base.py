@@ -0,0 +1,187 @@
+import os
+import hashlib
+import json
+import pickle
+import threading
+import time
+from typing import Dict, List, Tuple
+from datetime import datetime
+from dotenv import load_dotenv
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+from utils.llm_metrics import LatencyHistogram
+
+load_dotenv()
+
+KNOWLEDGE_BASE_PATH = os.getenv(
+    "MENTOR_KB_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "mentor_knowledge.json")
+)
+# Optional precomputed index; rebuilt (and rewritten) whenever the corpus changes
+KNOWLEDGE_INDEX_PATH = os.getenv("MENTOR_KB_INDEX_PATH", "")
+# Cosine similarity needed to answer locally without Gemini
+LOCAL_ANSWER_THRESHOLD = float(os.getenv("MENTOR_KB_ANSWER_THRESHOLD", "0.4"))
+# Snippets below this similarity are not worth sending to Gemini
+GROUNDING_MIN_SCORE = float(os.getenv("MENTOR_KB_GROUNDING_MIN_SCORE", "0.1"))
+GROUNDING_TOP_K = int(os.getenv("MENTOR_KB_TOP_K", "3"))
+
+def _flatten_context(context: Dict) -> List[str]:
+    """One snippet per context field, and one per conversation turn"""
+    snippets = []
+    for key, value in (context or {}).items():
+        if key == "conversation_history" and isinstance(value, list):
+            snippets.extend(f"{turn.get('role', 'user')}: {turn.get('text', '')}" for turn in value if isinstance(turn, dict))
+        elif isinstance(value, (dict, list)):
+            snippets.append(f"{key}: {json.dumps(value, separators=(',', ':'))}")
+        elif value not in (None, ""):
+            snippets.append(f"{key}: {value}")
+    return snippets
+
+class MentorKnowledgeBase:
+    """TF-IDF retrieval over the curated mentor FAQ corpus"""
+
+    def __init__(self, corpus_path: str = KNOWLEDGE_BASE_PATH, index_path: str = KNOWLEDGE_INDEX_PATH):
+        self.corpus_path = corpus_path
+        self.entries: List[Dict] = []
+        self.vectorizer = None
+        self.matrix = None
+        self.index_source = "empty"
+        self._lock = threading.Lock()
+        self._latency = {"local": LatencyHistogram(), "llm": LatencyHistogram()}
+        self.stats = {
+            "searches": 0,
+            "local_answers": 0,
+            "grounded_llm_answers": 0,
+            "grounding_snippets": 0,
+            "context_snippets_dropped": 0
+        }
+
+        started = time.monotonic()
+        try:
+            self._load(corpus_path, index_path)
+        except Exception as e:
+            print(f"⚠️ Mentor knowledge base unavailable: {e}")
+        self.build_ms = round((time.monotonic() - started) * 1000, 1)
+        if self.entries:
+            print(f"📚 Mentor knowledge base: {len(self.entries)} entries ({self.index_source}, {self.build_ms}ms)")
+
+    @staticmethod
+    def _title(entry: Dict) -> str:
+        return " ".join([entry["question"], " ".join(entry.get("keywords", [])), entry.get("skill", "")])
+
+    def _load(self, corpus_path: str, index_path: str):
+        with open(corpus_path, "rb") as f:
+            raw = f.read()
+        self.entries = json.loads(raw)
+        corpus_hash = hashlib.sha1(raw).hexdigest()
+
+        if index_path and os.path.exists(index_path):
+            with open(index_path, "rb") as f:
+                stored = pickle.load(f)
+            if stored.get("corpus_hash") == corpus_hash:
+                self.vectorizer, self.matrix = stored["vectorizer"], stored["matrix"]
+                self.index_source = "precomputed"
+                return
+
+        # The vocabulary covers the answers too (for scoring context snippets), but entries are
+        # matched on question + keywords only: long answers would dilute the similarity
+        titles = [self._title(entry) for entry in self.entries]
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, stop_words="english")
+        self.vectorizer.fit([f"{title} {entry['answer']}" for title, entry in zip(titles, self.entries)])
+        self.matrix = self.vectorizer.transform(titles)
+        self.index_source = "built"
+        if index_path:
+            with open(index_path, "wb") as f:
+                pickle.dump({"corpus_hash": corpus_hash, "vectorizer": self.vectorizer, "matrix": self.matrix}, f)
+
+    @property
+    def ready(self) -> bool:
+        return self.matrix is not None and bool(self.entries)
+
+    def search(self, query: str, top_k: int = GROUNDING_TOP_K) -> List[Tuple[Dict, float]]:
+        """
+        Best-matching entries with their cosine similarity, highest first. Similarity is
+        scaled by the share of the query's words the corpus knows: TF-IDF ignores unknown
+        words, so "closure in Rust" would otherwise match the JavaScript closure entry.
+        """
+        if not self.ready or not query.strip():
+            return []
+        with self._lock:
+            self.stats["searches"] += 1
+        words = [word for word in self.vectorizer.build_analyzer()(query) if " " not in word]
+        coverage = sum(word in self.vectorizer.vocabulary_ for word in words) / len(words) if words else 0.0
+        scores = linear_kernel(self.vectorizer.transform([query]), self.matrix).ravel() * coverage
+        best = scores.argsort()[::-1][:top_k]
+        return [(self.entries[i], float(scores[i])) for i in best if scores[i] > 0]
+
+    def local_answer(self, matches: List[Tuple[Dict, float]]) -> Dict:
+        """Answer from the top entry when it clears the threshold, else None"""
+        if not matches or matches[0][1] < LOCAL_ANSWER_THRESHOLD:
+            return None
+        entry, score = matches[0]
+        with self._lock:
+            self.stats["local_answers"] += 1
+        return {
+            "response": entry["answer"],
+            "resources": entry.get("resources", []),
+            "next_steps": entry.get("next_steps", []),
+            "confidence": "high",
+            "sources": [entry["id"]],
+            "match_score": round(score, 3),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    def grounding(self, question: str, matches: List[Tuple[Dict, float]], context: Dict = None,
+                  top_k: int = GROUNDING_TOP_K) -> str:
+        """
+        Prompt context made of the top-k relevant snippets: curated entries plus the
+        request's own context fields/turns that relate to the question. The latest
+        conversation turn is always kept so follow-up questions still make sense.
+        """
+        snippets = [f"[{entry['id']}] {entry['answer']}" for entry, score in matches[:top_k] if score >= GROUNDING_MIN_SCORE]
+
+        context_snippets = _flatten_context(context)
+        if context_snippets and self.ready:
+            scores = linear_kernel(self.vectorizer.transform([question]), self.vectorizer.transform(context_snippets)).ravel()
+            ranked = [i for i in scores.argsort()[::-1][:top_k] if scores[i] >= GROUNDING_MIN_SCORE]
+            # The chat session appends conversation_history last, so the final snippet is the latest turn
+            history = (context or {}).get("conversation_history")
+            if history and isinstance(history, list) and len(context_snippets) - 1 not in ranked:
+                ranked.append(len(context_snippets) - 1)
+            kept = [context_snippets[i] for i in sorted(ranked)]
+            snippets.extend(kept)
+            with self._lock:
+                self.stats["context_snippets_dropped"] += len(context_snippets) - len(kept)
+        elif context_snippets:
+            snippets.extend(context_snippets)
+
+        with self._lock:
+            self.stats["grounding_snippets"] += len(snippets)
+        return "\n".join(snippets) if snippets else "No additional context provided"
+
+    def record_latency(self, path: str, latency: float):
+        """path: "local" (answered from the corpus) or "llm" (grounded Gemini answer)"""
+        with self._lock:
+            self._latency[path].observe(latency * 1000)
+            if path == "llm":
+                self.stats["grounded_llm_answers"] += 1
+
+    def get_report(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            latency = {path: histogram.to_dict() for path, histogram in self._latency.items()}
+        answered = stats["local_answers"] + stats["grounded_llm_answers"]
+        for histogram in latency.values():
+            histogram.pop("buckets", None)
+        return {
+            "entries": len(self.entries),
+            "index_source": self.index_source,
+            "build_ms": self.build_ms,
+            "local_answer_threshold": LOCAL_ANSWER_THRESHOLD,
+            **stats,
+            "local_answer_rate": round(stats["local_answers"] / max(answered, 1), 4),
+            "latency": latency,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global mentor knowledge base instance
+knowledge_base = MentorKnowledgeBase()
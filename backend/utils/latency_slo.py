@@ -0,0 +1,145 @@
+import os
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from datetime import datetime
+from dotenv import load_dotenv
+from utils.llm_metrics import fallback_reason, llm_metrics
+from utils.request_deadline import remaining_budget
+
+load_dotenv()
+
+# Cache for LLM answers, including ones that arrived after their SLO
+SLO_CACHE_TTL_SECONDS = float(os.getenv("LATENCY_SLO_CACHE_TTL_SECONDS", "3600"))
+SLO_CACHE_MAX_ENTRIES = int(os.getenv("LATENCY_SLO_CACHE_MAX_ENTRIES", "1000"))
+
+def cache_key(*parts) -> str:
+    """Stable key from JSON-serializable parts (dict key order does not matter)"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class HedgedCall:
+    """Race an LLM-backed operation against its local fallback under a latency SLO"""
+
+    def __init__(self, call_site: str, slo_seconds: float,
+                 ttl_seconds: float = SLO_CACHE_TTL_SECONDS, max_entries: int = SLO_CACHE_MAX_ENTRIES):
+        self.call_site = call_site
+        self.slo_seconds = slo_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "llm_served": 0,
+            "cache_served": 0,
+            "fallback_served": 0,
+            "late_results_cached": 0,
+            "llm_errors": 0
+        }
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _cache_get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, key: str, value: Any):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _store_late_result(self, key: str, task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._count("llm_errors")
+            return
+        self._cache_put(key, task.result())
+        self._count("late_results_cached")
+
+    async def run(self, key: str, llm_call: Callable[[], Awaitable[Any]], fallback: Callable[[], Any]) -> Tuple[Any, str]:
+        """Return (result, served_by) where served_by is "cache", "llm" or "fallback"
+
+        llm_call must raise on failure rather than return its own fallback, so that
+        only genuine LLM answers are cached.
+        """
+        self._count("requests")
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._count("cache_served")
+            return cached, "cache"
+
+        task = asyncio.ensure_future(llm_call())
+        # The fallback is computed while the LLM call is in flight
+        fallback_result = fallback()
+
+        try:
+            # Shielded so a missed SLO does not cancel the call; its result still lands in the cache
+            remaining = remaining_budget()
+            wait = self.slo_seconds if remaining is None else min(self.slo_seconds, remaining)
+            result = await asyncio.wait_for(asyncio.shield(task), wait)
+        except asyncio.TimeoutError:
+            task.add_done_callback(lambda done: self._store_late_result(key, done))
+            self._count("fallback_served")
+            llm_metrics.record_fallback(self.call_site, "slo")
+            return fallback_result, "fallback"
+        except Exception as e:
+            print(f"❌ {self.call_site} failed within SLO: {e}")
+            self._count("llm_errors")
+            self._count("fallback_served")
+            llm_metrics.record_fallback(self.call_site, fallback_reason(e))
+            return fallback_result, "fallback"
+
+        self._cache_put(key, result)
+        self._count("llm_served")
+        return result, "llm"
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cache_entries"] = len(self._cache)
+        stats["slo_ms"] = round(self.slo_seconds * 1000)
+        stats["fallback_share"] = round(stats["fallback_served"] / max(stats["requests"], 1), 4)
+        return stats
+
+class LatencySLOs:
+    """Per-call-site hedging, configured by LATENCY_SLO_MS (sites not listed are not hedged)"""
+
+    def __init__(self, config: str = None):
+        # e.g. LATENCY_SLO_MS="mentor_answer=800,daily_tip=800,learning_path=1500"
+        config = os.getenv("LATENCY_SLO_MS", "") if config is None else config
+        self._calls: Dict[str, HedgedCall] = {}
+        for pair in config.split(","):
+            name, _, value = pair.partition("=")
+            if name.strip() and value.strip().isdigit() and int(value) > 0:
+                self._calls[name.strip()] = HedgedCall(name.strip(), int(value) / 1000)
+
+    def get(self, call_site: str) -> Optional[HedgedCall]:
+        return self._calls.get(call_site)
+
+    def get_report(self) -> Dict:
+        return {
+            "call_sites": {name: call.get_stats() for name, call in self._calls.items()},
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global latency SLO instance
+latency_slos = LatencySLOs()
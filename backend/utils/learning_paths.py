@@ -0,0 +1,331 @@
+import os
+import asyncio
+import copy
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from dotenv import load_dotenv
+from utils.llm_client import llm_client
+from utils.llm_metrics import LatencyHistogram, fallback_reason, llm_metrics
+from utils.prompt_registry import prompt_registry
+from utils.model_router import expect_json_object
+
+load_dotenv()
+
+LEARNING_PATH_FRAGMENT_CACHE_SIZE = int(os.getenv("LEARNING_PATH_FRAGMENT_CACHE_SIZE", "2000"))
+LEARNING_PATH_FRAGMENT_TTL_SECONDS = float(os.getenv("LEARNING_PATH_FRAGMENT_TTL_SECONDS", "604800"))
+
+NEXT_LEVEL = {"beginner": "intermediate", "intermediate": "advanced", "advanced": "expert"}
+# Weakest skills come first in the composed priority order
+_LEVEL_RANK = {"beginner": 0, "intermediate": 1, "advanced": 2}
+
+def fragment_key(skill: str, current_level: str) -> Tuple[str, str, str]:
+    """(skill, current_level, target_level), normalized; unknown levels count as beginner"""
+    level = (current_level or "").strip().lower()
+    level = level if level in NEXT_LEVEL else "beginner"
+    return skill.strip().lower(), level, NEXT_LEVEL[level]
+
+def fallback_fragment(skill: str, level: str) -> Dict:
+    """Template path section for one skill"""
+    if level == "beginner":
+        module = {
+            "title": f"Introduction to {skill}",
+            "description": f"Learn the basics of {skill}",
+            "duration": "1-2 weeks",
+            "resources": [f"{skill} documentation", "Online tutorials"],
+            "projects": [f"Simple {skill} project"],
+            "assessment": "Basic quiz"
+        }
+    elif level == "intermediate":
+        module = {
+            "title": f"Advanced {skill} Concepts",
+            "description": f"Deep dive into {skill}",
+            "duration": "2-3 weeks",
+            "resources": [f"Advanced {skill} courses", "Practice platforms"],
+            "projects": [f"Complex {skill} project"],
+            "assessment": "Project-based assessment"
+        }
+    else:
+        module = {
+            "title": f"Expert {skill} Mastery",
+            "description": f"Master {skill} at expert level",
+            "duration": "3-4 weeks",
+            "resources": [f"Expert {skill} resources", "Industry best practices"],
+            "projects": [f"Expert-level {skill} project"],
+            "assessment": "Expert evaluation"
+        }
+    return {"modules": [module], "estimated_completion": "4-6 weeks"}
+
+def _weeks(estimate: str) -> int:
+    """Upper bound in weeks of an estimate such as "3-4 weeks" or "2 months" (4 if unparseable)"""
+    numbers = [int(n) for n in re.findall(r"\d+", estimate or "")]
+    if not numbers:
+        return 4
+    return max(numbers) * (4 if "month" in estimate.lower() else 1)
+
+def priority_order(skills: List[str], skill_levels: Dict[str, str]) -> List[str]:
+    """Weakest skills first; request order breaks ties"""
+    return sorted(
+        dict.fromkeys(skills),
+        key=lambda skill: _LEVEL_RANK[fragment_key(skill, skill_levels.get(skill, "beginner"))[1]]
+    )
+
+def overall_timeline(learning_path: List[Dict]) -> str:
+    total_weeks = sum(_weeks(skill_path.get("estimated_completion", "")) for skill_path in learning_path)
+    return f"{total_weeks} weeks" if learning_path else "3-6 months"
+
+def compose_path(skills: List[str], skill_levels: Dict[str, str], fragments: Dict[Tuple[str, str, str], Dict]) -> Dict:
+    """Per-user path from per-skill fragments, in priority order"""
+    ordered = priority_order(skills, skill_levels)
+    learning_path = []
+    for skill in ordered:
+        key = fragment_key(skill, skill_levels.get(skill, "beginner"))
+        fragment = copy.deepcopy(fragments[key])
+        learning_path.append({
+            "skill": skill,
+            "current_level": key[1],
+            "target_level": key[2],
+            "modules": fragment.get("modules", []),
+            "estimated_completion": fragment.get("estimated_completion", "4-6 weeks")
+        })
+    return {
+        "learning_path": learning_path,
+        "overall_timeline": overall_timeline(learning_path),
+        "priority_order": ordered,
+        "success_metrics": ["Skill assessments", "Project completion", "Real-world application"]
+    }
+
+class LearningPathFragmentCache:
+    """
+    Learning paths assembled from per-(skill, current_level, target_level) fragments.
+
+    The section for "python, beginner -> intermediate" is the same for every learner, so
+    it is generated once and cached (LRU with a TTL); a user's path is composed from
+    cached fragments, and only the missing ones are generated, concurrently. A fragment
+    that cannot be generated falls back to the template section and is not cached.
+    """
+
+    def __init__(self, max_entries: int = LEARNING_PATH_FRAGMENT_CACHE_SIZE,
+                 ttl_seconds: float = LEARNING_PATH_FRAGMENT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._fragments: "OrderedDict[Tuple[str, str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._latency = {"warm": LatencyHistogram(), "cold": LatencyHistogram()}
+        self.stats = {"paths": 0, "hits": 0, "misses": 0, "generated": 0, "fallbacks": 0, "evictions": 0, "expired": 0}
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict]:
+        with self._lock:
+            entry = self._fragments.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            stored_at, fragment = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._fragments[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._fragments.move_to_end(key)
+            self.stats["hits"] += 1
+            return fragment
+
+    def put(self, key: Tuple[str, str, str], fragment: Dict):
+        with self._lock:
+            self._fragments[key] = (time.monotonic(), fragment)
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    async def _generate(self, key: Tuple[str, str, str]) -> Dict:
+        """Gemini fragment; raises on failure instead of falling back"""
+        skill, current_level, target_level = key
+        prompt, prompt_version = prompt_registry.render(
+            "learning_path_fragment", skill=skill, current_level=current_level, target_level=target_level
+        )
+        result_text = await llm_client.generate(prompt, call_site="learning_path", prompt_version=prompt_version,
+                                                validate=expect_json_object)
+        json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+        if not json_match:
+            raise ValueError("No JSON object in learning path fragment response")
+        fragment = json.loads(json_match.group())
+        if not isinstance(fragment.get("modules"), list) or not fragment["modules"]:
+            raise ValueError("Learning path fragment has no modules")
+        return fragment
+
+    async def _generate_and_store(self, key: Tuple[str, str, str]) -> Dict:
+        fragment = await self._generate(key)
+        self.put(key, fragment)
+        with self._lock:
+            self.stats["generated"] += 1
+        return fragment
+
+    async def _fragment_or_fallback(self, key: Tuple[str, str, str]) -> Tuple[Dict, bool]:
+        try:
+            fragment = await self._generate_and_store(key)
+        except Exception as e:
+            print(f"❌ Learning path fragment {key[0]}/{key[1]} failed: {e}")
+            llm_metrics.record_fallback("learning_path", fallback_reason(e))
+            with self._lock:
+                self.stats["fallbacks"] += 1
+            return fallback_fragment(key[0], key[1]), False
+        return fragment, True
+
+    async def build(self, skills: List[str], skill_levels: Dict[str, str], strict: bool = False) -> Dict:
+        """
+        Path for the skills: cached fragments plus the missing ones, generated concurrently.
+        With strict, a fragment that cannot be generated raises instead of falling back to
+        its template section (for HedgedCall, which must only see genuine LLM answers);
+        the fragments that did generate are still cached.
+        """
+        started = time.monotonic()
+        keys = list(dict.fromkeys(fragment_key(skill, skill_levels.get(skill, "beginner")) for skill in skills))
+        fragments = {key: self.get(key) for key in keys}
+        missing = [key for key, fragment in fragments.items() if fragment is None]
+
+        generated = 0
+        if missing:
+            if strict:
+                results = await asyncio.gather(*(self._generate_and_store(key) for key in missing), return_exceptions=True)
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    raise errors[0]
+                results = [(fragment, True) for fragment in results]
+            elif llm_client.is_available():
+                results = await asyncio.gather(*(self._fragment_or_fallback(key) for key in missing))
+            else:
+                llm_metrics.record_fallback("learning_path", "unavailable")
+                results = [(fallback_fragment(key[0], key[1]), False) for key in missing]
+            for key, (fragment, from_llm) in zip(missing, results):
+                fragments[key] = fragment
+                generated += from_llm
+
+        path = compose_path(skills, skill_levels, fragments)
+        with self._lock:
+            self.stats["paths"] += 1
+            self._latency["cold" if missing else "warm"].observe((time.monotonic() - started) * 1000)
+        return {
+            **path,
+            "fragments": {
+                "cached": len(keys) - len(missing),
+                "generated": generated,
+                "fallback": len(missing) - generated
+            }
+        }
+
+    def get_report(self) -> Dict:
+        """Fragment cache hit rate and path build latency with and without generation"""
+        with self._lock:
+            stats = dict(self.stats)
+            entries = len(self._fragments)
+            latency = {path: histogram.to_dict() for path, histogram in self._latency.items()}
+        for histogram in latency.values():
+            histogram.pop("buckets", None)
+        return {
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": entries,
+            **stats,
+            "hit_rate": round(stats["hits"] / max(stats["hits"] + stats["misses"], 1), 4),
+            "build_latency": latency,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+def _by_fragment_skill(skill_levels: Dict[str, str]) -> Dict[str, Tuple[str, str]]:
+    """{normalized skill: (skill as spelled, normalized level)}"""
+    keys = {}
+    for skill, level in skill_levels.items():
+        key_skill, key_level, _ = fragment_key(skill, level)
+        keys[key_skill] = (skill, key_level)
+    return keys
+
+def diff_skill_levels(previous: Dict[str, str], current: Dict[str, str]) -> Dict:
+    """
+    Skills added, removed, changed level or unchanged between two requests. Names and levels
+    are compared the way fragment_key normalizes them, so "Python" -> "python" is unchanged;
+    skills are reported as the current request spells them.
+    """
+    previous = _by_fragment_skill(previous)
+    current = _by_fragment_skill(current)
+    return {
+        "added": [skill for key, (skill, _) in current.items() if key not in previous],
+        "removed": [skill for key, (skill, _) in previous.items() if key not in current],
+        "level_changes": {
+            skill: {"from": previous[key][1], "to": level}
+            for key, (skill, level) in current.items() if key in previous and previous[key][1] != level
+        },
+        "unchanged": [skill for key, (skill, level) in current.items() if key in previous and previous[key][1] == level]
+    }
+
+def module_id(skill: str, current_level: str, generation: int, index: int) -> str:
+    """Module id from its fragment key and the path generation, so a regenerated module never reuses an old id"""
+    key_skill, level, target = fragment_key(skill, current_level)
+    return f"{key_skill}_{level}-{target}_g{generation}_{index}"
+
+class LearningPathStore:
+    """Each user's current (enhanced) learning path, so a new request only rebuilds what changed"""
+
+    def __init__(self):
+        self._paths: Dict[str, Dict] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"full_builds": 0, "incremental_builds": 0, "skills_regenerated": 0, "skills_reused": 0,
+                      "modules_completed": 0}
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        with self._lock:
+            stored = self._paths.get(user_id)
+            return copy.deepcopy(stored) if stored else None
+
+    def next_generation(self, user_id: str) -> int:
+        """Counter bumped for every path built for the user; part of each new module_id"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            return self._generations[user_id]
+
+    def save(self, user_id: str, path: Dict, skill_levels: Dict[str, str], preferences: Dict,
+             regenerated: int, reused: int):
+        with self._lock:
+            self._paths[user_id] = {
+                "path": copy.deepcopy(path),
+                "skill_levels": dict(skill_levels),
+                "preferences": dict(preferences),
+                "updated_at": datetime.utcnow().isoformat()
+            }
+            self.stats["incremental_builds" if reused else "full_builds"] += 1
+            self.stats["skills_regenerated"] += regenerated
+            self.stats["skills_reused"] += reused
+
+    def mark_module(self, user_id: str, module_id: str, status: str) -> bool:
+        """Record a module's completion status in the stored path; False if it is not in it"""
+        with self._lock:
+            stored = self._paths.get(user_id)
+            for skill_path in (stored or {}).get("path", {}).get("learning_path", []):
+                for module in skill_path.get("modules", []):
+                    if module.get("module_id") == module_id:
+                        module["completion_status"] = status
+                        self.stats["modules_completed"] += status == "completed"
+                        return True
+        return False
+
+    def get_report(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            users = len(self._paths)
+        skills = stats["skills_regenerated"] + stats["skills_reused"]
+        return {
+            "stored_paths": users,
+            **stats,
+            "skill_reuse_rate": round(stats["skills_reused"] / max(skills, 1), 4)
+        }
+
+# Global learning path fragment cache instance
+learning_path_fragments = LearningPathFragmentCache()
+
+# Global per-user learning path store instance
+learning_path_store = LearningPathStore()
@@ -0,0 +1,452 @@
+import os
+import asyncio
+import contextvars
+import functools
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+from datetime import datetime
+from dotenv import load_dotenv
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.concurrency_limiter import AdaptiveConcurrencyLimiter, ConcurrencyLimitExceeded, create_llm_limiter
+from utils.llm_providers import LLMProvider, LLMRateLimitError, LLMResponse, LLMTimeoutError, create_provider, estimate_tokens
+from utils.llm_metrics import llm_metrics
+from utils.llm_priority import current_priority
+from utils.model_router import model_router
+from utils.request_deadline import DeadlineExceeded, bounded_timeout, check_deadline, remaining_budget
+
+load_dotenv()
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+# Retries for rate-limited / timed-out calls (off by default: a retry doubles the wait before fallback)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "0"))
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5"))
+RETRYABLE_ERRORS = (LLMRateLimitError, LLMTimeoutError)
+# Worker threads for provider calls and stream reads; 0 sizes the pool to the concurrency limiter's maximum
+LLM_EXECUTOR_THREADS = int(os.getenv("LLM_EXECUTOR_THREADS", "0"))
+
+class _InFlightCall:
+    """Result slot shared by threads waiting on the same upstream call"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+class LLMClient:
+    """Shared LLM client; identical concurrent prompts share one upstream call"""
+
+    def __init__(self, provider: LLMProvider = None, limiter: AdaptiveConcurrencyLimiter = None):
+        self.provider = provider or create_provider()
+        # Adapts upstream concurrency to the quota (None when LLM_CONCURRENCY_LIMITER=false)
+        self.limiter = limiter if limiter is not None else create_llm_limiter()
+        if not self.enabled:
+            print("⚠️ GEMINI_API_KEY not configured. LLM calls will use fallback paths.")
+        # Own pool, so LLM calls never wait behind (or starve) other asyncio.to_thread work such as resume parsing.
+        # Slot waits happen on the event loop, so every thread here is running a call that holds a slot.
+        threads = LLM_EXECUTOR_THREADS or (int(self.limiter.max_limit) if self.limiter is not None else 32)
+        self._executor = ThreadPoolExecutor(max_workers=max(threads, 1), thread_name_prefix="llm")
+
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._inflight_sync: Dict[str, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self.breaker = CircuitBreaker(
+            "gemini",
+            window_size=int(os.getenv("LLM_BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")),
+            failure_rate_threshold=float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5")),
+            slow_call_seconds=float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "10")),
+            slow_call_rate_threshold=float(os.getenv("LLM_BREAKER_SLOW_CALL_RATE", "0.8")),
+            open_seconds=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+        )
+        self.stats = {
+            "requests": 0,
+            "upstream_calls": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "shed": 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.provider.enabled
+
+    @staticmethod
+    def _flight_key(prompt: str, model_name: str) -> str:
+        """Key identical prompts regardless of indentation/whitespace differences"""
+        normalized = re.sub(r"\s+", " ", prompt).strip()
+        return hashlib.sha1(f"{model_name}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _admit(self):
+        """Fail fast while the breaker is open so callers drop straight to their fallback"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Gemini circuit breaker is open")
+
+    async def _in_thread(self, func: Callable, *args):
+        """Run a blocking call on the LLM pool, carrying the caller's deadline and priority"""
+        context = contextvars.copy_context()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(context.run, func, *args))
+        # Once submitted the call runs even if the caller is cancelled: it may own a limiter slot and a half-open
+        # probe that only it releases. Its error is then retrieved here rather than logged as never retrieved.
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(future)
+
+    def _shed(self, call_site: str, started: float, retries: int, prompt_version: str = None):
+        # Shed locally; the provider never saw the call, so the breaker learns nothing from it
+        self.breaker.record_ignored()
+        with self._lock:
+            self.stats["shed"] += 1
+        llm_metrics.record_call(call_site, time.monotonic() - started, retries=retries, error=True, prompt_version=prompt_version)
+
+    def _acquire_slot(self, priority: str) -> Optional[float]:
+        """Wait for a limiter slot in the caller's priority class, no longer than the request has left (blocking)"""
+        if self.limiter is None:
+            return None
+        return self.limiter.acquire(remaining_budget(), priority)
+
+    async def _acquire_slot_async(self, priority: str) -> Optional[float]:
+        """_acquire_slot() waiting on the event loop, so a queued call holds no thread"""
+        if self.limiter is None:
+            return None
+        return await self.limiter.acquire_async(remaining_budget(), priority)
+
+    def _release_slot(self, acquired_at: Optional[float], error: Optional[Exception], timeout: float, priority: str):
+        if acquired_at is None:
+            return
+        if error is None:
+            outcome = "success"
+        elif isinstance(error, LLMRateLimitError) or (isinstance(error, LLMTimeoutError) and timeout >= LLM_TIMEOUT_SECONDS):
+            outcome = "overload"
+        else:
+            # Parse failures, deadline cuts and the like say nothing about upstream capacity
+            outcome = "ignore"
+        self.limiter.release(acquired_at, outcome, priority)
+
+    def _record_failure(self, error: Exception, timeout: float):
+        """Report a failed call to the breaker; cuts by the request deadline are not upstream trouble"""
+        if isinstance(error, DeadlineExceeded) or (isinstance(error, LLMTimeoutError) and timeout < LLM_TIMEOUT_SECONDS):
+            self.breaker.record_ignored()
+        else:
+            self.breaker.record_failure(error)
+
+    def _attempt(self, prompt: str, model_name: str, call_site: str, priority: str, acquired_at: Optional[float],
+                 timeout: float) -> LLMResponse:
+        """One blocking provider call in an acquired slot, reported to the limiter and breaker"""
+        with self._lock:
+            self.stats["upstream_calls"] += 1
+        attempt_started = time.monotonic()
+        try:
+            if acquired_at is not None:
+                # Time spent queued for a slot comes out of the provider's timeout
+                timeout = bounded_timeout(LLM_TIMEOUT_SECONDS, call_site)
+            result = self.provider.generate(prompt, model_name, timeout)
+        except Exception as e:
+            self._release_slot(acquired_at, e, timeout, priority)
+            with self._lock:
+                self.stats["errors"] += 1
+            self._record_failure(e, timeout)
+            raise
+        self._release_slot(acquired_at, None, timeout, priority)
+        self.breaker.record_success(time.monotonic() - attempt_started)
+        return result
+
+    def _retry_backoff(self, error: Exception, retries: int) -> Optional[float]:
+        """Seconds to wait before retrying a failed attempt, or None to give up"""
+        backoff = LLM_RETRY_BACKOFF_SECONDS * 2 ** retries
+        if (retries < LLM_MAX_RETRIES and isinstance(error, RETRYABLE_ERRORS) and self.breaker.state == "closed"
+                and (remaining_budget() is None or remaining_budget() > backoff)):
+            return backoff
+        return None
+
+    @staticmethod
+    def _record_outcome(call_site: str, model_name: str, started: float, retries: int, prompt_version: str = None,
+                        result: LLMResponse = None):
+        elapsed = time.monotonic() - started
+        if result is None:
+            llm_metrics.record_call(call_site, elapsed, retries=retries, error=True, prompt_version=prompt_version)
+            model_router.record(call_site, model_name, elapsed, error=True)
+            return
+        llm_metrics.record_call(call_site, elapsed, result.prompt_tokens, result.response_tokens, retries,
+                                prompt_version=prompt_version)
+        model_router.record(call_site, model_name, elapsed, result.prompt_tokens, result.response_tokens)
+
+    def _call_upstream(self, prompt: str, model_name: str, call_site: str, prompt_version: str = None) -> str:
+        """Blocking provider call with optional retries, for synchronous callers"""
+        retries = 0
+        started = time.monotonic()
+        # Set by the route (PriorityMiddleware) or the caller (llm_priority); coalesced callers share the leader's
+        priority = current_priority()
+        # A half-open probe taken by _admit() is ours until the first attempt reports back
+        holds_probe = True
+        while True:
+            try:
+                # Only the remaining request budget is given to the provider
+                timeout = bounded_timeout(LLM_TIMEOUT_SECONDS, call_site)
+                acquired_at = self._acquire_slot(priority)
+            except ConcurrencyLimitExceeded:
+                self._shed(call_site, started, retries, prompt_version)
+                raise
+            except BaseException:
+                if holds_probe:
+                    self.breaker.record_ignored()
+                raise
+            holds_probe = False
+            try:
+                result = self._attempt(prompt, model_name, call_site, priority, acquired_at, timeout)
+            except Exception as e:
+                backoff = self._retry_backoff(e, retries)
+                if backoff is not None:
+                    retries += 1
+                    time.sleep(backoff)
+                    continue
+                self._record_outcome(call_site, model_name, started, retries, prompt_version)
+                raise
+            self._record_outcome(call_site, model_name, started, retries, prompt_version, result)
+            return result.text
+
+    async def _call_upstream_async(self, prompt: str, model_name: str, call_site: str, prompt_version: str = None) -> str:
+        """_call_upstream() for the event loop: the slot is awaited, only the provider call runs in a thread"""
+        retries = 0
+        started = time.monotonic()
+        priority = current_priority()
+        holds_probe = True
+        while True:
+            try:
+                timeout = bounded_timeout(LLM_TIMEOUT_SECONDS, call_site)
+                acquired_at = await self._acquire_slot_async(priority)
+            except ConcurrencyLimitExceeded:
+                self._shed(call_site, started, retries, prompt_version)
+                raise
+            except BaseException:
+                # Cancelled or out of budget before the attempt: nothing else will release the probe
+                if holds_probe:
+                    self.breaker.record_ignored()
+                raise
+            holds_probe = False
+            try:
+                result = await self._in_thread(self._attempt, prompt, model_name, call_site, priority, acquired_at, timeout)
+            except Exception as e:
+                backoff = self._retry_backoff(e, retries)
+                if backoff is not None:
+                    retries += 1
+                    await asyncio.sleep(backoff)
+                    continue
+                self._record_outcome(call_site, model_name, started, retries, prompt_version)
+                raise
+            self._record_outcome(call_site, model_name, started, retries, prompt_version, result)
+            return result.text
+
+    def is_available(self) -> bool:
+        """True when a call would actually be attempted (configured and breaker not open)"""
+        return self.enabled and self.breaker.state != "open"
+
+    @staticmethod
+    def _escalation_for(text: str, call_site: str, model_name: str, validate: Optional[Callable[[str], Any]]) -> Optional[str]:
+        """Large-tier model to retry on when a fast-tier answer fails validation, else None"""
+        escalation_model = model_router.escalation_model(call_site)
+        if validate is None or escalation_model is None or escalation_model == model_name:
+            return None
+        try:
+            validate(text)
+            return None
+        except ValueError as e:
+            print(f"⚠️ {call_site} answer from {model_name} failed validation ({e}); escalating to {escalation_model}")
+            model_router.record_escalation(call_site)
+            return escalation_model
+
+    async def generate(self, prompt: str, call_site: str = "general", model_name: str = None,
+                       prompt_version: str = None, validate: Callable[[str], Any] = None) -> str:
+        """
+        Generate text on the call site's routed model (unless model_name is given).
+        validate raises ValueError on an unusable answer; a fast-tier answer that fails it
+        is retried once on the large tier.
+        """
+        routed = model_name is None
+        if routed:
+            _, model_name = model_router.model_for(call_site)
+        text = await self._generate(prompt, call_site, model_name, prompt_version)
+        escalation_model = self._escalation_for(text, call_site, model_name, validate) if routed else None
+        if escalation_model is None:
+            return text
+        return await self._generate(prompt, call_site, escalation_model, prompt_version)
+
+    async def _generate(self, prompt: str, call_site: str, model_name: str, prompt_version: str = None) -> str:
+        """Generate text without blocking the event loop, joining an identical in-flight call if one exists"""
+
+        key = self._flight_key(prompt, model_name)
+        with self._lock:
+            self.stats["requests"] += 1
+            task = self._inflight.get(key)
+            if task is not None:
+                self.stats["coalesced"] += 1
+
+        if task is not None:
+            llm_metrics.record_coalesced(call_site)
+        else:
+            check_deadline(call_site)
+            self._admit()
+            # The upstream call is its own task, so a cancelled caller never cancels it for the others
+            task = asyncio.ensure_future(self._call_upstream_async(prompt, model_name, call_site, prompt_version))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+
+        # A caller with less budget than the shared call stops waiting without cancelling it
+        remaining = remaining_budget()
+        if remaining is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"Deadline exceeded waiting for {call_site}")
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def generate_sync(self, prompt: str, call_site: str = "general", model_name: str = None,
+                      prompt_version: str = None, validate: Callable[[str], Any] = None) -> str:
+        """Blocking variant of generate() for synchronous callers, with the same routing and escalation"""
+        routed = model_name is None
+        if routed:
+            _, model_name = model_router.model_for(call_site)
+        text = self._generate_sync(prompt, call_site, model_name, prompt_version)
+        escalation_model = self._escalation_for(text, call_site, model_name, validate) if routed else None
+        if escalation_model is None:
+            return text
+        return self._generate_sync(prompt, call_site, escalation_model, prompt_version)
+
+    def _generate_sync(self, prompt: str, call_site: str, model_name: str, prompt_version: str = None) -> str:
+        """Blocking generation with the same coalescing across threads"""
+
+        key = self._flight_key(prompt, model_name)
+        with self._lock:
+            self.stats["requests"] += 1
+            call = self._inflight_sync.get(key)
+            is_leader = call is None
+            if is_leader:
+                check_deadline(call_site)
+                self._admit()
+                call = _InFlightCall()
+                self._inflight_sync[key] = call
+            else:
+                self.stats["coalesced"] += 1
+
+        if not is_leader:
+            llm_metrics.record_coalesced(call_site)
+            if not call.done.wait(remaining_budget()):
+                raise DeadlineExceeded(f"Deadline exceeded waiting for {call_site}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._call_upstream(prompt, model_name, call_site, prompt_version)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight_sync.pop(key, None)
+            call.done.set()
+
+    @staticmethod
+    def _next_chunk(chunks: Iterator[str], read_lock: threading.Lock) -> Optional[str]:
+        with read_lock:
+            return next(chunks, None)
+
+    @staticmethod
+    def _close_stream(chunks: Iterator[str], read_lock: threading.Lock):
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            with read_lock:
+                close()
+
+    async def generate_stream(self, prompt: str, call_site: str = "general", model_name: str = None,
+                              prompt_version: str = None) -> AsyncIterator[str]:
+        """Stream text chunks off the event loop; streams are never coalesced or escalated"""
+
+        if model_name is None:
+            _, model_name = model_router.model_for(call_site)
+
+        with self._lock:
+            self.stats["requests"] += 1
+        timeout = bounded_timeout(LLM_TIMEOUT_SECONDS, call_site)
+        self._admit()
+        priority = current_priority()
+        try:
+            # A stream holds its slot until the last chunk, like any other upstream call
+            acquired_at = await self._acquire_slot_async(priority)
+        except ConcurrencyLimitExceeded:
+            self._shed(call_site, time.monotonic(), 0, prompt_version)
+            raise
+        except BaseException:
+            # Client gone or deadline hit while queued: hand back the half-open probe _admit() may have taken
+            self.breaker.record_ignored()
+            raise
+        with self._lock:
+            self.stats["upstream_calls"] += 1
+
+        started = time.monotonic()
+        first_chunk_latency = None
+        response_chars = 0
+        error = None
+        chunks = None
+        exhausted = False
+        read_lock = threading.Lock()
+        try:
+            # Provider streams are blocking iterators, so pull every chunk off the event loop
+            chunks = self.provider.stream(prompt, model_name, timeout)
+            while True:
+                text = await self._in_thread(self._next_chunk, chunks, read_lock)
+                if text is None:
+                    exhausted = True
+                    break
+                if first_chunk_latency is None:
+                    first_chunk_latency = time.monotonic() - started
+                response_chars += len(text)
+                yield text
+        except Exception as e:
+            error = e
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            # Also runs when the consumer stops early, so half-open probes and limiter slots are always released
+            if chunks is not None and not exhausted:
+                # Abandoned mid-stream: close the provider's iterator so it frees its connection. This must not
+                # block the loop and must wait for a read still running in the pool, hence the pool and the lock.
+                self._executor.submit(self._close_stream, chunks, read_lock)
+            self._release_slot(acquired_at, error, timeout, priority)
+            if error is not None:
+                self._record_failure(error, timeout)
+            else:
+                self.breaker.record_success(first_chunk_latency or time.monotonic() - started)
+            # Streams report no usage metadata chunk-by-chunk, so tokens are estimated
+            llm_metrics.record_call(
+                call_site, time.monotonic() - started,
+                0 if error else estimate_tokens(prompt), response_chars // 4, error=error is not None,
+                prompt_version=prompt_version
+            )
+            model_router.record(
+                call_site, model_name, time.monotonic() - started,
+                0 if error else estimate_tokens(prompt), response_chars // 4, error=error is not None
+            )
+
+    def get_stats(self) -> Dict:
+        """Coalescing counters for the admin dashboard"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._inflight) + len(self._inflight_sync)
+        stats["coalesced_ratio"] = round(stats["coalesced"] / max(stats["requests"], 1), 4)
+        stats["provider"] = self.provider.name
+        if isinstance(getattr(self.provider, "stats", None), dict):
+            stats["provider_stats"] = dict(self.provider.stats)
+        stats["timestamp"] = datetime.utcnow().isoformat()
+        return stats
+
+# Global LLM client instance
+llm_client = LLMClient()
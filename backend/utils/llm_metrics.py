@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List
+from datetime import datetime
+from utils.circuit_breaker import CircuitOpenError
+from utils.concurrency_limiter import ConcurrencyLimitExceeded
+from utils.request_deadline import DeadlineExceeded
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000]
+
+# Call sites every LLM call is tagged with
+CALL_SITES = [
+    "resume_analysis", "assessment_plan", "question_gen", "mentor_answer", "learning_path",
+    "daily_tip", "skill_analysis", "recommendations", "mentor_suggestions", "assessment_feedback"
+]
+
+def fallback_reason(error: Exception) -> str:
+    """Fallback reason for an exception raised on an LLM call path"""
+    if isinstance(error, DeadlineExceeded):
+        return "deadline"
+    if isinstance(error, CircuitOpenError):
+        return "unavailable"
+    if isinstance(error, ConcurrencyLimitExceeded):
+        return "overloaded"
+    if isinstance(error, ValueError):
+        # json.JSONDecodeError and "no JSON in response"
+        return "parse_error"
+    return "error"
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with interpolated percentiles"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, latency_ms: float):
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= target and bucket_count:
+                lower = LATENCY_BUCKETS_MS[i - 1] if i > 0 else 0
+                upper = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+                fraction = (target - cumulative) / bucket_count
+                return round(min(lower + (upper - lower) * fraction, self.max_ms), 1)
+            cumulative += bucket_count
+        return round(self.max_ms, 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "buckets": {
+                (f"le_{bound}ms" if i < len(LATENCY_BUCKETS_MS) else "inf"): count
+                for i, (bound, count) in enumerate(zip(LATENCY_BUCKETS_MS + [None], self.counts))
+            }
+        }
+
+class LLMMetrics:
+    """Per-call-site token, latency, retry and fallback accounting for LLM calls"""
+
+    def __init__(self, timeline_minutes: int = 24 * 60):
+        self._lock = threading.Lock()
+        self.timeline_minutes = timeline_minutes
+        self._sites: Dict[str, Dict] = defaultdict(self._new_site)
+        # minute epoch -> call_site -> {"calls", "prompt_tokens", "response_tokens"}
+        self._timeline: "OrderedDict[int, Dict]" = OrderedDict()
+
+    @staticmethod
+    def _new_site() -> Dict:
+        return {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "coalesced": 0,
+            "fallbacks": defaultdict(int),
+            "prompt_versions": defaultdict(int),
+            "prompt_tokens": 0,
+            "response_tokens": 0,
+            "latency": LatencyHistogram()
+        }
+
+    def _timeline_bucket(self, call_site: str) -> Dict:
+        minute = int(time.time() // 60)
+        if minute not in self._timeline:
+            self._timeline[minute] = {}
+            while len(self._timeline) > self.timeline_minutes:
+                self._timeline.popitem(last=False)
+        return self._timeline[minute].setdefault(
+            call_site, {"calls": 0, "prompt_tokens": 0, "response_tokens": 0}
+        )
+
+    def record_call(self, call_site: str, latency: float, prompt_tokens: int = 0,
+                    response_tokens: int = 0, retries: int = 0, error: bool = False,
+                    prompt_version: str = None):
+        """Record one upstream call (latency in seconds)"""
+        with self._lock:
+            site = self._sites[call_site]
+            site["calls"] += 1
+            if prompt_version:
+                site["prompt_versions"][prompt_version] += 1
+            site["retries"] += retries
+            site["prompt_tokens"] += prompt_tokens
+            site["response_tokens"] += response_tokens
+            if error:
+                site["errors"] += 1
+            site["latency"].observe(latency * 1000)
+
+            bucket = self._timeline_bucket(call_site)
+            bucket["calls"] += 1
+            bucket["prompt_tokens"] += prompt_tokens
+            bucket["response_tokens"] += response_tokens
+
+    def record_coalesced(self, call_site: str):
+        with self._lock:
+            self._sites[call_site]["coalesced"] += 1
+
+    def record_fallback(self, call_site: str, reason: str = "error"):
+        """Record that a call site served its local fallback (unavailable, error, parse_error, ...)"""
+        with self._lock:
+            self._sites[call_site]["fallbacks"][reason] += 1
+
+    def get_report(self, window_minutes: int = 60) -> Dict:
+        """Per-call-site percentiles and totals, plus tokens per minute over the window"""
+        with self._lock:
+            call_sites = {}
+            for name, site in self._sites.items():
+                fallbacks = dict(site["fallbacks"])
+                answered = site["calls"] - site["errors"]
+                call_sites[name] = {
+                    "calls": site["calls"],
+                    "errors": site["errors"],
+                    "retries": site["retries"],
+                    "coalesced": site["coalesced"],
+                    "fallbacks": fallbacks,
+                    "fallback_total": sum(fallbacks.values()),
+                    "prompt_versions": dict(site["prompt_versions"]),
+                    "parse_success_rate": round(1 - fallbacks.get("parse_error", 0) / answered, 4) if answered else None,
+                    "prompt_tokens": site["prompt_tokens"],
+                    "response_tokens": site["response_tokens"],
+                    "total_tokens": site["prompt_tokens"] + site["response_tokens"],
+                    "avg_prompt_tokens": round(site["prompt_tokens"] / site["calls"], 1) if site["calls"] else 0,
+                    "latency": site["latency"].to_dict()
+                }
+
+            since = int(time.time() // 60) - window_minutes
+            timeline: List[Dict] = []
+            for minute, sites in self._timeline.items():
+                if minute <= since:
+                    continue
+                timeline.append({
+                    "minute": datetime.utcfromtimestamp(minute * 60).strftime("%Y-%m-%d %H:%M"),
+                    "calls": sum(s["calls"] for s in sites.values()),
+                    "total_tokens": sum(s["prompt_tokens"] + s["response_tokens"] for s in sites.values()),
+                    "by_call_site": {name: dict(s) for name, s in sites.items()}
+                })
+
+        return {
+            "call_sites": call_sites,
+            "totals": {
+                "calls": sum(s["calls"] for s in call_sites.values()),
+                "total_tokens": sum(s["total_tokens"] for s in call_sites.values()),
+                "fallbacks": sum(s["fallback_total"] for s in call_sites.values())
+            },
+            "timeline": timeline,
+            "window_minutes": window_minutes,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global LLM metrics instance
+llm_metrics = LLMMetrics()
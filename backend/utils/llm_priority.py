@@ -0,0 +1,70 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Scheduling classes for LLM slots, most urgent first
+PRIORITY_CLASSES = ["interactive", "normal", "background"]
+DEFAULT_PRIORITY = "normal"
+
+def parse_weights(config: str) -> Dict[str, float]:
+    """"interactive=6,normal=3,background=1" -> {class: weight}; unknown classes are ignored"""
+    weights = {"interactive": 6.0, "normal": 3.0, "background": 1.0}
+    for pair in config.split(","):
+        name, _, value = pair.partition("=")
+        try:
+            if name.strip() in weights and float(value) > 0:
+                weights[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return weights
+
+# Share of freed slots each class gets while all of them are queued
+PRIORITY_WEIGHTS = parse_weights(os.getenv("LLM_PRIORITY_WEIGHTS", ""))
+
+# Per-route class (longest matching path prefix wins); everything else is "normal"
+ROUTE_PRIORITIES = {
+    "/mentor/ask": "interactive",
+    "/mentor/ws": "interactive",
+    "/mentor/daily-tip": "interactive",
+}
+
+_current_priority: ContextVar[str] = ContextVar("llm_priority", default=DEFAULT_PRIORITY)
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+@contextmanager
+def llm_priority(priority: str):
+    """Run LLM calls made inside the block (and threads/tasks started from it) under a class
+
+        with llm_priority("background"):
+            llm_client.generate_sync(prompt, call_site="question_gen")
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown LLM priority class: {priority}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def priority_for(path: str) -> str:
+    matches = [prefix for prefix in ROUTE_PRIORITIES if path.startswith(prefix)]
+    return ROUTE_PRIORITIES[max(matches, key=len)] if matches else DEFAULT_PRIORITY
+
+class PriorityMiddleware:
+    """ASGI middleware: sets the LLM priority class for HTTP and WebSocket routes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        with llm_priority(priority_for(scope.get("path", ""))):
+            await self.app(scope, receive, send)
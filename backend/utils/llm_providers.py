@@ -0,0 +1,480 @@
+import google.generativeai as genai
+import os
+import ast
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterator, List
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class LLMProviderError(Exception):
+    """Upstream LLM call failed"""
+
+class LLMRateLimitError(LLMProviderError):
+    """Upstream rejected the call for quota reasons (HTTP 429)"""
+
+class LLMTimeoutError(LLMProviderError):
+    """Upstream did not answer within the call timeout"""
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the provider reports no usage"""
+    return max(len(text) // 4, 1) if text else 0
+
+class LLMResponse:
+    """Generated text plus token usage"""
+
+    def __init__(self, text: str, prompt_tokens: int, response_tokens: int):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+
+class LLMProvider:
+    """Interface every LLM backend implements; both calls are blocking"""
+
+    name = "base"
+    enabled = False
+
+    def generate(self, prompt: str, model_name: str, timeout: float) -> LLMResponse:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, model_name: str, timeout: float) -> Iterator[str]:
+        raise NotImplementedError
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini via google-generativeai"""
+
+    name = "gemini"
+
+    def __init__(self):
+        api_key = os.getenv("GEMINI_API_KEY")
+        self.enabled = bool(api_key and api_key != "your_gemini_api_key_here")
+        if self.enabled:
+            genai.configure(api_key=api_key)
+        self._models: Dict[str, genai.GenerativeModel] = {}
+
+    def _get_model(self, model_name: str) -> genai.GenerativeModel:
+        if model_name not in self._models:
+            self._models[model_name] = genai.GenerativeModel(model_name)
+        return self._models[model_name]
+
+    @staticmethod
+    def _translate_error(error: Exception) -> Exception:
+        """Map google-api-core errors onto provider-neutral ones"""
+        error_name = type(error).__name__
+        if error_name in ("ResourceExhausted", "TooManyRequests"):
+            return LLMRateLimitError(str(error))
+        if error_name in ("DeadlineExceeded", "Timeout", "ReadTimeout"):
+            return LLMTimeoutError(str(error))
+        return error
+
+    def generate(self, prompt: str, model_name: str, timeout: float) -> LLMResponse:
+        try:
+            response = self._get_model(model_name).generate_content(
+                prompt, request_options={"timeout": timeout}
+            )
+            text = response.text.strip()
+        except Exception as e:
+            raise self._translate_error(e) from e
+
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(
+            text,
+            getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt),
+            getattr(usage, "candidates_token_count", 0) or estimate_tokens(text)
+        )
+
+    def stream(self, prompt: str, model_name: str, timeout: float) -> Iterator[str]:
+        try:
+            response = self._get_model(model_name).generate_content(
+                prompt, stream=True, request_options={"timeout": timeout}
+            )
+            for chunk in response:
+                text = getattr(chunk, "text", "") or ""
+                if text:
+                    yield text
+        except Exception as e:
+            raise self._translate_error(e) from e
+
+def _parse_model_map(config: str) -> Dict[str, float]:
+    """"gemini-1.5-flash=0.3,gemini-pro=1" -> {model: value}"""
+    values = {}
+    for pair in config.split(","):
+        name, _, value = pair.partition("=")
+        try:
+            values[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return values
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Deterministic offline stand-in for Gemini, for load and latency testing.
+    Answers are schema-valid JSON for each prompt family and depend only on the prompt;
+    latency, errors and rate limits are injected from a seeded RNG.
+    """
+
+    name = "fake"
+    enabled = True
+
+    def __init__(self):
+        self.latency_distribution = os.getenv("FAKE_LLM_LATENCY_DIST", "lognormal")  # fixed/uniform/lognormal
+        self.latency_ms = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))  # fixed value, uniform mean, lognormal median
+        self.latency_spread = float(os.getenv("FAKE_LLM_LATENCY_SPREAD", "0.5"))  # uniform +/- fraction, lognormal sigma
+        self.error_rate = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+        self.rate_limit_rate = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))
+        # Simulated quota: calls beyond this many concurrent requests get a 429 (0 = unlimited)
+        self.max_concurrency = int(os.getenv("FAKE_LLM_MAX_CONCURRENCY", "0"))
+        # Per-model latency multiplier and share of answers with broken JSON, to exercise model routing
+        self.model_latency = _parse_model_map(os.getenv("FAKE_LLM_MODEL_LATENCY", "gemini-1.5-flash=0.35"))
+        self.model_malformed_rate = _parse_model_map(os.getenv("FAKE_LLM_MALFORMED_RATE", ""))
+        self.stream_chunk_words = 8
+
+        self._rng = random.Random(int(os.getenv("FAKE_LLM_SEED", "42")))
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {"calls": 0, "injected_errors": 0, "rate_limited": 0, "timeouts": 0, "malformed": 0}
+
+    def _sample(self, model_name: str):
+        """Draw (latency_seconds, failure) for one call"""
+        with self._lock:
+            self.stats["calls"] += 1
+            roll = self._rng.random()
+            if self.latency_distribution == "fixed":
+                latency = self.latency_ms
+            elif self.latency_distribution == "uniform":
+                spread = self.latency_ms * self.latency_spread
+                latency = self._rng.uniform(self.latency_ms - spread, self.latency_ms + spread)
+            else:
+                latency = self.latency_ms * math.exp(self._rng.gauss(0, self.latency_spread))
+            latency *= self.model_latency.get(model_name, 1.0)
+            malformed_rate = self.model_malformed_rate.get(model_name, 0.0)
+            if malformed_rate and self._rng.random() < malformed_rate:
+                self.stats["malformed"] += 1
+                return max(latency, 0) / 1000, "malformed"
+
+        if roll < self.rate_limit_rate:
+            return 0.05, "rate_limit"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return max(latency, 0) / 1000, "error"
+        return max(latency, 0) / 1000, None
+
+    def _enter(self):
+        with self._lock:
+            if self.max_concurrency and self._in_flight >= self.max_concurrency:
+                self.stats["rate_limited"] += 1
+                raise LLMRateLimitError("429 Resource has been exhausted (fake quota)")
+            self._in_flight += 1
+
+    def _exit(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _wait(self, latency: float, failure: str, timeout: float):
+        if latency > timeout:
+            time.sleep(timeout)
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise LLMTimeoutError(f"Fake upstream exceeded {timeout}s timeout")
+        time.sleep(latency)
+        if failure == "rate_limit":
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            raise LLMRateLimitError("429 Resource has been exhausted (fake injected)")
+        if failure == "error":
+            with self._lock:
+                self.stats["injected_errors"] += 1
+            raise LLMProviderError("503 Service unavailable (fake injected)")
+
+    def generate(self, prompt: str, model_name: str, timeout: float) -> LLMResponse:
+        latency, failure = self._sample(model_name)
+        self._enter()
+        try:
+            self._wait(latency, failure, timeout)
+            text = fake_response(prompt)
+            if failure == "malformed":
+                # Truncated mid-answer, the way a small model sometimes drops the closing brackets
+                text = text[:len(text) // 2]
+            return LLMResponse(text, estimate_tokens(prompt), estimate_tokens(text))
+        finally:
+            self._exit()
+
+    def stream(self, prompt: str, model_name: str, timeout: float) -> Iterator[str]:
+        latency, failure = self._sample(model_name)
+        self._enter()
+        try:
+            # First chunk after ~30% of the total latency, the rest spread evenly
+            self._wait(latency * 0.3, failure, timeout)
+            words = fake_response(prompt).split(" ")
+            chunks = [" ".join(words[i:i + self.stream_chunk_words]) for i in range(0, len(words), self.stream_chunk_words)]
+            delay = latency * 0.7 / max(len(chunks), 1)
+            for index, chunk in enumerate(chunks):
+                if index:
+                    time.sleep(delay)
+                yield chunk + (" " if index < len(chunks) - 1 else "")
+        finally:
+            self._exit()
+
+# ---------------------------------------------------------------------------
+# Fake response generation, one builder per prompt family
+# ---------------------------------------------------------------------------
+
+def _extract_list(prompt: str, label: str, default: List = None) -> List:
+    """Pull a Python/JSON list literal that follows a label in the prompt"""
+    match = re.search(re.escape(label) + r"\s*(\[[^\]]*\])", prompt)
+    if match:
+        try:
+            value = ast.literal_eval(match.group(1))
+            if isinstance(value, list):
+                return [str(item) for item in value]
+        except Exception:
+            pass
+    return list(default or [])
+
+def _extract_dict(prompt: str, label: str) -> Dict:
+    match = re.search(re.escape(label) + r"\s*(\{[^}]*\})", prompt)
+    if match:
+        for parser in (json.loads, ast.literal_eval):
+            try:
+                value = parser(match.group(1))
+                if isinstance(value, dict):
+                    return value
+            except Exception:
+                continue
+    return {}
+
+def _pick(prompt: str, options: List[str]) -> str:
+    digest = int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16)
+    return options[digest % len(options)]
+
+_FAKE_KNOWN_SKILLS = ["python", "javascript", "react", "sql", "docker", "git", "java", "aws", "node.js", "typescript"]
+
+def _fake_resume_analysis(prompt: str) -> Dict:
+    text = prompt.lower()
+    skills = [skill for skill in _FAKE_KNOWN_SKILLS if skill in text] or ["python", "git"]
+    return {
+        "extracted_skills": skills,
+        "experience_level": _pick(prompt, ["entry", "mid", "senior"]),
+        "years_of_experience": len(skills) % 8,
+        "education": [{"degree": "Bachelor of Science", "field": "Computer Science", "institution": "State University", "year": 2020}],
+        "projects": [{"name": "Portfolio Platform", "description": "Full-stack web app", "technologies": skills[:2], "impact": "Served 1k users"}],
+        "certifications": [],
+        "skill_categories": {
+            "programming_languages": [s for s in skills if s in ("python", "javascript", "java", "typescript")],
+            "frameworks": [s for s in skills if s in ("react", "node.js")],
+            "databases": [s for s in skills if s == "sql"],
+            "tools": [s for s in skills if s in ("git", "docker", "aws")],
+            "soft_skills": ["Communication"]
+        },
+        "career_summary": "Developer with hands-on project experience",
+        "recommended_learning_path": [{"skill": s, "priority": "medium", "reason": f"Deepen {s} expertise"} for s in skills[:3]]
+    }
+
+def _fake_assessment_plan(prompt: str) -> Dict:
+    skills = _extract_list(prompt, "Skills:", ["python"])
+    return {
+        "assessment_plan": [
+            {"skill": s, "difficulty": "intermediate", "question_count": 3,
+             "focus_areas": ["fundamentals", "practical application"], "estimated_duration": "10 minutes"}
+            for s in skills[:5]
+        ],
+        "total_questions": len(skills[:5]) * 3,
+        "estimated_total_duration": f"{len(skills[:5]) * 10} minutes",
+        "skill_priorities": skills[:3],
+        "assessment_strategy": "Practical questions weighted towards core skills"
+    }
+
+def _fake_question(prompt: str) -> Dict:
+    match = re.search(r"knowledge in '([^']+)'", prompt)
+    skill = match.group(1) if match else "programming"
+    answer = _pick(prompt, ["A", "B", "C", "D"])
+    level = re.search(r"at (\w+) difficulty", prompt)
+    return {
+        "question": f"Which practice best improves maintainability of {skill} code in production?",
+        "options": ["Clear module boundaries", "Global mutable state", "Copy-pasted logic", "Skipping tests"],
+        "answer": answer,
+        "explanation": f"Well-structured {skill} code is easier to change safely.",
+        "difficulty": level.group(1) if level else "intermediate"
+    }
+
+def _fake_learning_path(prompt: str) -> Dict:
+    skills = _extract_list(prompt, "Skills:", ["python"])
+    levels = _extract_dict(prompt, "Skill Levels:")
+    next_level = {"beginner": "intermediate", "intermediate": "advanced", "advanced": "expert"}
+    path = []
+    for skill in skills:
+        level = levels.get(skill, "beginner")
+        path.append({
+            "skill": skill,
+            "current_level": level,
+            "target_level": next_level.get(level, "advanced"),
+            "modules": [
+                {"title": f"{skill.title()} Core Concepts", "description": f"Strengthen {skill} fundamentals",
+                 "duration": "1-2 weeks", "resources": [f"{skill} documentation", "Interactive exercises"],
+                 "projects": [f"Small {skill} project"], "assessment": "Quiz"},
+                {"title": f"Applied {skill.title()}", "description": f"Use {skill} in a realistic project",
+                 "duration": "2 weeks", "resources": ["Video course", "GitHub examples"],
+                 "projects": [f"End-to-end {skill} project"], "assessment": "Project review"}
+            ],
+            "estimated_completion": "3-4 weeks"
+        })
+    return {
+        "learning_path": path,
+        "overall_timeline": f"{max(len(skills), 1) * 4} weeks",
+        "priority_order": skills,
+        "success_metrics": ["Module quizzes passed", "Projects completed", "Reassessment score >= 7"]
+    }
+
+def _fake_learning_path_fragment(prompt: str) -> Dict:
+    skill_match = re.search(r"Skill: (.*)", prompt)
+    level_match = re.search(r"Current Level: (\w+)", prompt)
+    skill = skill_match.group(1).strip() if skill_match else "python"
+    level = level_match.group(1) if level_match else "beginner"
+    return {
+        "modules": [
+            {"title": f"{skill.title()} for {level.title()}s", "description": f"Strengthen {skill} fundamentals",
+             "duration": "1-2 weeks", "resources": [f"{skill} documentation", "Interactive exercises"],
+             "projects": [f"Small {skill} project"], "assessment": "Quiz"},
+            {"title": f"Applied {skill.title()}", "description": f"Use {skill} in a realistic project",
+             "duration": "2 weeks", "resources": ["Video course", "GitHub examples"],
+             "projects": [f"End-to-end {skill} project"], "assessment": "Project review"}
+        ],
+        "estimated_completion": "3-4 weeks"
+    }
+
+def _fake_personalized_path(prompt: str) -> Dict:
+    weak = _extract_list(prompt, "Weak Skills to Improve:")
+    medium = _extract_list(prompt, "Medium Skills to Strengthen:")
+    return {
+        "learning_path": [
+            {"skill": s, "priority": "high" if s in weak else "medium", "estimated_weeks": 4 if s in weak else 2,
+             "learning_objectives": [f"Master {s} fundamentals"], "resources": [f"{s} documentation"],
+             "exercises": [f"{s} kata"], "milestones": [f"{s} project shipped"]}
+            for s in weak + medium
+        ],
+        "total_estimated_weeks": 4 * len(weak) + 2 * len(medium),
+        "focus_areas": weak or medium,
+        "success_metrics": ["Reassessment score >= 7.0"]
+    }
+
+def _fake_daily_tip(prompt: str) -> Dict:
+    skills = _extract_list(prompt, "skills:", ["programming"]) or ["programming"]
+    skill = _pick(prompt, skills)
+    return {
+        "tip": f"Spend 20 minutes reading idiomatic {skill} code from a popular open-source project",
+        "skill_focus": skill,
+        "difficulty": "intermediate",
+        "practice_exercise": f"Refactor one function you wrote in {skill} this week",
+        "motivation": "Small daily improvements compound quickly!"
+    }
+
+def _fake_mentor_answer_text(prompt: str) -> str:
+    match = re.search(r"Student Question:\s*(.+)", prompt)
+    question = match.group(1).strip() if match else "your question"
+    return (
+        f"Good question. To work through \"{question[:120]}\", start from the core concept, "
+        "write a tiny example that isolates it, and then apply it to your own project. "
+        "Check the official documentation for edge cases and compare your approach with a well-reviewed open-source example."
+    )
+
+def _fake_mentor_meta() -> Dict:
+    return {
+        "resources": ["Official documentation", "MDN Web Docs", "Real Python"],
+        "next_steps": ["Write a minimal example", "Apply it in your project", "Ask for a code review"],
+        "confidence": "high"
+    }
+
+def _fake_skill_analysis(prompt: str) -> Dict:
+    # Skills arrive as {skill: score} or, when keyed on bucket membership only, as a list
+    weak = list(_extract_dict(prompt, "Weak Skills (Score < 6.0):").keys()) or _extract_list(prompt, "Weak Skills (Score < 6.0):")
+    return {
+        "strength_analysis": "Strong skills give you a solid base for project work",
+        "improvement_areas": "Target weak skills with short, focused practice cycles",
+        "skill_gaps": "Gaps concentrated in the lowest-scoring skills",
+        "career_recommendations": "Full-stack or backend roles fit this profile",
+        "learning_priorities": ", ".join(weak),
+        "next_steps": "Schedule three practice sessions per week on the top weak skill"
+    }
+
+def _fake_recommendations(prompt: str) -> Dict:
+    strong = _extract_list(prompt, "Strong Skills:")
+    medium = _extract_list(prompt, "Medium Skills:")
+    weak = _extract_list(prompt, "Weak Skills:")
+    return {
+        "weak_skills_focus": [
+            {"skill": s, "priority": "high", "learning_path": ["Fundamentals", "Exercises", "Project"],
+             "resources": ["Documentation", "Practice platform"], "estimated_time": "2-3 weeks"}
+            for s in weak
+        ],
+        "medium_skills_improvement": [
+            {"skill": s, "next_level": "Advanced patterns", "practice_projects": ["Intermediate project"], "estimated_time": "1-2 weeks"}
+            for s in medium
+        ],
+        "strong_skills_maintenance": [
+            {"skill": s, "advanced_topics": ["Performance", "Architecture"], "mentorship_opportunities": ["Mentor a peer"]}
+            for s in strong
+        ],
+        "overall_strategy": "Close weak-skill gaps first while keeping strong skills sharp"
+    }
+
+def _fake_mentor_suggestions(prompt: str) -> List[str]:
+    weak = _extract_list(prompt, "weak skills:")
+    suggestions = [f"Practice {skill} for 30 minutes a day with small exercises" for skill in weak[:3]]
+    generic = ["Build one end-to-end project combining your skills", "Ask for a code review every week", "Retake the assessment in a month"]
+    return (suggestions + generic)[:3]
+
+def _fake_assessment_feedback(prompt: str) -> Dict:
+    weak = _extract_list(prompt, "Weak Skills:")
+    suggestions = [f"Practice {skill} for 30 minutes a day with small exercises" for skill in weak[:3]]
+    generic = ["Build one end-to-end project combining your skills", "Ask for a code review every week", "Retake the assessment in a month"]
+    return {
+        "recommendations": _fake_recommendations(prompt),
+        "mentor_suggestions": (suggestions + generic)[:3]
+    }
+
+def fake_response(prompt: str) -> str:
+    """Route a prompt to its family's fake builder and serialize the result"""
+    text = prompt.lower()
+
+    if "student question" in text:
+        answer = _fake_mentor_answer_text(prompt)
+        meta = _fake_mentor_meta()
+        if "###meta###" in text:
+            return f"{answer}\n###META###{json.dumps(meta)}"
+        return json.dumps({"answer": answer, **meta})
+    if "post-assessment feedback" in text:
+        return json.dumps(_fake_assessment_feedback(prompt))
+    if "analyze the following resume" in text:
+        return json.dumps(_fake_resume_analysis(prompt))
+    if "assessment plan" in text:
+        return json.dumps(_fake_assessment_plan(prompt))
+    if "multiple-choice question" in text:
+        return json.dumps(_fake_question(prompt))
+    if "daily learning tip" in text:
+        return json.dumps(_fake_daily_tip(prompt))
+    if "skill assessment results" in text:
+        return json.dumps(_fake_skill_analysis(prompt))
+    if "learning recommendations" in text:
+        return json.dumps(_fake_recommendations(prompt))
+    if "actionable suggestions" in text:
+        return json.dumps(_fake_mentor_suggestions(prompt))
+    if "weak skills to improve" in text:
+        return json.dumps(_fake_personalized_path(prompt))
+    if "section of a learning path" in text:
+        return json.dumps(_fake_learning_path_fragment(prompt))
+    if "learning path" in text:
+        return json.dumps(_fake_learning_path(prompt))
+    return json.dumps({"answer": "Fake LLM response", "prompt_chars": len(prompt)})
+
+def create_provider() -> LLMProvider:
+    """Pick the provider from LLM_PROVIDER (gemini by default, fake for offline benchmarks)"""
+    provider_name = os.getenv("LLM_PROVIDER", "gemini").lower()
+    if provider_name == "fake":
+        print("🧪 LLM_PROVIDER=fake: using deterministic local Gemini stand-in")
+        return FakeLLMProvider()
+    return GeminiProvider()
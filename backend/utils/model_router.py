@@ -0,0 +1,157 @@
+import os
+import json
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Model behind each tier
+MODEL_TIERS = {
+    "fast": os.getenv("LLM_MODEL_FAST", "gemini-1.5-flash"),
+    "large": os.getenv("LLM_MODEL_LARGE", "gemini-pro")
+}
+
+# Short, schema-constrained tasks go to the fast tier; open-ended reasoning stays on the large one.
+# Call sites not listed (and ad-hoc ones such as "benchmark") use the large tier.
+DEFAULT_ROUTES = {
+    "daily_tip": "fast",
+    "mentor_suggestions": "fast",
+    "recommendations": "fast",
+    "assessment_feedback": "fast",
+    "question_gen": "fast",
+    "assessment_plan": "fast",
+    "mentor_answer": "large",
+    "learning_path": "large",
+    "resume_analysis": "large",
+    "skill_analysis": "large",
+}
+
+# Retry on the large tier when a fast-tier answer fails its call site's JSON validation
+ESCALATE_ON_INVALID = os.getenv("LLM_MODEL_ESCALATE", "true").lower() in ("1", "true", "yes")
+
+def parse_routes(config: str) -> Dict[str, str]:
+    """"daily_tip=fast,mentor_answer=large" -> {call_site: tier}, skipping unknown tiers"""
+    routes = {}
+    for pair in config.split(","):
+        name, _, tier = pair.partition("=")
+        if name.strip() and tier.strip() in MODEL_TIERS:
+            routes[name.strip()] = tier.strip()
+    return routes
+
+def expect_json_object(text: str):
+    """Validator for call sites that parse the first {...} block out of the answer"""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise ValueError("No JSON object in response")
+    json.loads(match.group())
+
+def expect_json_array(text: str):
+    """Validator for call sites that parse the first [...] block out of the answer"""
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if not match:
+        raise ValueError("No JSON array in response")
+    json.loads(match.group())
+
+def expect_json_document(text: str):
+    """Validator for call sites that parse a ```json fenced block, or else the whole answer"""
+    if "```json" in text:
+        start = text.find("```json") + 7
+        text = text[start:text.find("```", start)]
+    json.loads(text.strip())
+
+class ModelRouter:
+    """Maps each LLM call site to a model tier and tracks what each route costs"""
+
+    def __init__(self, routes: Dict[str, str] = None, tiers: Dict[str, str] = None,
+                 escalate: bool = ESCALATE_ON_INVALID):
+        self.tiers = dict(tiers or MODEL_TIERS)
+        self.routes = dict(DEFAULT_ROUTES)
+        # e.g. LLM_MODEL_ROUTES="daily_tip=large,mentor_answer=fast"
+        self.routes.update(parse_routes(os.getenv("LLM_MODEL_ROUTES", "")) if routes is None else routes)
+        self.escalate = escalate
+        self._lock = threading.Lock()
+        # call_site -> model -> totals
+        self._usage = defaultdict(lambda: defaultdict(lambda: {
+            "calls": 0, "errors": 0, "latency_ms": 0.0, "prompt_tokens": 0, "response_tokens": 0
+        }))
+        self._escalations = defaultdict(int)
+
+    def tier_for(self, call_site: str) -> str:
+        return self.routes.get(call_site, "large")
+
+    def model_for(self, call_site: str) -> Tuple[str, str]:
+        """(tier, model name) for a call site"""
+        tier = self.tier_for(call_site)
+        return tier, self.tiers[tier]
+
+    def escalation_model(self, call_site: str) -> str:
+        """Large-tier model to retry an invalid answer on, or None when escalation does not apply"""
+        if not self.escalate or self.tier_for(call_site) == "large":
+            return None
+        return self.tiers["large"]
+
+    def record(self, call_site: str, model_name: str, latency: float, prompt_tokens: int = 0,
+               response_tokens: int = 0, error: bool = False):
+        with self._lock:
+            usage = self._usage[call_site][model_name]
+            usage["calls"] += 1
+            usage["errors"] += int(error)
+            usage["latency_ms"] += latency * 1000
+            usage["prompt_tokens"] += prompt_tokens
+            usage["response_tokens"] += response_tokens
+
+    def record_escalation(self, call_site: str):
+        with self._lock:
+            self._escalations[call_site] += 1
+
+    def get_report(self) -> Dict:
+        """Per-route model usage, mean latency/tokens per model and the latency saved by the fast tier"""
+        large_model = self.tiers["large"]
+        with self._lock:
+            usage = {site: {model: dict(totals) for model, totals in models.items()} for site, models in self._usage.items()}
+            escalations = dict(self._escalations)
+
+        routes = {}
+        for call_site in sorted(set(self.routes) | set(usage)):
+            models = {}
+            for model, totals in usage.get(call_site, {}).items():
+                calls = max(totals["calls"], 1)
+                models[model] = {
+                    "calls": totals["calls"],
+                    "errors": totals["errors"],
+                    "mean_latency_ms": round(totals["latency_ms"] / calls, 1),
+                    "mean_prompt_tokens": round(totals["prompt_tokens"] / calls, 1),
+                    "mean_response_tokens": round(totals["response_tokens"] / calls, 1)
+                }
+
+            tier, model = self.model_for(call_site)
+            route = {
+                "tier": tier,
+                "model": model,
+                "models": models,
+                "escalations": escalations.get(call_site, 0),
+                "escalation_rate": round(escalations.get(call_site, 0) / max(models.get(model, {}).get("calls", 0), 1), 4)
+            }
+            # Savings against the large model's own latency on this route (from escalations or earlier routing);
+            # an escalated call paid for both models, so it costs the fast call's latency instead of saving
+            if model != large_model and model in models and large_model in models:
+                fast_ms = models[model]["mean_latency_ms"]
+                saved_ms = models[large_model]["mean_latency_ms"] - fast_ms
+                escalated = route["escalations"]
+                route["latency_saved_ms_per_call"] = round(saved_ms, 1)
+                route["latency_saved_ms_total"] = round(saved_ms * (models[model]["calls"] - escalated) - fast_ms * escalated, 1)
+            routes[call_site] = route
+
+        return {
+            "tiers": self.tiers,
+            "escalate_on_invalid": self.escalate,
+            "routes": routes,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global model router instance
+model_router = ModelRouter()
@@ -0,0 +1,562 @@
+import os
+import json
+import re
+import threading
+from collections import defaultdict
+from string import Template
+from typing import Dict, List, Tuple
+from datetime import datetime
+from dotenv import load_dotenv
+from utils.llm_providers import estimate_tokens
+
+load_dotenv()
+
+# ---------------------------------------------------------------------------
+# Shared schema fragments: compact type descriptions instead of full JSON examples
+# ---------------------------------------------------------------------------
+
+JSON_ONLY = "Reply with JSON only:"
+LEVEL = '"beginner|intermediate|advanced"'
+PRIORITY = '"high|medium|low"'
+CONFIDENCE = '"high|medium|low"'
+MENTOR_ROLE = "You are an expert AI mentor helping a student with programming and technology questions."
+MENTOR_GUIDELINES = "Be encouraging, practical and actionable; keep explanations beginner-friendly when appropriate."
+MENTOR_META_SCHEMA = f'"resources":[str],"next_steps":[str],"confidence":{CONFIDENCE}'
+RECOMMENDATIONS_SCHEMA = (
+    f'{{"weak_skills_focus":[{{"skill":str,"priority":{PRIORITY},"learning_path":[str],"resources":[str],"estimated_time":str}}],\n'
+    '"medium_skills_improvement":[{"skill":str,"next_level":str,"practice_projects":[str],"estimated_time":str}],\n'
+    '"strong_skills_maintenance":[{"skill":str,"advanced_topics":[str],"mentorship_opportunities":[str]}],\n'
+    '"overall_strategy":str}'
+)
+
+def _compact(text: str) -> str:
+    """Strip indentation, blank lines and repeated spaces from a template"""
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in text.strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+def _format_value(value) -> str:
+    """Render lists/dicts as compact JSON so values cost as few tokens as the template"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return str(value)
+
+class PromptTemplate:
+    """One versioned prompt, compacted and compiled once at registration"""
+
+    def __init__(self, name: str, version: int, text: str, compact: bool = True):
+        self.name = name
+        self.version = version
+        self.text = _compact(text) if compact else text
+        self._template = Template(self.text)
+        self.fields = sorted({
+            match.group("named") or match.group("braced")
+            for match in Template.pattern.finditer(self.text)
+            if match.group("named") or match.group("braced")
+        })
+
+    @property
+    def key(self) -> str:
+        """Version tag used by metrics and cache keys, e.g. daily_tip@v2"""
+        return f"{self.name}@v{self.version}"
+
+    def render(self, **values) -> str:
+        return self._template.substitute({name: _format_value(value) for name, value in values.items()})
+
+class PromptRegistry:
+    """Named, versioned prompt templates with per-template token accounting"""
+
+    def __init__(self):
+        self._templates: Dict[str, Dict[int, PromptTemplate]] = defaultdict(dict)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = defaultdict(lambda: {
+            "renders": 0, "tokens": 0, "measured": 0, "baseline_tokens": 0
+        })
+        # Measurement mode also renders the baseline (v1) template for every call to report the saving
+        self.measure = os.getenv("PROMPT_MEASURE", "false").lower() in ("1", "true", "yes")
+        # e.g. PROMPT_VERSIONS="mentor_answer=1,daily_tip=1" pins templates without a code change
+        self._pinned = {
+            name.strip(): int(version)
+            for name, _, version in (pair.partition("=") for pair in os.getenv("PROMPT_VERSIONS", "").split(","))
+            if name.strip() and version.strip().isdigit()
+        }
+
+    def register(self, template: PromptTemplate):
+        self._templates[template.name][template.version] = template
+
+    def get(self, name: str, version: int = None) -> PromptTemplate:
+        versions = self._templates[name]
+        if not versions:
+            raise KeyError(f"Unknown prompt template: {name}")
+        version = version or self._pinned.get(name) or max(versions)
+        return versions[version]
+
+    def render(self, name: str, **values) -> Tuple[str, str]:
+        """Render the active version of a template; returns (prompt, version key)"""
+        template = self.get(name)
+        prompt = template.render(**values)
+
+        baseline_tokens = None
+        if self.measure and template.version != 1 and 1 in self._templates[name]:
+            baseline_tokens = estimate_tokens(self._templates[name][1].render(**values))
+
+        with self._lock:
+            stats = self._stats[template.key]
+            stats["renders"] += 1
+            stats["tokens"] += estimate_tokens(prompt)
+            if baseline_tokens is not None:
+                stats["measured"] += 1
+                stats["baseline_tokens"] += baseline_tokens
+        return prompt, template.key
+
+    def compare(self, name: str, values: Dict, versions: List[int] = None) -> Dict:
+        """Tokens per version of one template for the same inputs"""
+        available = self._templates[name]
+        tokens = {
+            f"v{version}": estimate_tokens(available[version].render(**values))
+            for version in sorted(versions or available)
+        }
+        baseline, active = tokens.get("v1"), tokens[f"v{self.get(name).version}"]
+        return {
+            "template": name,
+            "active_version": self.get(name).version,
+            "tokens": tokens,
+            "token_reduction_pct": round((1 - active / baseline) * 100, 1) if baseline else 0.0
+        }
+
+    def get_report(self) -> Dict:
+        """Active versions plus average rendered tokens (and savings when measuring)"""
+        with self._lock:
+            stats = {key: dict(value) for key, value in self._stats.items()}
+
+        templates = {}
+        for name, versions in self._templates.items():
+            active = self.get(name)
+            entry = {
+                "active_version": active.version,
+                "versions": sorted(versions),
+                "pinned": name in self._pinned,
+                "template_tokens": estimate_tokens(active.text)
+            }
+            usage = stats.get(active.key)
+            if usage:
+                entry["renders"] = usage["renders"]
+                entry["avg_prompt_tokens"] = round(usage["tokens"] / usage["renders"], 1)
+                if usage["measured"]:
+                    avg_baseline = usage["baseline_tokens"] / usage["measured"]
+                    entry["avg_baseline_tokens"] = round(avg_baseline, 1)
+                    entry["token_reduction_pct"] = round((1 - entry["avg_prompt_tokens"] / avg_baseline) * 100, 1)
+            templates[name] = entry
+
+        return {
+            "measure_mode": self.measure,
+            "templates": templates,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global prompt registry instance
+prompt_registry = PromptRegistry()
+
+# ---------------------------------------------------------------------------
+# v1: the original verbose prompts, kept verbatim as the measurement baseline
+# ---------------------------------------------------------------------------
+
+_V1_TEMPLATES = {
+    "resume_analysis": """Analyze the following resume and extract comprehensive information:
+
+Resume Text:
+$resume_text
+
+Please provide analysis in the following JSON format:
+{
+    "extracted_skills": ["skill1", "skill2", "skill3"],
+    "experience_level": "entry/mid/senior",
+    "years_of_experience": 3,
+    "education": [
+        {
+            "degree": "Bachelor of Science",
+            "field": "Computer Science",
+            "institution": "University Name",
+            "year": 2020
+        }
+    ],
+    "projects": [
+        {
+            "name": "Project Name",
+            "description": "Brief description",
+            "technologies": ["tech1", "tech2"],
+            "impact": "What was accomplished"
+        }
+    ],
+    "certifications": ["cert1", "cert2"],
+    "skill_categories": {
+        "programming_languages": ["Python", "JavaScript"],
+        "frameworks": ["React", "Django"],
+        "databases": ["PostgreSQL", "MongoDB"],
+        "tools": ["Git", "Docker"],
+        "soft_skills": ["Leadership", "Communication"]
+    },
+    "career_summary": "Brief summary of career background and goals",
+    "recommended_learning_path": [
+        {
+            "skill": "skill_name",
+            "priority": "high/medium/low",
+            "reason": "Why this skill is recommended"
+        }
+    ]
+}
+
+Focus on:
+1. Technical skills (programming languages, frameworks, tools)
+2. Experience level and years of experience
+3. Education and certifications
+4. Notable projects and their impact
+5. Skill categorization for better learning recommendations
+6. Career summary and learning path suggestions
+
+Be thorough but accurate. If information is not available, use empty arrays or appropriate defaults.
+""",
+    "assessment_plan": """Based on the following skills and experience level, generate an assessment plan:
+
+Skills: $skills
+Experience Level: $experience_level
+
+Create an assessment plan in JSON format:
+{
+    "assessment_plan": [
+        {
+            "skill": "skill_name",
+            "difficulty": "beginner/intermediate/advanced",
+            "question_count": 5,
+            "focus_areas": ["area1", "area2"],
+            "estimated_duration": "15 minutes"
+        }
+    ],
+    "total_questions": 25,
+    "estimated_total_duration": "75 minutes",
+    "skill_priorities": ["priority1", "priority2"],
+    "assessment_strategy": "Strategy description"
+}
+
+Consider the experience level when determining question difficulty and focus areas.
+""",
+    "question_gen": (
+        "Generate 1 comprehensive multiple-choice question to assess knowledge in '$skill'. "
+        "Make it practical and relevant to real-world scenarios. "
+        "Format the response as JSON:\n\n"
+        '{\n'
+        '  "question": "Detailed question text",\n'
+        '  "options": ["Option A", "Option B", "Option C", "Option D"],\n'
+        '  "answer": "A",\n'
+        '  "explanation": "Brief explanation of why this is correct",\n'
+        '  "difficulty": "intermediate"\n'
+        '}\n\n'
+        "Make the question challenging but fair. Focus on practical application of $skill."
+    ),
+    "mentor_answer": """
+        You are an expert AI mentor helping a student with programming and technology questions.
+
+        Student Question: $question
+
+        Context: $context
+
+        Provide a helpful, detailed response in JSON format:
+        {
+            "answer": "Your detailed answer to the question",
+            "resources": ["resource1", "resource2", "resource3"],
+            "next_steps": ["step1", "step2", "step3"],
+            "confidence": "high/medium/low"
+        }
+
+        Guidelines:
+        - Be encouraging and supportive
+        - Provide practical, actionable advice
+        - Include relevant learning resources
+        - Suggest next steps for improvement
+        - Keep explanations clear and beginner-friendly when appropriate
+        """,
+    "mentor_answer_stream": """
+        You are an expert AI mentor helping a student with programming and technology questions.
+
+        Student Question: $question
+
+        Context: $context
+
+        First write your detailed answer as plain text (no JSON).
+        Then, on its own line, write $marker followed by a JSON object:
+        {"resources": ["resource1", "resource2"], "next_steps": ["step1", "step2"], "confidence": "high/medium/low"}
+
+        Guidelines:
+        - Be encouraging and supportive
+        - Provide practical, actionable advice
+        - Keep explanations clear and beginner-friendly when appropriate
+        """,
+    "learning_path": """
+            Generate a personalized learning path for a user with the following skills and levels:
+
+            Skills: $skills
+            Skill Levels: $skill_levels
+
+            Create a comprehensive learning path in JSON format:
+        {
+            "learning_path": [
+                {
+                    "skill": "skill_name",
+                        "current_level": "beginner/intermediate/advanced",
+                        "target_level": "next_level",
+                        "modules": [
+                            {
+                                "title": "Module Title",
+                                "description": "Module description",
+                                "duration": "estimated_time",
+                                "resources": ["resource1", "resource2"],
+                                "projects": ["project1", "project2"],
+                                "assessment": "assessment_type"
+                            }
+                        ],
+                        "estimated_completion": "total_time"
+                    }
+                ],
+                "overall_timeline": "total_estimated_time",
+                "priority_order": ["skill1", "skill2", "skill3"],
+                "success_metrics": ["metric1", "metric2", "metric3"]
+        }
+        """,
+    "daily_tip": """
+            Generate a daily learning tip for a user with these skills: $skills
+
+            Provide the tip in JSON format:
+            {
+                "tip": "The daily tip",
+                "skill_focus": "skill_name",
+                "difficulty": "beginner/intermediate/advanced",
+                "practice_exercise": "A quick exercise to practice",
+                "motivation": "Motivational message"
+            }
+            """,
+    "skill_analysis": """Analyze the following skill assessment results and provide detailed insights:
+
+Strong Skills (Score >= 8.0): $strong_skills
+Medium Skills (Score 6.0-7.9): $medium_skills
+Weak Skills (Score < 6.0): $weak_skills
+
+Provide analysis in the following JSON format:
+{
+    "strength_analysis": "Detailed analysis of strong skills and how to leverage them",
+    "improvement_areas": "Analysis of weak skills and specific improvement strategies",
+    "skill_gaps": "Identified gaps in the skill set",
+    "career_recommendations": "Career path suggestions based on skill profile",
+    "learning_priorities": "Prioritized list of skills to focus on",
+    "next_steps": "Specific actionable next steps for skill development"
+}
+
+Focus on practical, actionable insights that can guide learning and career development.
+""",
+    "personalized_learning_path": """Based on the skill analysis, generate a personalized learning path:
+
+Weak Skills to Improve: $weak_skills
+Medium Skills to Strengthen: $medium_skills
+
+Create a structured learning path with:
+1. Priority order for learning
+2. Estimated time commitment for each skill
+3. Specific learning objectives
+4. Recommended resources and courses
+5. Practice exercises and projects
+6. Milestones and checkpoints
+
+Format as JSON:
+{
+    "learning_path": [
+        {
+            "skill": "skill_name",
+            "priority": "high/medium/low",
+            "estimated_weeks": 4,
+            "learning_objectives": ["objective1", "objective2"],
+            "resources": ["resource1", "resource2"],
+            "exercises": ["exercise1", "exercise2"],
+            "milestones": ["milestone1", "milestone2"]
+        }
+    ],
+    "total_estimated_weeks": 12,
+    "focus_areas": ["area1", "area2"],
+    "success_metrics": ["metric1", "metric2"]
+}
+""",
+    "recommendations": """
+        Generate personalized learning recommendations for a user with the following skill levels:
+
+        Strong Skills: $strong_skills
+        Medium Skills: $medium_skills
+        Weak Skills: $weak_skills
+
+        Provide recommendations in JSON format:
+        {
+            "weak_skills_focus": [
+                {
+                    "skill": "skill_name",
+                    "priority": "high/medium/low",
+                    "learning_path": ["step1", "step2", "step3"],
+                    "resources": ["resource1", "resource2"],
+                    "estimated_time": "2-3 weeks"
+                }
+            ],
+            "medium_skills_improvement": [
+                {
+                    "skill": "skill_name",
+                    "next_level": "advanced_concept",
+                    "practice_projects": ["project1", "project2"],
+                    "estimated_time": "1-2 weeks"
+                }
+            ],
+            "strong_skills_maintenance": [
+                {
+                    "skill": "skill_name",
+                    "advanced_topics": ["topic1", "topic2"],
+                    "mentorship_opportunities": ["opportunity1", "opportunity2"]
+                }
+            ],
+            "overall_strategy": "comprehensive learning strategy"
+        }
+        """,
+    "mentor_suggestions": """
+        As an AI mentor, provide 3 specific, actionable suggestions for a user with these skill scores:
+        $skill_scores
+
+        Focus especially on these weak skills: $weak_skills
+
+        Provide suggestions as a JSON array of strings:
+        ["suggestion1", "suggestion2", "suggestion3"]
+        """,
+}
+
+# ---------------------------------------------------------------------------
+# v2: compact templates built from the shared schema fragments
+# ---------------------------------------------------------------------------
+
+_V2_TEMPLATES = {
+    "resume_analysis": f"""
+        Analyze the following resume and extract structured information. Use [] or defaults when unknown.
+        Resume Text:
+        $resume_text
+        {JSON_ONLY}
+        {{"extracted_skills":[str],"experience_level":"entry|mid|senior","years_of_experience":int,
+        "education":[{{"degree":str,"field":str,"institution":str,"year":int}}],
+        "projects":[{{"name":str,"description":str,"technologies":[str],"impact":str}}],
+        "certifications":[str],
+        "skill_categories":{{"programming_languages":[str],"frameworks":[str],"databases":[str],"tools":[str],"soft_skills":[str]}},
+        "career_summary":str,
+        "recommended_learning_path":[{{"skill":str,"priority":{PRIORITY},"reason":str}}]}}
+    """,
+    "assessment_plan": f"""
+        Create an assessment plan; match difficulty and focus areas to the experience level.
+        Skills: $skills
+        Experience Level: $experience_level
+        {JSON_ONLY}
+        {{"assessment_plan":[{{"skill":str,"difficulty":{LEVEL},"question_count":int,"focus_areas":[str],"estimated_duration":str}}],
+        "total_questions":int,"estimated_total_duration":str,"skill_priorities":[str],"assessment_strategy":str}}
+    """,
+    "question_gen": f"""
+        Generate 1 practical, real-world multiple-choice question to assess knowledge in '$skill'. Challenging but fair.
+        {JSON_ONLY}
+        {{"question":str,"options":[4 str],"answer":"A|B|C|D","explanation":str,"difficulty":{LEVEL}}}
+    """,
+    "mentor_answer": f"""
+        {MENTOR_ROLE}
+        Student Question: $question
+        Context: $context
+        {MENTOR_GUIDELINES} Include learning resources and next steps.
+        {JSON_ONLY}
+        {{"answer":str,{MENTOR_META_SCHEMA}}}
+    """,
+    "mentor_answer_stream": f"""
+        {MENTOR_ROLE}
+        Student Question: $question
+        Context: $context
+        {MENTOR_GUIDELINES}
+        Write the answer as plain text (no JSON), then on its own line $marker followed by JSON:
+        {{{MENTOR_META_SCHEMA}}}
+    """,
+    "learning_path": f"""
+        Generate a personalized learning path.
+        Skills: $skills
+        Skill Levels: $skill_levels
+        {JSON_ONLY}
+        {{"learning_path":[{{"skill":str,"current_level":{LEVEL},"target_level":str,
+        "modules":[{{"title":str,"description":str,"duration":str,"resources":[str],"projects":[str],"assessment":str}}],
+        "estimated_completion":str}}],"overall_timeline":str,"priority_order":[str],"success_metrics":[str]}}
+    """,
+    "daily_tip": f"""
+        Generate a daily learning tip for a user with these skills: $skills
+        {JSON_ONLY}
+        {{"tip":str,"skill_focus":str,"difficulty":{LEVEL},"practice_exercise":str,"motivation":str}}
+    """,
+    "skill_analysis": f"""
+        Analyze the following skill assessment results with practical insights for learning and career development.
+        Strong Skills (Score >= 8.0): $strong_skills
+        Medium Skills (Score 6.0-7.9): $medium_skills
+        Weak Skills (Score < 6.0): $weak_skills
+        {JSON_ONLY}
+        {{"strength_analysis":str,"improvement_areas":str,"skill_gaps":str,"career_recommendations":str,
+        "learning_priorities":str,"next_steps":str}}
+    """,
+    "personalized_learning_path": f"""
+        Generate a personalized learning path with priorities, time estimates, objectives, resources, exercises and milestones.
+        Weak Skills to Improve: $weak_skills
+        Medium Skills to Strengthen: $medium_skills
+        {JSON_ONLY}
+        {{"learning_path":[{{"skill":str,"priority":{PRIORITY},"estimated_weeks":int,"learning_objectives":[str],
+        "resources":[str],"exercises":[str],"milestones":[str]}}],"total_estimated_weeks":int,"focus_areas":[str],"success_metrics":[str]}}
+    """,
+    "recommendations": f"""
+        Generate personalized learning recommendations for these skill levels.
+        Strong Skills: $strong_skills
+        Medium Skills: $medium_skills
+        Weak Skills: $weak_skills
+        {JSON_ONLY}
+        {RECOMMENDATIONS_SCHEMA}
+    """,
+    "mentor_suggestions": """
+        As an AI mentor, give 3 specific, actionable suggestions for a user with these skill scores: $skill_scores
+        Focus especially on these weak skills: $weak_skills
+        Reply with a JSON array of 3 strings only.
+    """,
+}
+
+for _name, _text in _V1_TEMPLATES.items():
+    prompt_registry.register(PromptTemplate(_name, 1, _text, compact=False))
+for _name, _text in _V2_TEMPLATES.items():
+    prompt_registry.register(PromptTemplate(_name, 2, _text))
+
+# ---------------------------------------------------------------------------
+# Templates added after the compaction, compact from their first version
+# ---------------------------------------------------------------------------
+
+prompt_registry.register(PromptTemplate("assessment_feedback", 1, f"""
+    Generate post-assessment feedback: learning recommendations plus 3 specific, actionable mentor suggestions.
+    Skill Scores: $skill_scores
+    Strong Skills: $strong_skills
+    Medium Skills: $medium_skills
+    Weak Skills: $weak_skills
+    {JSON_ONLY}
+    {{"recommendations":{RECOMMENDATIONS_SCHEMA},
+    "mentor_suggestions":[3 str]}}
+"""))
+
+prompt_registry.register(PromptTemplate("learning_path_fragment", 1, f"""
+    Generate one skill's section of a learning path, general enough to reuse for any learner at this level.
+    Skill: $skill
+    Current Level: $current_level
+    Target Level: $target_level
+    {JSON_ONLY}
+    {{"modules":[{{"title":str,"description":str,"duration":str,"resources":[str],"projects":[str],"assessment":str}}],
+    "estimated_completion":str}}
+"""))
+
+prompt_registry.register(PromptTemplate("adaptive_question_gen", 1, f"""
+    Generate 1 practical, real-world multiple-choice question to assess knowledge in '$skill', at $difficulty difficulty.
+    It joins an adaptive test bank: exactly one option is correct and the difficulty must match.
+    {JSON_ONLY}
+    {{"question":str,"options":[4 str],"answer":"A|B|C|D","explanation":str,"difficulty":"$difficulty"}}
+"""))
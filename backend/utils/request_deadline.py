@@ -0,0 +1,177 @@
+import os
+import asyncio
+import json
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEADLINE_HEADER = "x-request-timeout"  # seconds, e.g. "X-Request-Timeout: 5"
+DEFAULT_REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+MAX_REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_MAX_TIMEOUT_SECONDS", "300"))
+
+# Per-route budgets (longest matching path prefix wins); everything else gets the default
+ROUTE_TIMEOUT_SECONDS = {
+    "/resume/process": 60,
+    "/assessment/generate": 45,
+    "/assessment/submit": 20,
+    "/mentor/ask/stream": 120,
+    "/mentor/ask": 15,
+    "/mentor/daily-tip": 10,
+    "/mentor/learning-path": 30,
+    "/recommend/learning-path": 30,
+}
+
+class DeadlineExceeded(Exception):
+    """The request ran out of its time budget, or its client went away"""
+
+class RequestDeadline:
+    """Absolute deadline for one request; shared by everything running on its behalf"""
+
+    def __init__(self, budget_seconds: float, source: str):
+        self.budget_seconds = budget_seconds
+        self.source = source
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_seconds
+        # Set on client disconnect, so work already running in threads also stops early
+        self.disconnected = False
+
+    def remaining(self) -> float:
+        if self.disconnected:
+            return 0.0
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+_current_deadline: ContextVar[Optional[RequestDeadline]] = ContextVar("request_deadline", default=None)
+
+def current_deadline() -> Optional[RequestDeadline]:
+    return _current_deadline.get()
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left for the current request, or None outside a request"""
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline else None
+
+def check_deadline(stage: str = "request"):
+    """Raise DeadlineExceeded before starting work the request can no longer use"""
+    deadline = _current_deadline.get()
+    if deadline and deadline.expired:
+        reason = "client disconnected" if deadline.disconnected else f"{deadline.budget_seconds:g}s budget spent"
+        raise DeadlineExceeded(f"Deadline exceeded before {stage} ({reason})")
+
+def bounded_timeout(timeout: float, stage: str = "request") -> float:
+    """Clamp a downstream timeout to the remaining request budget"""
+    check_deadline(stage)
+    remaining = remaining_budget()
+    return timeout if remaining is None else min(timeout, remaining)
+
+def budget_for(path: str, headers: Dict[str, str]) -> Tuple[float, str]:
+    """Budget from the request header, else the route default, else the global default"""
+    header = headers.get(DEADLINE_HEADER)
+    if header:
+        try:
+            return min(max(float(header), 0.0), MAX_REQUEST_TIMEOUT_SECONDS), "header"
+        except ValueError:
+            pass
+    matches = [prefix for prefix in ROUTE_TIMEOUT_SECONDS if path.startswith(prefix)]
+    if matches:
+        return ROUTE_TIMEOUT_SECONDS[max(matches, key=len)], "route"
+    return DEFAULT_REQUEST_TIMEOUT_SECONDS, "default"
+
+_stats_lock = threading.Lock()
+deadline_stats = {
+    "requests": 0,
+    "completed": 0,
+    "deadline_exceeded": 0,
+    "client_disconnects": 0,
+    "header_budgets": 0
+}
+
+def _count(name: str):
+    with _stats_lock:
+        deadline_stats[name] += 1
+
+def get_deadline_stats() -> Dict:
+    with _stats_lock:
+        return dict(deadline_stats)
+
+class DeadlineMiddleware:
+    """ASGI middleware: sets the request deadline and cancels the handler on expiry or disconnect"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        budget, source = budget_for(scope.get("path", ""), headers)
+        deadline = RequestDeadline(budget, source)
+        _count("requests")
+        if source == "header":
+            _count("header_budgets")
+
+        response_started = False
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        # The handler task copies the current context, so it sees this request's deadline
+        token = _current_deadline.set(deadline)
+        try:
+            app_task = asyncio.ensure_future(self.app(scope, messages.get, send_wrapper))
+        finally:
+            _current_deadline.reset(token)
+
+        async def watch_client():
+            # Forward request messages to the handler and notice a disconnect while it still runs
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    if not app_task.done():
+                        deadline.disconnected = True
+                        _count("client_disconnects")
+                        app_task.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(watch_client())
+        timed_out = False
+        try:
+            done, _ = await asyncio.wait({app_task}, timeout=deadline.remaining())
+            if not done:
+                timed_out = True
+                _count("deadline_exceeded")
+                app_task.cancel()
+            try:
+                await app_task
+                _count("completed")
+            except asyncio.CancelledError:
+                if not (timed_out or deadline.disconnected):
+                    raise
+                if timed_out and not response_started:
+                    await self._send_timeout(send, deadline)
+        finally:
+            watcher.cancel()
+
+    @staticmethod
+    async def _send_timeout(send, deadline: RequestDeadline):
+        body = json.dumps({"detail": f"Request exceeded its {deadline.budget_seconds:g}s deadline"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
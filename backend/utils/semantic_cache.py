@@ -0,0 +1,226 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from typing import Dict, List, Optional
+from datetime import datetime
+from dotenv import load_dotenv
+from scipy.sparse import vstack
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.metrics.pairwise import linear_kernel
+from utils.knowledge_base import knowledge_base
+
+load_dotenv()
+
+# Cosine similarity of normalized questions needed to reuse an answer
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("MENTOR_CACHE_THRESHOLD", "0.85"))
+SEMANTIC_CACHE_MAX_PER_SKILL = int(os.getenv("MENTOR_CACHE_MAX_PER_SKILL", "500"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("MENTOR_CACHE_TTL_SECONDS", "86400"))
+
+# Words that change the phrasing of a question but not what is asked
+_FILLER_WORDS = {
+    "what", "whats", "is", "are", "a", "an", "the", "please", "can", "could", "would", "you", "explain",
+    "tell", "me", "about", "how", "do", "does", "i", "to", "in", "of", "with", "and", "my", "write",
+    "use", "using", "vs", "versus", "between", "difference", "differences", "work", "works", "mean", "means"
+}
+_ABBREVIATIONS = {"js": "javascript", "py": "python", "ts": "typescript", "k8s": "kubernetes", "db": "database"}
+# Partitions; a question naming none of these goes to its context's skill, or "general"
+PARTITION_SKILLS = [
+    "machine learning", "javascript", "typescript", "kubernetes", "node.js", "python", "docker", "react",
+    "java", "html", "css", "sql", "git", "aws"
+]
+
+# Words that make a question lean on the conversation so far ("why is that?", "show an example of it")
+_FOLLOW_UP_WORDS = {
+    "it", "its", "that", "this", "these", "those", "them", "they", "their", "above", "previous", "earlier",
+    "again", "also", "else", "more", "instead", "same"
+}
+_FOLLOW_UP_OPENERS = ("and ", "but ", "so ", "then ", "what about", "how about", "ok", "okay")
+
+def is_follow_up(question: str) -> bool:
+    """True when a question only makes sense given the conversation before it"""
+    text = " ".join(re.sub(r"[^a-z0-9 ]", " ", question.lower()).split())
+    if not normalize_question(question) or text.startswith(_FOLLOW_UP_OPENERS):
+        return True
+    return any(word in _FOLLOW_UP_WORDS for word in text.split())
+
+def normalize_question(question: str, stem: bool = True) -> str:
+    """Lowercase, expand abbreviations, drop filler words and (with stem) plural 's'"""
+    words = re.sub(r"[^a-z0-9+#. ]", " ", question.lower()).split()
+    normalized = []
+    for word in words:
+        word = _ABBREVIATIONS.get(word.strip("."), word.strip("."))
+        if not word or word in _FILLER_WORDS:
+            continue
+        if stem and len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        normalized.append(word)
+    return " ".join(normalized)
+
+class _Partition:
+    """Cached answers for one skill; the similarity matrix is rebuilt lazily after changes"""
+
+    def __init__(self):
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.matrix = None
+        self.keys: List[str] = []
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+class SemanticAnswerCache:
+    """
+    Reuses mentor answers across paraphrased questions.
+
+    Questions are normalized and vectorized with character n-gram TF-IDF (hashed n-grams,
+    IDF from the mentor knowledge-base corpus), so "what is a closure in js" and "explain
+    JS closures" land close together. Entries are partitioned per skill, which keeps each
+    nearest-neighbour search small and stops a Python answer being reused for a Java
+    question; each partition is an LRU with a TTL.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_per_skill: int = SEMANTIC_CACHE_MAX_PER_SKILL,
+                 ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS):
+        self.threshold = threshold
+        self.max_per_skill = max_per_skill
+        self.ttl_seconds = ttl_seconds
+        self._vectorizer = HashingVectorizer(
+            analyzer="char_wb", ngram_range=(3, 5), alternate_sign=False, norm=None, n_features=2 ** 18
+        )
+        corpus = [
+            normalize_question(f"{entry['question']} {' '.join(entry.get('keywords', []))} {entry['answer']}")
+            for entry in knowledge_base.entries
+        ] or ["programming question"]
+        self._idf = TfidfTransformer(sublinear_tf=True).fit(self._vectorizer.transform(corpus))
+        self._partitions: Dict[str, _Partition] = defaultdict(_Partition)
+        self._lock = threading.Lock()
+        self._hit_similarities = deque(maxlen=1000)
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "expired": 0, "bypassed": 0}
+
+    def _vectorize(self, normalized: str):
+        return self._idf.transform(self._vectorizer.transform([normalized]))
+
+    def skill_for(self, question: str, context: Dict = None) -> str:
+        """Partition key: a skill named in the question, else the context's skill, else "general\""""
+        text = f" {normalize_question(question, stem=False)} "
+        for skill in PARTITION_SKILLS:
+            if f" {skill} " in text:
+                return skill
+        for key in ("skill", "current_skill", "topic"):
+            value = (context or {}).get(key)
+            # Only known skills, so client-supplied context cannot create unbounded partitions
+            if isinstance(value, str) and value.strip().lower() in PARTITION_SKILLS:
+                return value.strip().lower()
+        return "general"
+
+    @staticmethod
+    def cacheable(question: str) -> bool:
+        # Decided from the question, not the context: conversation memory is attached to every turn after
+        # the first, but a standalone question gets the same answer whatever came before it
+        return not is_follow_up(question)
+
+    def _rebuild(self, partition: _Partition):
+        partition.keys = list(partition.entries)
+        partition.matrix = vstack([partition.entries[key]["vector"] for key in partition.keys]) if partition.keys else None
+        partition.dirty = False
+
+    def lookup(self, question: str, context: Dict = None) -> Optional[Dict]:
+        """Cached answer for the nearest earlier question above the threshold, else None"""
+        if not self.cacheable(question):
+            with self._lock:
+                self.stats["bypassed"] += 1
+            return None
+        normalized = normalize_question(question)
+        skill = self.skill_for(question, context)
+        vector = self._vectorize(normalized)
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            partition = self._partitions[skill]
+            if partition.dirty:
+                self._rebuild(partition)
+            best_key, best_score = None, 0.0
+            if partition.matrix is not None:
+                scores = linear_kernel(vector, partition.matrix).ravel()
+                best = int(scores.argmax())
+                best_key, best_score = partition.keys[best], float(scores[best])
+
+            entry = partition.entries.get(best_key) if best_score >= self.threshold else None
+            if entry is not None and time.monotonic() - entry["stored_at"] > self.ttl_seconds:
+                del partition.entries[best_key]
+                partition.dirty = True
+                self.stats["expired"] += 1
+                entry = None
+
+            if entry is None:
+                partition.misses += 1
+                self.stats["misses"] += 1
+                return None
+
+            partition.entries.move_to_end(best_key)
+            partition.hits += 1
+            entry["hits"] += 1
+            self.stats["hits"] += 1
+            self._hit_similarities.append(best_score)
+            return {**entry["answer"], "cache_similarity": round(best_score, 3), "cached_question": entry["question"]}
+
+    def store(self, question: str, answer: Dict, context: Dict = None):
+        """Remember a genuine LLM answer (never a fallback) for later paraphrases"""
+        if not self.cacheable(question):
+            return
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        skill = self.skill_for(question, context)
+        vector = self._vectorize(normalized)
+        with self._lock:
+            partition = self._partitions[skill]
+            partition.entries[normalized] = {
+                "question": question,
+                "vector": vector,
+                "answer": {k: v for k, v in answer.items() if k not in ("type", "served_by", "timestamp")},
+                "stored_at": time.monotonic(),
+                "hits": 0
+            }
+            partition.entries.move_to_end(normalized)
+            while len(partition.entries) > self.max_per_skill:
+                partition.entries.popitem(last=False)
+                partition.evictions += 1
+            partition.dirty = True
+            self.stats["stores"] += 1
+
+    def get_report(self) -> Dict:
+        """Hit rate overall and per skill partition, for the admin dashboard"""
+        with self._lock:
+            partitions = {
+                skill: {
+                    "entries": len(partition.entries),
+                    "hits": partition.hits,
+                    "misses": partition.misses,
+                    "hit_rate": round(partition.hits / max(partition.hits + partition.misses, 1), 4),
+                    "evictions": partition.evictions,
+                    "top_questions": [
+                        {"question": entry["question"], "hits": entry["hits"]}
+                        for entry in sorted(partition.entries.values(), key=lambda e: e["hits"], reverse=True)[:5]
+                        if entry["hits"]
+                    ]
+                }
+                for skill, partition in self._partitions.items()
+            }
+            stats = dict(self.stats)
+            similarities = list(self._hit_similarities)
+        return {
+            "threshold": self.threshold,
+            "max_per_skill": self.max_per_skill,
+            "ttl_seconds": self.ttl_seconds,
+            **stats,
+            "hit_rate": round(stats["hits"] / max(stats["lookups"], 1), 4),
+            "mean_hit_similarity": round(sum(similarities) / len(similarities), 3) if similarities else None,
+            "partitions": partitions,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global semantic answer cache instance
+semantic_cache = SemanticAnswerCache()
@@ -1,17 +1,131 @@
-import google.generativeai as genai
-import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import numpy as np
+from collections import OrderedDict, defaultdict
 from datetime import datetime
+import copy
 import json
+import os
+import threading
+import warnings
 from dotenv import load_dotenv
+from utils.llm_client import llm_client
+from utils.llm_metrics import fallback_reason, llm_metrics
+from utils.model_router import expect_json_document
+from utils.prompt_registry import prompt_registry
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+SKILL_ANALYSIS_CACHE_SIZE = int(os.getenv("SKILL_ANALYSIS_CACHE_SIZE", "1000"))
+# 0 keys the advice on bucket membership alone; e.g. 0.5 also includes scores rounded to 0.5
+SKILL_ANALYSIS_SCORE_ROUNDING = float(os.getenv("SKILL_ANALYSIS_SCORE_ROUNDING", "0"))
+
+def score_profile_signature(strong_skills: Dict, medium_skills: Dict, weak_skills: Dict,
+                            rounding: float = SKILL_ANALYSIS_SCORE_ROUNDING) -> Tuple:
+    """
+    Canonical (strong, medium, weak) skill sets: lowercased and sorted, optionally paired
+    with scores rounded to the given step. Users with the same signature get the same advice.
+    """
+    def bucket(skills: Dict) -> Tuple:
+        if rounding > 0:
+            return tuple(sorted((skill.strip().lower(), round(round(score / rounding) * rounding, 2))
+                                for skill, score in skills.items()))
+        return tuple(sorted(skill.strip().lower() for skill in skills))
+    return bucket(strong_skills), bucket(medium_skills), bucket(weak_skills)
+
+def _bucket_values(bucket: Tuple):
+    """Prompt value for a signature bucket: a {skill: score} dict with rounding, else a list"""
+    return dict(bucket) if bucket and isinstance(bucket[0], tuple) else list(bucket)
+
+# Bucket thresholds shared by the per-user and cohort analyses
+STRONG_SCORE = 8.0
+WEAK_SCORE = 6.0
+COHORT_PERCENTILES = (25, 50, 75, 90)
+
+def score_matrix(scores_by_user: Dict[str, Dict[str, float]], skills: List[str] = None) -> Tuple[List[str], List[str], np.ndarray]:
+    """
+    (users, skills, users x skills float matrix) from {user_id: {skill: score}}; a skill a user
+    was not assessed on is NaN. Skills default to the sorted union over all users.
+    """
+    users = list(scores_by_user)
+    if skills is None:
+        skills = sorted({skill for scores in scores_by_user.values() for skill in scores})
+    column = {skill: j for j, skill in enumerate(skills)}
+    matrix = np.full((len(users), len(skills)), np.nan)
+    for i, scores in enumerate(scores_by_user.values()):
+        for skill, score in scores.items():
+            j = column.get(skill)
+            if j is not None:
+                matrix[i, j] = score
+    return users, list(skills), matrix
+
+def _round(value) -> Optional[float]:
+    """JSON-safe score rounded to 2 places; NaN becomes None"""
+    return None if np.isnan(value) else round(float(value), 2)
+
+def _values_per_row(mask: np.ndarray, values: np.ndarray) -> List[List]:
+    """values[i][mask[i]] as Python lists, one per row, from a single row-major pass"""
+    flat = values[mask].tolist()
+    bounds = np.concatenate(([0], np.cumsum(mask.sum(axis=1)))).tolist()
+    return [flat[bounds[i]:bounds[i + 1]] for i in range(mask.shape[0])]
+
+def _skills_per_row(mask: np.ndarray, skill_names: np.ndarray) -> List[List[str]]:
+    return _values_per_row(mask, np.broadcast_to(skill_names, mask.shape))
+
+class AnalysisCache:
+    """Bounded LRU of Gemini skill advice keyed by (kind, score-profile signature), shared by all users"""
+
+    def __init__(self, max_entries: int = SKILL_ANALYSIS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "stores": 0})
+        self.evictions = 0
+
+    def get(self, kind: str, signature: Tuple) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get((kind, signature))
+            if entry is None:
+                self._stats[kind]["misses"] += 1
+                return None
+            self._entries.move_to_end((kind, signature))
+            self._stats[kind]["hits"] += 1
+            return copy.deepcopy(entry)
+
+    def put(self, kind: str, signature: Tuple, value: Dict):
+        with self._lock:
+            self._entries[(kind, signature)] = copy.deepcopy(value)
+            self._entries.move_to_end((kind, signature))
+            self._stats[kind]["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_report(self) -> Dict:
+        with self._lock:
+            kinds = {
+                kind: {**stats, "hit_rate": round(stats["hits"] / max(stats["hits"] + stats["misses"], 1), 4)}
+                for kind, stats in self._stats.items()
+            }
+            entries = len(self._entries)
+        hits = sum(stats["hits"] for stats in kinds.values())
+        lookups = hits + sum(stats["misses"] for stats in kinds.values())
+        return {
+            "max_entries": self.max_entries,
+            "score_rounding": SKILL_ANALYSIS_SCORE_ROUNDING,
+            "entries": entries,
+            "evictions": self.evictions,
+            "hits": hits,
+            "lookups": lookups,
+            "hit_rate": round(hits / max(lookups, 1), 4),
+            "kinds": kinds,
+            "timestamp": datetime.utcnow().isoformat()
+        }
 
 class SkillAnalyzer:
     def __init__(self):
-        self.model = genai.GenerativeModel("gemini-pro")
+        self.llm = llm_client
+        # Advice depends only on the score profile, so it is cached across users
+        self.cache = AnalysisCache()
         
     def analyze_skill_strengths(self, assessment_scores: Dict[str, float]) -> Dict:
         """
@@ -29,9 +143,9 @@ class SkillAnalyzer:
             }
         
         # Categorize skills based on scores
-        strong_skills = {skill: score for skill, score in assessment_scores.items() if score >= 8.0}
-        weak_skills = {skill: score for skill, score in assessment_scores.items() if score < 6.0}
-        medium_skills = {skill: score for skill, score in assessment_scores.items() if 6.0 <= score < 8.0}
+        strong_skills = {skill: score for skill, score in assessment_scores.items() if score >= STRONG_SCORE}
+        weak_skills = {skill: score for skill, score in assessment_scores.items() if score < WEAK_SCORE}
+        medium_skills = {skill: score for skill, score in assessment_scores.items() if WEAK_SCORE <= score < STRONG_SCORE}
         
         # Generate AI-powered analysis
         analysis = self._generate_skill_analysis(strong_skills, medium_skills, weak_skills)
@@ -63,48 +177,55 @@ class SkillAnalyzer:
     def _generate_skill_analysis(self, strong_skills: Dict, medium_skills: Dict, weak_skills: Dict) -> Dict:
         """Generate AI-powered analysis of skill strengths and weaknesses"""
         
-        prompt = f"""Analyze the following skill assessment results and provide detailed insights:
-
-Strong Skills (Score >= 8.0): {dict(strong_skills)}
-Medium Skills (Score 6.0-7.9): {dict(medium_skills)}
-Weak Skills (Score < 6.0): {dict(weak_skills)}
-
-Provide analysis in the following JSON format:
-{{
-    "strength_analysis": "Detailed analysis of strong skills and how to leverage them",
-    "improvement_areas": "Analysis of weak skills and specific improvement strategies",
-    "skill_gaps": "Identified gaps in the skill set",
-    "career_recommendations": "Career path suggestions based on skill profile",
-    "learning_priorities": "Prioritized list of skills to focus on",
-    "next_steps": "Specific actionable next steps for skill development"
-}}
-
-Focus on practical, actionable insights that can guide learning and career development.
-"""
+        signature = score_profile_signature(strong_skills, medium_skills, weak_skills)
+        cached = self.cache.get("skill_analysis", signature)
+        if cached is not None:
+            return cached
+        
+        # Skip straight to the fallback when Gemini is not configured or its circuit breaker is open
+        if not self.llm.is_available():
+            llm_metrics.record_fallback("skill_analysis", "unavailable")
+            return self._get_fallback_skill_analysis(weak_skills, "AI analysis temporarily unavailable")
+        
+        # The prompt is built from the signature, so every user sharing it gets equally valid advice
+        strong, medium, weak = signature
+        prompt, prompt_version = prompt_registry.render(
+            "skill_analysis",
+            strong_skills=_bucket_values(strong),
+            medium_skills=_bucket_values(medium),
+            weak_skills=_bucket_values(weak)
+        )
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text
+            response_text = self.llm.generate_sync(prompt, call_site="skill_analysis", prompt_version=prompt_version,
+                                                   validate=expect_json_document)
             
             # Extract JSON from response
             if "```json" in response_text:
                 json_start = response_text.find("```json") + 7
                 json_end = response_text.find("```", json_start)
                 json_str = response_text[json_start:json_end].strip()
-                return json.loads(json_str)
+                analysis = json.loads(json_str)
             else:
                 # Try to parse as JSON directly
-                return json.loads(response_text)
+                analysis = json.loads(response_text)
+            self.cache.put("skill_analysis", signature, analysis)
+            return analysis
                 
         except Exception as e:
-            return {
-                "strength_analysis": f"Error generating analysis: {str(e)}",
-                "improvement_areas": "Focus on skills with scores below 6.0",
-                "skill_gaps": "Unable to analyze gaps due to processing error",
-                "career_recommendations": "Consider retaking assessment for better analysis",
-                "learning_priorities": list(weak_skills.keys()),
-                "next_steps": "Retake assessment or contact support"
-            }
+            llm_metrics.record_fallback("skill_analysis", fallback_reason(e))
+            return self._get_fallback_skill_analysis(weak_skills, f"Error generating analysis: {str(e)}")
+    
+    def _get_fallback_skill_analysis(self, weak_skills: Dict, reason: str) -> Dict:
+        """Fallback skill analysis when AI is not available"""
+        return {
+            "strength_analysis": reason,
+            "improvement_areas": "Focus on skills with scores below 6.0",
+            "skill_gaps": "Unable to analyze gaps due to processing error",
+            "career_recommendations": "Consider retaking assessment for better analysis",
+            "learning_priorities": list(weak_skills.keys()),
+            "next_steps": "Retake assessment or contact support"
+        }
     
     def generate_personalized_learning_path(self, skill_analysis: Dict) -> Dict:
         """Generate personalized learning path based on skill analysis"""
@@ -112,51 +233,35 @@ Focus on practical, actionable insights that can guide learning and career devel
         weak_skills = skill_analysis.get("weak_skills", [])
         medium_skills = skill_analysis.get("medium_skills", [])
         
-        prompt = f"""Based on the skill analysis, generate a personalized learning path:
-
-Weak Skills to Improve: {weak_skills}
-Medium Skills to Strengthen: {medium_skills}
-
-Create a structured learning path with:
-1. Priority order for learning
-2. Estimated time commitment for each skill
-3. Specific learning objectives
-4. Recommended resources and courses
-5. Practice exercises and projects
-6. Milestones and checkpoints
-
-Format as JSON:
-{{
-    "learning_path": [
-        {{
-            "skill": "skill_name",
-            "priority": "high/medium/low",
-            "estimated_weeks": 4,
-            "learning_objectives": ["objective1", "objective2"],
-            "resources": ["resource1", "resource2"],
-            "exercises": ["exercise1", "exercise2"],
-            "milestones": ["milestone1", "milestone2"]
-        }}
-    ],
-    "total_estimated_weeks": 12,
-    "focus_areas": ["area1", "area2"],
-    "success_metrics": ["metric1", "metric2"]
-}}
-"""
+        # Only bucket membership goes into this prompt, so scores never split the cache key
+        _, medium, weak = score_profile_signature({}, dict.fromkeys(medium_skills, 0), dict.fromkeys(weak_skills, 0),
+                                                  rounding=0)
+        cached = self.cache.get("learning_path", (medium, weak))
+        if cached is not None:
+            return cached
+        
+        prompt, prompt_version = prompt_registry.render(
+            "personalized_learning_path",
+            weak_skills=list(weak),
+            medium_skills=list(medium)
+        )
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text
+            response_text = self.llm.generate_sync(prompt, call_site="learning_path", prompt_version=prompt_version,
+                                                   validate=expect_json_document)
             
             if "```json" in response_text:
                 json_start = response_text.find("```json") + 7
                 json_end = response_text.find("```", json_start)
                 json_str = response_text[json_start:json_end].strip()
-                return json.loads(json_str)
+                learning_path = json.loads(json_str)
             else:
-                return json.loads(response_text)
+                learning_path = json.loads(response_text)
+            self.cache.put("learning_path", (medium, weak), learning_path)
+            return learning_path
                 
         except Exception as e:
+            llm_metrics.record_fallback("learning_path", fallback_reason(e))
             return {
                 "learning_path": [],
                 "total_estimated_weeks": 0,
@@ -211,5 +316,137 @@ Format as JSON:
             "timestamp": datetime.utcnow().isoformat()
         }
 
+    def analyze_cohort(self, scores_by_user: Dict[str, Dict[str, float]],
+                       previous_scores: Dict[str, Dict[str, float]] = None,
+                       include_users: bool = True) -> Dict:
+        """
+        Bucket membership, averages, percentiles and improvement for a whole cohort at once.
+
+        Scores are loaded into one users x skills matrix and every metric is a NumPy
+        reduction over it, instead of one analyze_skill_strengths / track_skill_progress
+        call per user. No Gemini advice is generated here; per-user advice stays with
+        analyze_skill_strengths. Improvement only compares skills assessed both times.
+        """
+        users, skills, current = score_matrix(scores_by_user)
+        if not users or not skills:
+            return {"users": [], "cohort": {"total_users": len(users), "total_skills": 0, "skills": {}},
+                    "timestamp": datetime.utcnow().isoformat()}
+
+        assessed = ~np.isnan(current)
+        # NaN compares False, so unassessed skills fall in no bucket
+        with np.errstate(invalid="ignore"):
+            strong = current >= STRONG_SCORE
+            weak = current < WEAK_SCORE
+        medium = assessed & ~strong & ~weak
+
+        per_user_count = assessed.sum(axis=1)
+        per_user_sum = np.where(assessed, current, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            user_average = np.where(per_user_count > 0, per_user_sum / per_user_count, np.nan)
+
+        per_skill_count = assessed.sum(axis=0)
+        with warnings.catch_warnings():
+            # All-NaN columns (no one assessed) legitimately yield NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            skill_mean = np.nanmean(current, axis=0)
+            skill_percentiles = np.nanpercentile(current, COHORT_PERCENTILES, axis=0)
+
+        delta = None
+        if previous_scores:
+            _, _, previous = score_matrix({user: previous_scores.get(user, {}) for user in users}, skills)
+            delta = current - previous
+            compared = ~np.isnan(delta)
+            improved = compared & (delta > 0)
+            declined = compared & (delta < 0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                base = np.maximum(np.where(compared, previous, 1.0), 1.0)
+                delta_percentage = np.where(compared, delta / base * 100, np.nan)
+                user_compared = compared.sum(axis=1)
+                user_delta = np.where(user_compared > 0, np.where(compared, delta, 0.0).sum(axis=1) / user_compared, np.nan)
+                skill_compared = compared.sum(axis=0)
+                skill_delta = np.where(skill_compared > 0, np.where(compared, delta, 0.0).sum(axis=0) / skill_compared, np.nan)
+
+        skill_names = np.array(skills, dtype=object)
+        cohort_skills = {}
+        for j, skill in enumerate(skills):
+            entry = {
+                "assessed_users": int(per_skill_count[j]),
+                "average_score": _round(skill_mean[j]),
+                "percentiles": dict(zip((f"p{q}" for q in COHORT_PERCENTILES), map(_round, skill_percentiles[:, j]))),
+                "strong_count": int(strong[:, j].sum()),
+                "medium_count": int(medium[:, j].sum()),
+                "weak_count": int(weak[:, j].sum())
+            }
+            if delta is not None:
+                entry["improvement"] = {
+                    "compared_users": int(skill_compared[j]),
+                    "average_improvement": _round(skill_delta[j]),
+                    "improved_count": int(improved[:, j].sum()),
+                    "declined_count": int(declined[:, j].sum())
+                }
+            cohort_skills[skill] = entry
+
+        cohort = {
+            "total_users": len(users),
+            "total_skills": len(skills),
+            "assessed_scores": int(per_user_count.sum()),
+            "average_score": _round(np.nanmean(current)),
+            "user_average_percentiles": dict(zip(
+                (f"p{q}" for q in COHORT_PERCENTILES),
+                map(_round, np.nanpercentile(user_average, COHORT_PERCENTILES))
+            )),
+            "bucket_totals": {
+                "strong": int(strong.sum()),
+                "medium": int(medium.sum()),
+                "weak": int(weak.sum())
+            },
+            "weakest_skills": [skills[j] for j in np.argsort(-weak.sum(axis=0), kind="stable")[:5] if weak[:, j].any()],
+            "skills": cohort_skills
+        }
+        if delta is not None:
+            cohort["improvement"] = {
+                "compared_users": int((user_compared > 0).sum()),
+                "average_improvement": _round(np.nanmean(delta)) if compared.any() else None,
+                "improved_users": int((user_delta > 0).sum()),
+                "declined_users": int((user_delta < 0).sum())
+            }
+
+        result = {"cohort": cohort, "timestamp": datetime.utcnow().isoformat()}
+        if not include_users:
+            return result
+
+        # Per-user lists are cut from one row-major pass over each mask, not indexed user by user
+        strong_lists, medium_lists, weak_lists = (_skills_per_row(mask, skill_names) for mask in (strong, medium, weak))
+        averages = np.round(user_average, 2).tolist()
+        per_user = []
+        for i, user_id in enumerate(users):
+            per_user.append({
+                "user_id": user_id,
+                "strong_skills": strong_lists[i],
+                "medium_skills": medium_lists[i],
+                "weak_skills": weak_lists[i],
+                "average_score": None if per_user_count[i] == 0 else averages[i],
+                "total_skills_assessed": int(per_user_count[i])
+            })
+
+        if delta is not None:
+            compared_lists = _skills_per_row(compared, skill_names)
+            changes = _values_per_row(compared, np.round(delta, 2))
+            percentages = _values_per_row(compared, np.round(delta_percentage, 2))
+            improved_lists, declined_lists = (_skills_per_row(mask, skill_names) for mask in (improved, declined))
+            user_deltas = np.round(user_delta, 2).tolist()
+            for i, entry in enumerate(per_user):
+                entry["improvement"] = {
+                    "skills": {
+                        skill: {"improvement": change, "improvement_percentage": percentage}
+                        for skill, change, percentage in zip(compared_lists[i], changes[i], percentages[i])
+                    },
+                    "average_improvement": None if user_compared[i] == 0 else user_deltas[i],
+                    "improved_skills": improved_lists[i],
+                    "declined_skills": declined_lists[i]
+                }
+        result["users"] = per_user
+        return result
+
 # Global analyzer instance
 skill_analyzer = SkillAnalyzer() 
\ No newline at end of file
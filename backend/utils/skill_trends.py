@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from datetime import datetime
+import numpy as np
+from dotenv import load_dotenv
+from utils.llm_metrics import LatencyHistogram
+
+load_dotenv()
+
+# Weight of the newest score in the exponentially weighted moving average
+SKILL_TREND_EWMA_ALPHA = float(os.getenv("SKILL_TREND_EWMA_ALPHA", "0.5"))
+# Assessments kept per user; older ones are dropped (the EWMA still reflects them)
+SKILL_TREND_MAX_POINTS = int(os.getenv("SKILL_TREND_MAX_POINTS", "256"))
+# Slopes (points per assessment) within +/- this are reported as stable
+SKILL_TREND_STABLE_SLOPE = float(os.getenv("SKILL_TREND_STABLE_SLOPE", "0.1"))
+
+def _timestamp(value: str) -> float:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return time.time()
+
+def _round(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 2)
+
+class _UserSeries:
+    """One user's assessments as an (assessments x skills) float32 matrix; NaN where a skill was not assessed"""
+
+    def __init__(self):
+        self.skills: List[str] = []
+        self.columns: Dict[str, int] = {}
+        self.scores = np.full((4, 4), np.nan, dtype=np.float32)
+        self.times = np.zeros(4)
+        self.length = 0
+        self.total = 0
+        self.ewma = np.full(4, np.nan)
+        self.trends: Optional[Dict] = None
+
+    def _column(self, skill: str) -> int:
+        column = self.columns.get(skill)
+        if column is None:
+            column = self.columns[skill] = len(self.skills)
+            self.skills.append(skill)
+            if column >= self.scores.shape[1]:
+                width = self.scores.shape[1] * 2
+                self.scores = np.pad(self.scores, ((0, 0), (0, width - self.scores.shape[1])), constant_values=np.nan)
+                self.ewma = np.pad(self.ewma, (0, width - self.ewma.shape[0]), constant_values=np.nan)
+        return column
+
+    def append(self, skill_scores: Dict[str, float], timestamp: float, max_points: int, alpha: float):
+        columns = [self._column(skill) for skill in skill_scores]
+        row = np.full(self.scores.shape[1], np.nan)
+        row[columns] = list(skill_scores.values())
+
+        if self.length == self.scores.shape[0]:
+            if self.length < max_points:
+                rows = min(self.length * 2, max_points)
+                self.scores = np.pad(self.scores, ((0, rows - self.length), (0, 0)), constant_values=np.nan)
+                self.times = np.pad(self.times, (0, rows - self.length))
+            else:
+                # Full: shift out the oldest assessment
+                self.scores[:-1] = self.scores[1:]
+                self.times[:-1] = self.times[1:]
+                self.length -= 1
+        self.scores[self.length] = row
+        self.times[self.length] = timestamp
+        self.length += 1
+        self.total += 1
+
+        observed = ~np.isnan(row)
+        self.ewma = np.where(observed & np.isnan(self.ewma), row, self.ewma)
+        self.ewma = np.where(observed, alpha * row + (1 - alpha) * self.ewma, self.ewma)
+        self.trends = None
+
+def compute_trends(scores: np.ndarray, stable_slope: float = SKILL_TREND_STABLE_SLOPE) -> Dict[str, np.ndarray]:
+    """
+    Per-column (skill) trend statistics of an (assessments x skills) matrix with NaN gaps,
+    all as array reductions: least-squares slope in points per assessment, volatility as
+    the RMS deviation from that line, first/latest observed score and observation count.
+    """
+    scores = scores.astype(np.float64)
+    observed = ~np.isnan(scores)
+    counts = observed.sum(axis=0)
+    safe_counts = np.maximum(counts, 1)
+    steps = np.arange(scores.shape[0], dtype=np.float64)[:, None]
+    values = np.where(observed, scores, 0.0)
+
+    mean_step = np.where(observed, steps, 0.0).sum(axis=0) / safe_counts
+    mean_score = values.sum(axis=0) / safe_counts
+    step_dev = np.where(observed, steps - mean_step, 0.0)
+    step_var = (step_dev ** 2).sum(axis=0)
+    covariance = (step_dev * (values - mean_score)).sum(axis=0)
+    slope = np.divide(covariance, step_var, out=np.zeros_like(covariance), where=step_var > 0)
+    residuals = np.where(observed, values - mean_score - slope * step_dev, 0.0)
+    volatility = np.sqrt((residuals ** 2).sum(axis=0) / safe_counts)
+
+    columns = np.arange(scores.shape[1])
+    first = scores[observed.argmax(axis=0), columns]
+    latest = scores[scores.shape[0] - 1 - observed[::-1].argmax(axis=0), columns]
+    direction = np.where(slope > stable_slope, "improving", np.where(slope < -stable_slope, "declining", "stable"))
+    direction = np.where(counts < 2, "insufficient_data", direction)
+    return {
+        "count": counts, "slope": slope, "volatility": volatility, "mean": mean_score,
+        "first": first, "latest": latest, "direction": direction
+    }
+
+class SkillTrendStore:
+    """
+    Per-user, per-skill assessment score series, appended as assessments complete.
+
+    Trend statistics for all of a user's skills are computed in one vectorized pass and
+    kept until the user's next assessment, so the progress endpoint neither rescans the
+    activity log nor recomputes trends on every request. The EWMA is updated as each
+    assessment arrives.
+    """
+
+    def __init__(self, alpha: float = SKILL_TREND_EWMA_ALPHA, max_points: int = SKILL_TREND_MAX_POINTS,
+                 stable_slope: float = SKILL_TREND_STABLE_SLOPE):
+        self.alpha = alpha
+        self.max_points = max_points
+        self.stable_slope = stable_slope
+        self._series: Dict[str, _UserSeries] = {}
+        self._lock = threading.Lock()
+        self._latency = LatencyHistogram()
+        self.stats = {"assessments_recorded": 0, "points_dropped": 0, "trend_requests": 0, "trend_computations": 0}
+
+    def record(self, user_id: str, skill_scores: Dict[str, float], timestamp: str = None):
+        """Append one completed assessment's {skill: score}"""
+        skill_scores = {skill: float(score) for skill, score in (skill_scores or {}).items()
+                        if isinstance(score, (int, float))}
+        if not skill_scores:
+            return
+        with self._lock:
+            series = self._series.get(user_id)
+            if series is None:
+                series = self._series[user_id] = _UserSeries()
+            dropped = series.length >= self.max_points
+            series.append(skill_scores, _timestamp(timestamp), self.max_points, self.alpha)
+            self.stats["assessments_recorded"] += 1
+            self.stats["points_dropped"] += dropped
+
+    def assessment_count(self, user_id: str) -> int:
+        with self._lock:
+            series = self._series.get(user_id)
+            return series.total if series else 0
+
+    def get_trends(self, user_id: str) -> Optional[Dict]:
+        """Slope, EWMA, volatility, first and latest score for each of the user's skills; None if unknown"""
+        with self._lock:
+            series = self._series.get(user_id)
+            if series is None:
+                return None
+            self.stats["trend_requests"] += 1
+            if series.trends is None:
+                started = time.monotonic()
+                series.trends = self._summarize(series)
+                self.stats["trend_computations"] += 1
+                self._latency.observe((time.monotonic() - started) * 1000)
+            return series.trends
+
+    def _summarize(self, series: _UserSeries) -> Dict:
+        width = len(series.skills)
+        stats = compute_trends(series.scores[:series.length, :width], self.stable_slope)
+        skills = {}
+        for j, skill in enumerate(series.skills):
+            skills[skill] = {
+                "assessments": int(stats["count"][j]),
+                "first_score": _round(stats["first"][j]),
+                "latest_score": _round(stats["latest"][j]),
+                "change": _round(stats["latest"][j] - stats["first"][j]),
+                "slope_per_assessment": round(float(stats["slope"][j]), 3),
+                "ewma": _round(series.ewma[j]),
+                "volatility": round(float(stats["volatility"][j]), 3),
+                "trend": str(stats["direction"][j])
+            }
+        return {
+            "assessments": series.total,
+            "assessments_in_window": series.length,
+            "first_assessed_at": datetime.utcfromtimestamp(series.times[0]).isoformat(),
+            "last_assessed_at": datetime.utcfromtimestamp(series.times[series.length - 1]).isoformat(),
+            "ewma_alpha": self.alpha,
+            "skills": skills,
+            "summary": {
+                direction: [skill for skill, trend in skills.items() if trend["trend"] == direction]
+                for direction in ("improving", "declining", "stable")
+            }
+        }
+
+    def get_report(self) -> Dict:
+        """Series held, their memory footprint and how often trends were served precomputed"""
+        with self._lock:
+            stats = dict(self.stats)
+            users = len(self._series)
+            points = sum(series.length for series in self._series.values())
+            series_bytes = sum(series.scores.nbytes + series.times.nbytes + series.ewma.nbytes
+                               for series in self._series.values())
+            latency = self._latency.to_dict()
+        latency.pop("buckets", None)
+        return {
+            "ewma_alpha": self.alpha,
+            "max_points": self.max_points,
+            "stable_slope": self.stable_slope,
+            "users": users,
+            "points": points,
+            "series_bytes": series_bytes,
+            **stats,
+            "precomputed_rate": round(
+                1 - stats["trend_computations"] / max(stats["trend_requests"], 1), 4
+            ),
+            "compute_latency": latency,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+# Global skill trend store instance
+skill_trends = SkillTrendStore()
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 import json
 from collections import defaultdict
 import uuid
+from utils.skill_trends import skill_trends
 
 class UserActivityTracker:
     def __init__(self):
@@ -59,6 +60,10 @@ class UserActivityTracker:
         elif activity["activity_type"] == "assessment_completed":
             if "skills" in activity["details"]:
                 profile["skills_assessed"].update(activity["details"]["skills"])
+            # Per-skill score series for trend analysis
+            scores = activity["details"].get("skill_scores") or activity["details"].get("scores")
+            if isinstance(scores, dict):
+                skill_trends.record(user_id, scores, activity["timestamp"])
         
         elif activity["activity_type"] == "mentor_session":
             profile["mentor_sessions_count"] += 1
@@ -70,6 +75,16 @@ class UserActivityTracker:
         """Get recent activities for a specific user"""
         return self.user_activities[user_id][-limit:]
     
+    def get_learning_streak(self, user_id: str) -> int:
+        """Consecutive days, ending today, with at least one activity"""
+        active_days = {activity["timestamp"][:10] for activity in self.user_activities.get(user_id, [])}
+        streak = 0
+        day = datetime.utcnow().date()
+        while day.isoformat() in active_days:
+            streak += 1
+            day -= timedelta(days=1)
+        return streak
+
     def get_all_activities(self, limit: int = 100) -> List[Dict]:
         """Get recent activities across all users"""
         all_activities = []